@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.stats import COUNTERS, rebuild
+
+
+class Command(BaseCommand):
+    help = ('Recompute the enrollment counters (students per course and '
+            'subject, subjects per lecturer) and correct any that drifted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', default=','.join(COUNTERS),
+                            help='Comma-separated counters to rebuild: '
+                                 f'{", ".join(COUNTERS)}')
+
+    def handle(self, *args, **options):
+        names = options['only'].split(',')
+        for name in names:
+            if name not in COUNTERS:
+                raise CommandError(f'Unknown counter {name!r}.')
+        corrected = rebuild(names)
+        for name, rows in corrected.items():
+            style = self.style.WARNING if rows else self.style.SUCCESS
+            self.stdout.write(style(f'{name}: {rows} rows corrected'))
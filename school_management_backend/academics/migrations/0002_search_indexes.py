@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+# Trigram indexes on UPPER(column) serve the case-insensitive prefix search
+# (``istartswith``) used by the list endpoints. PostgreSQL only.
+TRIGRAM_INDEXES = [
+    ("academics_course_name_trgm", "academics_course", "name"),
+    ("academics_subject_name_trgm", "academics_subject", "name"),
+    ("academics_lecturer_first_name_trgm", "academics_lecturer", "first_name"),
+    ("academics_lecturer_last_name_trgm", "academics_lecturer", "last_name"),
+    ("academics_lecturer_email_trgm", "academics_lecturer", "email"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lecturer",
+            index=models.Index(
+                fields=["last_name", "first_name"], name="lecturer_name_idx"
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, column):
+    return Coalesce(Subquery(
+        queryset.filter(**{column: OuterRef("pk")}).order_by()
+        .values(column).annotate(n=Count("pk")).values("n")), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model("academics", "Course")
+    Lecturer = apps.get_model("academics", "Lecturer")
+    Subject = apps.get_model("academics", "Subject")
+    Student = apps.get_model("students", "Student")
+    Enrollment = Student.subjects.through
+    Course.objects.update(
+        student_count=count(Student.objects.all(), "course_id"))
+    Subject.objects.update(
+        student_count=count(Enrollment.objects.all(), "subject_id"))
+    Lecturer.objects.update(
+        subject_count=count(Subject.objects.all(), "lecturer_id"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academics", "0003_updated_at"),
+        ("students", "0003_student_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="student_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="lecturer",
+            name="subject_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="subject",
+            name="student_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,30 +1,45 @@
 from django.db import models
 
+from changes.models import LoggedModel
 
-class Course(models.Model):
+
+class Course(LoggedModel):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Enrollment counters, kept by academics.signals (see academics.stats).
+    student_count = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
 
-class Lecturer(models.Model):
+class Lecturer(LoggedModel):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    subject_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["last_name", "first_name"],
+                         name="lecturer_name_idx"),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 
-class Subject(models.Model):
+class Subject(LoggedModel):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     course = models.ForeignKey(Course, on_delete=models.CASCADE,
                                related_name="subjects")
     lecturer = models.ForeignKey(Lecturer, on_delete=models.PROTECT,
                                  related_name="subjects")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    student_count = models.IntegerField(default=0, editable=False)
 
     class Meta:
         unique_together = ("name", "course")
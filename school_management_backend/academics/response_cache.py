@@ -0,0 +1,128 @@
+import uuid
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework.response import Response
+
+from config.replicas import use_primary
+
+RESPONSE_CACHE_ALIAS = "responses"
+
+
+class ResponseCache:
+    """Versioned cache of detail payloads, keyed by resource and version.
+
+    Each resource (e.g. ``("course", 3)``) has a version token stored in the
+    cache. Payloads are stored under a key that embeds the current token, so
+    invalidation only has to replace the token; stale payloads are never
+    read again and age out via the backend's timeout. The backend is the
+    ``responses`` alias in ``CACHES`` (local memory, file, Redis, ...).
+    """
+
+    def __init__(self, alias=RESPONSE_CACHE_ALIAS):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self, kind, pk):
+        return f"resp-version:{kind}:{pk}"
+
+    def version(self, kind, pk):
+        """The current version token of a resource; None if the backend
+        stores nothing (dummy). Read it before loading the rows a payload
+        is built from, and pass it to ``set``."""
+        key = self._version_key(kind, pk)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def _payload_key(self, kind, pk, variant, version):
+        return f"resp:{kind}:{pk}:{version}:{variant}"
+
+    def get(self, kind, pk, variant="", version=None):
+        version = version or self.version(kind, pk)
+        if version is None:
+            return None
+        return self.cache.get(self._payload_key(kind, pk, variant, version))
+
+    def set(self, kind, pk, variant, data, version):
+        """Store ``data``, built from rows read under ``version``.
+
+        The payload is keyed by that version, not the current one: if an
+        invalidation lands while the rows are loaded, the payload goes
+        under the retired token and is never served. It is not stored at
+        all when the token has already moved.
+        """
+        if version is None or self.version(kind, pk) != version:
+            return
+        self.cache.set(self._payload_key(kind, pk, variant, version), data)
+
+    async def aversion(self, kind, pk):
+        key = self._version_key(kind, pk)
+        version = await self.cache.aget(key)
+        if version is None:
+            await self.cache.aadd(key, uuid.uuid4().hex, timeout=None)
+            version = await self.cache.aget(key)
+        return version
+
+    async def aget(self, kind, pk, variant="", version=None):
+        version = version or await self.aversion(kind, pk)
+        if version is None:
+            return None
+        return await self.cache.aget(
+            self._payload_key(kind, pk, variant, version))
+
+    async def aset(self, kind, pk, variant, data, version):
+        if version is None or await self.aversion(kind, pk) != version:
+            return
+        await self.cache.aset(
+            self._payload_key(kind, pk, variant, version), data)
+
+    def invalidate(self, kind, pks):
+        """Retire cached payloads for ``pks`` once the transaction commits."""
+        keys = {self._version_key(kind, pk) for pk in pks if pk is not None}
+        if keys:
+            transaction.on_commit(lambda: self.cache.set_many(
+                {key: uuid.uuid4().hex for key in keys}, timeout=None))
+
+
+response_cache = ResponseCache()
+
+
+class CachedRetrieveMixin:
+    """Serve retrieve() from the response cache under ``cache_kind``."""
+    cache_kind = None
+
+    def cache_pk(self):
+        """The URL lookup value as the model stores it, so ``01`` and ``1``
+        share one entry; None when it is not a valid value."""
+        meta = self.get_queryset().model._meta
+        field = meta.pk if self.lookup_field == "pk" \
+            else meta.get_field(self.lookup_field)
+        try:
+            return field.to_python(
+                self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValidationError:
+            return None
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.cache_pk()
+        if pk is None:
+            return super().retrieve(request, *args, **kwargs)
+        variant = request.query_params.urlencode()
+        version = response_cache.version(self.cache_kind, pk)
+        data = response_cache.get(self.cache_kind, pk, variant, version)
+        if data is not None:
+            return Response(data)
+        # A lagging replica must not refill the cache with stale data.
+        with use_primary():
+            response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(self.cache_kind, pk, variant, response.data,
+                               version)
+        return response
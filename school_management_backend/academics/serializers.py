@@ -1,35 +1,47 @@
 from rest_framework import serializers
 from .models import Course, Lecturer, Subject
+from config.fieldsets import DynamicFieldsMixin
+from config.relations import BulkPrimaryKeyRelatedField
+from students.enrollment import ACTIONS
 from students.models import Student
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ["id", "name", "description"]
 
 
-class LecturerSerializer(serializers.ModelSerializer):
+class LecturerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Lecturer
         fields = ["id", "first_name", "last_name", "email"]
 
 
-class StudentSummarySerializer(serializers.ModelSerializer):
+class StudentSummarySerializer(DynamicFieldsMixin,
+                               serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = ["id", "first_name", "last_name", "email"]
 
 
-class SubjectSerializer(serializers.ModelSerializer):
-    # Allow assigning students from Subject endpoints
-    students = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Student.objects.all(), required=False
+class SubjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # Allow assigning students from Subject endpoints. Only the columns the
+    # course check needs are loaded, in one query for the whole list; missing
+    # and wrong-course pks are reported together by validate().
+    students = BulkPrimaryKeyRelatedField(
+        many=True, queryset=Student.objects.only("id", "course_id"),
+        required=False, scope="course",
     )
 
     class Meta:
         model = Subject
         fields = ["id", "name", "description", "course", "lecturer", "students"]
+        expandable_fields = {
+            "course": (CourseSerializer, {}),
+            "lecturer": (LecturerSerializer, {}),
+            "students": (StudentSummarySerializer, {"many": True}),
+        }
 
     def validate(self, data):
         course = data.get("course") or getattr(self.instance, "course", None)
@@ -42,21 +54,15 @@ class SubjectSerializer(serializers.ModelSerializer):
         students = data.get("students")
         if students is None:
             if self.instance and "course" in data:
-                existing_students = self.instance.students.all()
-                invalid = [s.id for s in existing_students
-                          if s.course_id != course.id]
-                if invalid:
+                invalid = self.instance.students.exclude(course=course)
+                if invalid.exists():
                     raise serializers.ValidationError(
                         "Cannot change subject course while enrolled "
                         "students are in a different course."
                     )
             return data
 
-        invalid_students = [s.id for s in students if s.course_id != course.id]
-        if invalid_students:
-            raise serializers.ValidationError(
-                "Cannot assign students from a different course to this subject."
-            )
+        self.fields["students"].check_scope(students, course)
         return data
 
     def create(self, validated_data):
@@ -74,35 +80,88 @@ class SubjectSerializer(serializers.ModelSerializer):
         return subject
 
 
-class SubjectDetailSerializer(serializers.ModelSerializer):
-    course = CourseSerializer(read_only=True)
-    lecturer = LecturerSerializer(read_only=True)
-    students = StudentSummarySerializer(many=True, read_only=True)
+class SubjectEnrollmentOperationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=ACTIONS, default="set")
+    subject = serializers.IntegerField()
+    students = serializers.ListField(child=serializers.IntegerField())
 
+
+class BulkSubjectEnrollmentSerializer(serializers.Serializer):
+    operations = SubjectEnrollmentOperationSerializer(many=True,
+                                                      allow_empty=False)
+
+
+class SubjectDetailSerializer(DynamicFieldsMixin,
+                              serializers.ModelSerializer):
     class Meta:
         model = Subject
         fields = ["id", "name", "description", "course", "lecturer", "students"]
+        read_only_fields = fields
+        expandable_fields = SubjectSerializer.Meta.expandable_fields
+        default_expand = ["course", "lecturer", "students"]
 
 
-class CourseDetailSerializer(serializers.ModelSerializer):
-    students = StudentSummarySerializer(many=True, read_only=True)
-    subjects = SubjectDetailSerializer(many=True, read_only=True)
-
+class CourseDetailSerializer(DynamicFieldsMixin,
+                             serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ["id", "name", "description", "students", "subjects"]
+        read_only_fields = fields
+        expandable_fields = {
+            "students": (StudentSummarySerializer, {"many": True}),
+            "subjects": (SubjectDetailSerializer, {"many": True}),
+        }
+        default_expand = ["students", "subjects"]
 
 
-class LecturerDetailSerializer(serializers.ModelSerializer):
-    subjects = SubjectDetailSerializer(many=True, read_only=True)
+class LecturerDetailSerializer(DynamicFieldsMixin,
+                               serializers.ModelSerializer):
     courses = serializers.SerializerMethodField()
 
     class Meta:
         model = Lecturer
         fields = ["id", "first_name", "last_name", "email", "subjects", "courses"]
+        read_only_fields = fields
+        expandable_fields = {
+            "subjects": (SubjectDetailSerializer, {"many": True}),
+        }
+        default_expand = ["subjects"]
+        related_lookups = {"courses": ["subjects__course"]}
 
     def get_courses(self, obj):
+        # Reuse the subjects already loaded for the "subjects" field; the
+        # viewset prefetches them with their course attached.
         courses = {}
-        for s in obj.subjects.select_related("course").all():
+        for s in obj.subjects.all():
             courses[s.course.id] = {"id": s.course.id, "name": s.course.name}
         return list(courses.values())
+
+
+class CourseStatsSerializer(serializers.ModelSerializer):
+    students = serializers.IntegerField(source="student_count")
+
+    class Meta:
+        model = Course
+        fields = ["id", "name", "students"]
+
+
+class SubjectStatsSerializer(serializers.ModelSerializer):
+    students = serializers.IntegerField(source="student_count")
+
+    class Meta:
+        model = Subject
+        fields = ["id", "name", "course", "lecturer", "students"]
+
+
+class LecturerStatsSerializer(serializers.ModelSerializer):
+    subjects = serializers.IntegerField(source="subject_count")
+
+    class Meta:
+        model = Lecturer
+        fields = ["id", "first_name", "last_name", "subjects"]
+
+
+class EnrollmentStatsSerializer(serializers.Serializer):
+    courses = CourseStatsSerializer(many=True)
+    subjects = SubjectStatsSerializer(many=True)
+    lecturers = LecturerStatsSerializer(many=True)
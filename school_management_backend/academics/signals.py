@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from students.enrollment import Enrollment, enrollment_changed
+from students.models import Student
+from .models import Course, Lecturer, Subject
+from .response_cache import response_cache
+from .stats import adjust_counts, moved
+
+# Cached payloads: course detail nests the course's students and subjects
+# (each with course, lecturer and roster); subject detail nests its course,
+# lecturer and roster. Each receiver retires exactly the entries whose
+# payload includes the changed row.
+
+
+def invalidate_subjects(subject_ids):
+    subject_ids = set(subject_ids)
+    response_cache.invalidate("subject", subject_ids)
+    response_cache.invalidate("course", set(
+        Subject.objects.filter(pk__in=subject_ids)
+        .values_list("course_id", flat=True)))
+
+
+@receiver(pre_save, sender=Subject)
+@receiver(pre_save, sender=Student)
+def remember_previous_relations(sender, instance, **kwargs):
+    # A course change must also retire the payload of the course left
+    # behind, and course or lecturer changes move the enrollment counters.
+    columns = ["course_id", "lecturer_id"] if sender is Subject \
+        else ["course_id"]
+    previous = {} if instance._state.adding else \
+        sender.objects.filter(pk=instance.pk).values(*columns).first() or {}
+    instance._previous_course_id = previous.get("course_id")
+    instance._previous_lecturer_id = previous.get("lecturer_id")
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course(sender, instance, **kwargs):
+    response_cache.invalidate("course", [instance.pk])
+    response_cache.invalidate("subject", set(
+        Subject.objects.filter(course_id=instance.pk)
+        .values_list("pk", flat=True)))
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_subject(sender, instance, **kwargs):
+    response_cache.invalidate("subject", [instance.pk])
+    response_cache.invalidate("course", {
+        instance.course_id, getattr(instance, "_previous_course_id", None)})
+
+
+@receiver(post_save, sender=Lecturer)
+def invalidate_lecturer(sender, instance, **kwargs):
+    invalidate_subjects(Subject.objects.filter(lecturer_id=instance.pk)
+                        .values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student(sender, instance, **kwargs):
+    response_cache.invalidate("course", {
+        instance.course_id, getattr(instance, "_previous_course_id", None)})
+    invalidate_subjects(Enrollment.objects.filter(student_id=instance.pk)
+                        .values_list("subject_id", flat=True))
+
+
+@receiver(enrollment_changed)
+def invalidate_enrollments(sender, added, removed, **kwargs):
+    invalidate_subjects(subject for _, subject in [*added, *removed])
+
+
+# Enrollment counters (academics.stats). Bulk writers that bypass these
+# signals adjust the counters themselves; rebuild_enrollment_stats
+# corrects any drift.
+
+@receiver(post_save, sender=Student)
+def count_student(sender, instance, raw=False, **kwargs):
+    if not raw:
+        adjust_counts(Course, "student_count", moved(
+            instance._previous_course_id, instance.course_id))
+
+
+@receiver(post_delete, sender=Student)
+def uncount_student(sender, instance, **kwargs):
+    adjust_counts(Course, "student_count", {instance.course_id: -1})
+
+
+@receiver(post_save, sender=Subject)
+def count_subject(sender, instance, raw=False, **kwargs):
+    if not raw:
+        adjust_counts(Lecturer, "subject_count", moved(
+            instance._previous_lecturer_id, instance.lecturer_id))
+
+
+@receiver(post_delete, sender=Subject)
+def uncount_subject(sender, instance, **kwargs):
+    adjust_counts(Lecturer, "subject_count", {instance.lecturer_id: -1})
+
+
+@receiver(enrollment_changed)
+def count_enrollments(sender, added, removed, **kwargs):
+    # Senders report only rows they actually inserted or deleted; a pair
+    # listed twice, or both added and removed, still moves nothing twice.
+    added, removed = set(added), set(removed)
+    deltas = Counter(subject for _, subject in added - removed)
+    deltas.subtract(subject for _, subject in removed - added)
+    adjust_counts(Subject, "student_count", deltas)
@@ -0,0 +1,69 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from students.enrollment import Enrollment
+from students.models import Student
+from .models import Course, Lecturer, Subject
+
+BATCH_SIZE = 1000
+
+# Counter column -> the rows it counts: (model, counter, source, column).
+# Each counter holds the number of ``source`` rows whose ``column`` points
+# at the row.
+COUNTERS = {
+    "course_students": (Course, "student_count", Student, "course_id"),
+    "subject_students": (Subject, "student_count", Enrollment, "subject_id"),
+    "lecturer_subjects": (Lecturer, "subject_count", Subject, "lecturer_id"),
+}
+
+
+def adjust_counts(model, counter, deltas):
+    """Add ``deltas`` (pk -> change) to ``counter`` in one UPDATE.
+
+    Uses ``counter = counter + n`` so concurrent writers do not lose
+    updates. QuerySet.update() sends no signals and leaves ``updated_at``
+    alone.
+    """
+    by_delta = {}
+    for pk, delta in deltas.items():
+        if pk is not None and delta:
+            by_delta.setdefault(delta, []).append(pk)
+    if not by_delta:
+        return
+    change = Case(*[When(pk__in=pks, then=Value(delta))
+                    for delta, pks in by_delta.items()],
+                  output_field=IntegerField())
+    model.objects.filter(pk__in=[pk for pks in by_delta.values()
+                                 for pk in pks]). \
+        update(**{counter: F(counter) + change})
+
+
+def moved(previous, current):
+    """Deltas for a row whose foreign key went from previous to current."""
+    deltas = Counter([current])
+    if previous is not None:
+        deltas[previous] -= 1
+    return deltas
+
+
+def rebuild(counters=COUNTERS):
+    """Recompute the counters from the tables and correct any that drifted.
+
+    Returns ``{name: rows corrected}``. Costs one grouped COUNT per counter;
+    meant for reconciliation, not the request path.
+    """
+    corrected = {}
+    for name in counters:
+        model, counter, source, column = COUNTERS[name]
+        with transaction.atomic():
+            actual = dict(source.objects.order_by().values_list(column)
+                          .annotate(n=Count("pk")))
+            stale = [model(pk=pk, **{counter: actual.get(pk, 0)})
+                     for pk, value in model.objects.values_list("pk", counter)
+                     if value != actual.get(pk, 0)]
+            model.objects.bulk_update(stale, [counter],
+                                      batch_size=BATCH_SIZE)
+        corrected[name] = len(stale)
+    return corrected
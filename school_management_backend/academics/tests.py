@@ -1,8 +1,41 @@
-from rest_framework.test import APITestCase
+import asyncio
+import datetime
+import decimal
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from drf_spectacular.generators import SchemaGenerator
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 
-from accounts.models import User
+from config.instrumentation import RequestTimingMiddleware, fingerprint
+from config.renderers import FastJSONParser, FastJSONRenderer
+from config.schema import accepted_encodings, write_artifacts
+from config.testing import (AuthenticatedAPITestCase, make_user,
+                            use_token)
 from academics.models import Course, Lecturer, Subject
+from academics.response_cache import response_cache
+from academics.stats import rebuild
+from students.enrollment import enrollment_changed
 from students.models import Student
 
 
@@ -71,20 +104,9 @@ class ModelRelationshipTests(APITestCase):
                                    lecturer=self.lecturer)
 
 
-class CourseCRUDTests(APITestCase):
+class CourseCRUDTests(AuthenticatedAPITestCase):
     """Tests for Course CRUD endpoints."""
 
-    def setUp(self):
-        self.user = User.objects.create_user(email="admin@example.com",
-                                             password="admin12345")
-        login = self.client.post("/api/login/",
-                                 {"email": "admin@example.com",
-                                  "password": "admin12345"},
-                                 format="json")
-        self.client.credentials(
-            HTTP_AUTHORIZATION=f"Token {login.data['token']}"
-        )
-
     def test_create_course(self):
         res = self.client.post("/api/courses/",
                                {"name": "Engineering", "description": "Eng"},
@@ -140,20 +162,9 @@ class CourseCRUDTests(APITestCase):
         )
 
 
-class LecturerCRUDTests(APITestCase):
+class LecturerCRUDTests(AuthenticatedAPITestCase):
     """Tests for Lecturer CRUD endpoints."""
 
-    def setUp(self):
-        self.user = User.objects.create_user(email="admin@example.com",
-                                             password="admin12345")
-        login = self.client.post("/api/login/",
-                                 {"email": "admin@example.com",
-                                  "password": "admin12345"},
-                                 format="json")
-        self.client.credentials(
-            HTTP_AUTHORIZATION=f"Token {login.data['token']}"
-        )
-
     def test_create_lecturer(self):
         res = self.client.post("/api/lecturers/",
                                {"first_name": "Alice", "last_name": "Wonder",
@@ -203,23 +214,16 @@ class LecturerCRUDTests(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
 
-class SubjectCRUDTests(APITestCase):
+class SubjectCRUDTests(AuthenticatedAPITestCase):
     """Tests for Subject CRUD endpoints."""
 
-    def setUp(self):
-        self.user = User.objects.create_user(email="admin@example.com",
-                                             password="admin12345")
-        login = self.client.post("/api/login/",
-                                 {"email": "admin@example.com",
-                                  "password": "admin12345"},
-                                 format="json")
-        self.client.credentials(
-            HTTP_AUTHORIZATION=f"Token {login.data['token']}"
-        )
-        self.course = Course.objects.create(name="IT", description="IT")
-        self.lecturer = Lecturer.objects.create(first_name="Prof",
-                                                last_name="X",
-                                                email="profx@example.com")
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="IT", description="IT")
+        cls.lecturer = Lecturer.objects.create(first_name="Prof",
+                                               last_name="X",
+                                               email="profx@example.com")
 
     def test_create_subject(self):
         res = self.client.post("/api/subjects/",
@@ -265,6 +269,51 @@ class SubjectCRUDTests(APITestCase):
         res = self.client.delete(f"/api/subjects/{sub.id}/")
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_assign_many_students_uses_constant_queries(self):
+        ids = [
+            Student.objects.create(
+                first_name=f"Bulk{i}", last_name="Student",
+                email=f"bulk{i}@example.com", date_of_birth="2004-01-01",
+                course=self.course,
+            ).id
+            for i in range(30)
+        ]
+        payload = {"name": "Crowded", "description": "",
+                   "course": self.course.id, "lecturer": self.lecturer.id,
+                   "students": ids}
+        # Includes the change feed rows for the subject and its roster.
+        with self.assertMaxQueries(17):
+            res = self.client.post("/api/subjects/", payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(res.data["students"]), sorted(ids))
+
+    def test_missing_students_reported_together(self):
+        payload = {"name": "Ghosts", "description": "",
+                   "course": self.course.id, "lecturer": self.lecturer.id,
+                   "students": [999998, 999999]}
+        res = self.client.post("/api/subjects/", payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data["students"]), 1)
+        self.assertIn("999998", res.data["students"][0])
+        self.assertIn("999999", res.data["students"][0])
+
+    def test_missing_and_wrong_course_students_reported_together(self):
+        other = Course.objects.create(name="Elsewhere", description="")
+        outsider = Student.objects.create(
+            first_name="Out", last_name="Sider", email="out@example.com",
+            date_of_birth="2004-01-01", course=other)
+        payload = {"name": "Mixed", "description": "",
+                   "course": self.course.id, "lecturer": self.lecturer.id,
+                   "students": [999999, outsider.id]}
+        res = self.client.post("/api/subjects/", payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["students"], [
+            "Invalid pks [999999] - objects do not exist.",
+            f"Invalid pks [{outsider.id}] - objects belong to a different "
+            "course.",
+        ])
+        self.assertFalse(Subject.objects.filter(name="Mixed").exists())
+
     def test_create_subject_without_course_fails(self):
         res = self.client.post("/api/subjects/",
                                {"name": "NoCourse", "description": "",
@@ -278,3 +327,904 @@ class SubjectCRUDTests(APITestCase):
                                 "course": self.course.id},
                                format="json")
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DetailQueryCountTests(AuthenticatedAPITestCase):
+    """Detail endpoints must run a constant number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Graph", description="")
+        cls.lecturer = Lecturer.objects.create(first_name="Graph",
+                                               last_name="Lec",
+                                               email="graph@example.com")
+        cls.students = []
+        cls.subjects = []
+
+    def grow(self, subjects, students):
+        """Add more subjects and students, enrolling everyone everywhere."""
+        for _ in range(subjects):
+            self.subjects.append(Subject.objects.create(
+                name=f"Graph {len(self.subjects)}", description="",
+                course=self.course, lecturer=self.lecturer,
+            ))
+        for _ in range(students):
+            n = len(self.students)
+            self.students.append(Student.objects.create(
+                first_name=f"S{n}", last_name="Graph",
+                email=f"graph{n}@example.com", date_of_birth="2004-01-01",
+                course=self.course,
+            ))
+        for student in self.students:
+            student.subjects.set(self.subjects)
+
+    def assertConstantDetailQueries(self, url, limit):
+        self.grow(subjects=1, students=1)
+        res = self.assertConstantQueries(
+            lambda: self.client.get(url),
+            lambda: self.grow(subjects=10, students=10), limit)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_course_detail_query_count(self):
+        res = self.assertConstantDetailQueries(
+            f"/api/courses/{self.course.id}/", 5)
+        self.assertEqual(len(res.data["subjects"]), 11)
+        self.assertEqual(len(res.data["subjects"][0]["students"]), 11)
+
+    def test_subject_detail_query_count(self):
+        self.grow(subjects=1, students=0)
+        url = f"/api/subjects/{self.subjects[0].id}/"
+        res = self.assertConstantDetailQueries(url, 3)
+        self.assertEqual(len(res.data["students"]), 11)
+
+    def test_student_detail_query_count(self):
+        self.grow(subjects=0, students=1)
+        url = f"/api/students/{self.students[0].id}/"
+        res = self.assertConstantDetailQueries(url, 4)
+        self.assertEqual(len(res.data["subjects"]), 11)
+
+    def test_lecturer_detail_query_count(self):
+        other = Course.objects.create(name="Other", description="")
+        Subject.objects.create(name="Elsewhere", description="",
+                               course=other, lecturer=self.lecturer)
+        url = f"/api/lecturers/{self.lecturer.id}/"
+        res = self.assertConstantDetailQueries(url, 4)
+        self.assertEqual(len(res.data["subjects"]), 12)
+        self.assertEqual(
+            sorted(c["id"] for c in res.data["courses"]),
+            sorted([self.course.id, other.id]),
+        )
+
+
+class ConditionalGetTests(AuthenticatedAPITestCase):
+    """ETag validators and 304 responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Etag", description="")
+        cls.lecturer = Lecturer.objects.create(first_name="E", last_name="T",
+                                               email="etag@example.com")
+        cls.subject = Subject.objects.create(name="Caching",
+                                             course=cls.course,
+                                             lecturer=cls.lecturer)
+        cls.student = Student.objects.create(
+            first_name="Val", last_name="Idator", email="val@example.com",
+            date_of_birth="2004-01-01", course=cls.course,
+        )
+
+    def etag(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res["ETag"]
+
+    def test_unchanged_list_returns_304_from_one_query(self):
+        etag = self.etag("/api/subjects/")
+        with self.assertMaxQueries(1):
+            res = self.client.get("/api/subjects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(res.content, b"")
+
+    def test_paginated_list_state_reads_only_the_page(self):
+        for n in range(3):
+            Subject.objects.create(name=f"Page {n}", course=self.course,
+                                   lecturer=self.lecturer)
+        url = "/api/subjects/?page_size=2"
+        etag = self.etag(url)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotIn("COUNT(", ctx.captured_queries[-1]["sql"])
+        self.assertIn("LIMIT 3", ctx.captured_queries[-1]["sql"])
+
+        # Rows past the page leave its ETag alone; rows on it change it.
+        last = Subject.objects.order_by("id").last()
+        last.name = "Renamed"
+        last.save()
+        self.assertEqual(self.etag(url), etag)
+        self.subject.delete()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_no_last_modified_is_sent(self):
+        older = Subject.objects.create(name="Older", course=self.course,
+                                       lecturer=self.lecturer)
+        Subject.objects.filter(pk=older.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(minutes=1))
+        Subject.objects.filter(pk=self.subject.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(seconds=30))
+        for url in ("/api/subjects/", "/api/subjects/?page_size=5",
+                    f"/api/courses/{self.course.id}/"):
+            self.assertNotIn("Last-Modified", self.client.get(url), url)
+        # Deleting a row that is not the newest moves no timestamp.
+        older.delete()
+        res = self.client.get("/api/subjects/", HTTP_IF_MODIFIED_SINCE=(
+            http_date(time.time())))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([s["id"] for s in res.data], [self.subject.id])
+
+    def test_unchanged_detail_returns_304(self):
+        url = f"/api/courses/{self.course.id}/"
+        etag = self.etag(url)
+        with self.assertMaxQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_non_numeric_id_is_not_found(self):
+        for kind in ("courses", "subjects", "lecturers", "students"):
+            res = self.client.get(f"/api/{kind}/abc/")
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND, kind)
+
+    def test_query_string_is_part_of_the_etag(self):
+        self.assertNotEqual(self.etag("/api/students/"),
+                            self.etag("/api/students/?ordering=-id"))
+
+    def test_enrollment_changes_invalidate_lists_and_details(self):
+        urls = ["/api/subjects/", "/api/students/",
+                f"/api/subjects/{self.subject.id}/",
+                f"/api/courses/{self.course.id}/",
+                f"/api/lecturers/{self.lecturer.id}/"]
+        before = {url: self.etag(url) for url in urls}
+        self.student.subjects.add(self.subject)
+        after_add = {url: self.etag(url) for url in urls}
+        for url in urls:
+            self.assertNotEqual(before[url], after_add[url], url)
+
+        self.client.post("/api/subjects/bulk-enroll/", {"operations": [
+            {"subject": self.subject.id, "students": []},
+        ]}, format="json")
+        for url in urls:
+            self.assertNotEqual(after_add[url], self.etag(url), url)
+
+    def test_nested_row_update_invalidates_detail(self):
+        url = f"/api/subjects/{self.subject.id}/"
+        etag = self.etag(url)
+        self.lecturer.first_name = "Renamed"
+        self.lecturer.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["lecturer"]["first_name"], "Renamed")
+
+    def test_expanded_relation_changes_invalidate_lists(self):
+        for url in ("/api/subjects/?expand=course",
+                    "/api/subjects/?expand=course&page_size=1",
+                    "/api/students/?expand=subjects.lecturer"):
+            self.student.subjects.add(self.subject)
+            etag = self.etag(url)
+            self.lecturer.first_name = f"Renamed {url}"
+            self.lecturer.save()
+            self.course.name = f"Renamed {url}"
+            self.course.save()
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK, url)
+
+    def test_delete_invalidates_lists(self):
+        self.student.subjects.add(self.subject)
+        students_etag = self.etag("/api/students/")
+        subjects_etag = self.etag("/api/subjects/")
+        self.student.delete()
+        self.assertNotEqual(students_etag, self.etag("/api/students/"))
+        self.assertNotEqual(subjects_etag, self.etag("/api/subjects/"))
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                  "LOCATION": "response-cache-tests"},
+})
+class ResponseCacheTests(AuthenticatedAPITestCase):
+    """Versioned caching of course and subject detail payloads."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Cached", description="")
+        cls.other_course = Course.objects.create(name="Other", description="")
+        cls.lecturer = Lecturer.objects.create(first_name="C", last_name="L",
+                                               email="cache@example.com")
+        cls.sub_1 = Subject.objects.create(name="One", course=cls.course,
+                                           lecturer=cls.lecturer)
+        cls.sub_2 = Subject.objects.create(name="Two", course=cls.course,
+                                           lecturer=cls.lecturer)
+        cls.sub_3 = Subject.objects.create(name="Three",
+                                           course=cls.other_course,
+                                           lecturer=cls.lecturer)
+        cls.student = Student.objects.create(
+            first_name="Kay", last_name="Che", email="kay@example.com",
+            date_of_birth="2004-01-01", course=cls.course,
+        )
+
+    def setUp(self):
+        super().setUp()
+        caches["responses"].clear()
+
+    def warm(self):
+        for url in (f"/api/courses/{self.course.id}/",
+                    f"/api/courses/{self.other_course.id}/",
+                    f"/api/subjects/{self.sub_1.id}/",
+                    f"/api/subjects/{self.sub_2.id}/",
+                    f"/api/subjects/{self.sub_3.id}/"):
+            self.client.get(url)
+
+    def cached(self, kind, obj):
+        return response_cache.get(kind, obj.pk) is not None
+
+    def test_cache_hit_skips_serializer_queries(self):
+        url = f"/api/courses/{self.course.id}/"
+        first = self.client.get(url)
+        with self.assertMaxQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(first.data, second.data)
+
+    def test_enrollment_invalidates_only_affected_entries(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.subjects.add(self.sub_1)
+        self.assertFalse(self.cached("subject", self.sub_1))
+        self.assertFalse(self.cached("course", self.course))
+        self.assertTrue(self.cached("subject", self.sub_2))
+        self.assertTrue(self.cached("subject", self.sub_3))
+        self.assertTrue(self.cached("course", self.other_course))
+
+        res = self.client.get(f"/api/subjects/{self.sub_1.id}/")
+        self.assertEqual([s["id"] for s in res.data["students"]],
+                         [self.student.id])
+
+    def test_bulk_enrollment_invalidates_affected_entries(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/students/bulk-enroll/", {"operations": [
+                {"student": self.student.id, "subjects": [self.sub_2.id]},
+            ]}, format="json")
+        self.assertFalse(self.cached("subject", self.sub_2))
+        self.assertFalse(self.cached("course", self.course))
+        self.assertTrue(self.cached("subject", self.sub_1))
+
+    def test_nested_updates_are_visible(self):
+        self.student.subjects.add(self.sub_1)
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lecturer.first_name = "Renamed"
+            self.lecturer.save()
+            self.student.first_name = "Kai"
+            self.student.save()
+        res = self.client.get(f"/api/subjects/{self.sub_1.id}/")
+        self.assertEqual(res.data["lecturer"]["first_name"], "Renamed")
+        self.assertEqual(res.data["students"][0]["first_name"], "Kai")
+        res = self.client.get(f"/api/courses/{self.course.id}/")
+        self.assertEqual(res.data["students"][0]["first_name"], "Kai")
+
+    def test_payload_loaded_before_an_invalidation_is_not_served(self):
+        version = response_cache.version("course", self.course.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.description = "Changed"
+            self.course.save()
+        response_cache.set("course", self.course.pk, "", {"stale": True},
+                           version)
+        self.assertFalse(self.cached("course", self.course))
+        res = self.client.get(f"/api/courses/{self.course.id}/")
+        self.assertEqual(res.data["description"], "Changed")
+
+    def test_equivalent_urls_share_one_entry(self):
+        self.client.get(f"/api/courses/0{self.course.id}/")
+        self.assertTrue(self.cached("course", self.course))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.name = "Renamed"
+            self.course.save()
+        res = self.client.get(f"/api/courses/0{self.course.id}/")
+        self.assertEqual(res.data["name"], "Renamed")
+
+    def test_moving_subject_invalidates_both_courses(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sub_2.course = self.other_course
+            self.sub_2.save()
+        self.assertFalse(self.cached("course", self.course))
+        self.assertFalse(self.cached("course", self.other_course))
+        self.assertTrue(self.cached("subject", self.sub_1))
+
+
+TIMING = {"ENABLED": True, "SLOW_REQUEST_MS": 60000, "SLOW_QUERY_MS": 60000,
+          "MAX_QUERIES": 1000, "DUPLICATE_QUERIES": 3}
+
+
+class RequestTimingTests(TestCase):
+    """Per-request timing middleware and slow-request log."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        Course.objects.create(name="Timed", description="")
+
+    def client_for(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+    def test_disabled_by_default(self):
+        res = self.client_for().get("/api/courses/")
+        self.assertNotIn("Server-Timing", res)
+
+    @override_settings(REQUEST_TIMING=TIMING)
+    def test_server_timing_header(self):
+        res = self.client_for().get("/api/courses/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [part.split(";")[0].strip()
+                 for part in res["Server-Timing"].split(",")]
+        self.assertEqual(names, ["db", "serialize", "render", "total"])
+        self.assertIn('desc="2 queries"', res["Server-Timing"])
+
+    @override_settings(REQUEST_TIMING={**TIMING, "SLOW_REQUEST_MS": 0})
+    def test_slow_request_is_logged_with_view_and_action(self):
+        with self.assertLogs("config.instrumentation", "WARNING") as logs:
+            self.client_for().get("/api/courses/")
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["reasons"], ["slow"])
+        self.assertEqual(entry["view"], "academics.views.CourseViewSet.list")
+        self.assertEqual(entry["queries"], 2)
+        self.assertEqual(entry["status"], 200)
+
+    @override_settings(REQUEST_TIMING=TIMING)
+    def test_repeated_queries_are_reported(self):
+        def view(request):
+            for pk in range(4):
+                Course.objects.filter(pk__in=[pk, pk + 1]).exists()
+            return HttpResponse()
+
+        middleware = RequestTimingMiddleware(view)
+        with self.assertLogs("config.instrumentation", "WARNING") as logs:
+            middleware(RequestFactory().get("/"))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["reasons"], ["duplicates"])
+        self.assertEqual(entry["duplicates"][0]["count"], 4)
+        self.assertIn("IN (...)", entry["duplicates"][0]["sql"])
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(fingerprint("SELECT 1 WHERE id IN (%s, %s, %s)"),
+                         "SELECT 1 WHERE id IN (...)")
+
+
+class AsyncReadTests(TestCase):
+    """The ASGI-native /api/async/ list and detail routes."""
+
+    def setUp(self):
+        caches["responses"].clear()
+        self.client = APIClient()
+        token = use_token(self.client, make_user())
+        self.headers = {"Authorization": f"Token {token.key}"}
+        self.course = Course.objects.create(name="Async", description="")
+        self.lecturer = Lecturer.objects.create(first_name="A", last_name="S",
+                                                email="async@example.com")
+        self.subjects = [
+            Subject.objects.create(name=f"Loop {n}", course=self.course,
+                                   lecturer=self.lecturer)
+            for n in range(3)
+        ]
+        for n in range(3):
+            student = Student.objects.create(
+                first_name="Co", last_name=f"Routine {n}",
+                email=f"co{n}@example.com", date_of_birth="2004-01-01",
+                course=self.course,
+            )
+            student.subjects.set(self.subjects[:n + 1])
+        self.ids = {"courses": self.course.id,
+                    "lecturers": self.lecturer.id,
+                    "subjects": self.subjects[0].id,
+                    "students": student.id}
+
+    async def get(self, url, **headers):
+        return await self.async_client.get(url,
+                                           headers={**self.headers, **headers})
+
+    async def test_matches_sync_responses(self):
+        for kind, pk in self.ids.items():
+            for suffix in ("", f"{pk}/", "?page_size=2", "?ordering=-id",
+                           "?search=Lo", "?expand=course&page_size=2"):
+                if suffix.startswith("?expand") and kind not in (
+                        "students", "subjects"):
+                    continue
+                if suffix == "?search=Lo" and kind != "subjects":
+                    continue
+                expected = await sync_to_async(self.client.get)(
+                    f"/api/{kind}/{suffix}")
+                res = await self.get(f"/api/async/{kind}/{suffix}")
+                self.assertEqual(res.status_code, status.HTTP_200_OK,
+                                 f"{kind}/{suffix}")
+                # Page links point back at the async route.
+                content = res.content.replace(b"/api/async/", b"/api/")
+                self.assertEqual(json.loads(content),
+                                 json.loads(expected.content),
+                                 f"{kind}/{suffix}")
+                self.assertIn("ETag", res)
+
+    async def test_filters_apply(self):
+        res = await self.get(
+            f"/api/async/subjects/?student={self.ids['students']}")
+        self.assertEqual(len(json.loads(res.content)), 3)
+        res = await self.get("/api/async/students/?course=abc")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_non_numeric_id_is_not_found(self):
+        for kind in self.ids:
+            res = await self.get(f"/api/async/{kind}/abc/")
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND, kind)
+
+    async def test_requires_token(self):
+        res = await self.async_client.get("/api/async/students/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+        res = await self.get("/api/async/students/",
+                             Authorization="Token not-a-token")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_missing_object_is_404(self):
+        res = await self.get("/api/async/courses/999999/")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_only_reads_are_allowed(self):
+        res = await self.async_client.post("/api/async/courses/", {},
+                                           headers=self.headers)
+        self.assertEqual(res.status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_unchanged_returns_304(self):
+        url = f"/api/async/subjects/{self.ids['subjects']}/"
+        etag = (await self.get(url))["ETag"]
+        res = await self.get(url, If_None_Match=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    @override_settings(CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "async-read-tests"},
+    })
+    async def test_detail_uses_response_cache(self):
+        url = f"/api/async/courses/{self.course.id}/"
+        first = await self.get(url)
+        self.assertIsNotNone(
+            await response_cache.aget("course", self.course.id))
+        second = await self.get(url)
+        self.assertEqual(first.content, second.content)
+
+
+class FastJSONTests(TestCase):
+    """orjson-backed renderer and parser against DRF's stdlib versions."""
+
+    data = {
+        "date_of_birth": datetime.date(2004, 2, 29),
+        "updated_at": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901,
+                                        tzinfo=datetime.timezone.utc),
+        "local": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901),
+        "fee": decimal.Decimal("1234.50"),
+        "label": gettext_lazy("Subjects"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "name": "Zoë\u2028line\u2029",
+        "nested": [{"a": 1, "b": None, "c": True, "d": 1.5}],
+    }
+
+    def test_output_matches_drf_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data),
+                         JSONRenderer().render(self.data))
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("config.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.data),
+                             JSONRenderer().render(self.data))
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": 1}')),
+                             {"a": 1})
+
+    def test_indent_and_big_integers_use_stdlib(self):
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type))
+        self.assertEqual(FastJSONRenderer().render({"n": 2 ** 70}),
+                         b'{"n":1180591620717411303424}')
+
+    def test_parser(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "Zoë"}'.encode())),
+                         {"name": "Zoë"})
+        big = io.BytesIO(b'{"n": 1180591620717411303424}')
+        self.assertEqual(parser.parse(big), {"n": 2 ** 70})
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaisesMessage(ParseError, "JSON parse error"):
+                parser.parse(io.BytesIO(body))
+
+    def test_api_uses_fast_renderer_and_parser(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        res = client.post("/api/courses/",
+                          json.dumps({"name": "Fast", "description": "é"}),
+                          content_type="application/json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsInstance(res.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+
+
+class SchemaArtifactTests(TestCase):
+    """/api/schema/ from the build_schema artifact or the process cache."""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        settings = override_settings(
+            CODE_VERSION=f"test-{uuid.uuid4()}",
+            SCHEMA_ARTIFACT={"ROOT": self.root, "MAX_AGE": 60})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        get_schema = SchemaGenerator.get_schema
+        patcher = mock.patch.object(SchemaGenerator, "get_schema",
+                                    autospec=True, side_effect=get_schema)
+        self.get_schema = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build(self):
+        call_command("build_schema", stdout=io.StringIO())
+        self.get_schema.reset_mock()
+
+    def test_serves_the_prebuilt_artifact(self):
+        self.build()
+        res = self.client.get("/api/schema/", HTTP_ACCEPT="application/json",
+                              HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(res["Cache-Control"], "public, max-age=60")
+        with open(f"{self.root}/openapi.json", "rb") as f:
+            self.assertEqual(gzip.decompress(res.content), f.read())
+        self.assertIn("/api/changes/",
+                      json.loads(gzip.decompress(res.content))["paths"])
+
+        yaml = self.client.get("/api/schema/")
+        self.assertNotIn("Content-Encoding", yaml)
+        self.assertTrue(yaml["Content-Type"].startswith(
+            "application/vnd.oai.openapi"))
+        self.assertNotEqual(yaml["ETag"], res["ETag"])
+        again = self.client.get("/api/schema/",
+                                HTTP_IF_NONE_MATCH=yaml["ETag"])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.get_schema.assert_not_called()
+
+    def test_generates_once_without_an_artifact(self):
+        first = self.client.get("/api/schema/", HTTP_ACCEPT_ENCODING="gzip")
+        second = self.client.get("/api/schema/")
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(first.content), second.content)
+        self.assertEqual(first["ETag"], second["ETag"][:-1] + '-gzip"')
+        self.assertEqual(self.get_schema.call_count, 1)
+        self.client.get("/api/schema/", HTTP_ACCEPT="application/json")
+        self.client.get("/api/schema/?lang=en")
+        self.client.get("/api/schema/?lang=en")
+        self.assertEqual(self.get_schema.call_count, 3)
+        # Unknown languages and versions are generated but not cached.
+        for query in ("lang=xx", "lang=xx", "version=v9", "version=v9"):
+            self.client.get(f"/api/schema/?{query}")
+        self.assertEqual(self.get_schema.call_count, 7)
+
+    def test_any_coding_validator_matches(self):
+        identity = self.client.get("/api/schema/")
+        res = self.client.get("/api/schema/", HTTP_ACCEPT_ENCODING="gzip",
+                              HTTP_IF_NONE_MATCH=identity["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], identity["ETag"][:-1] + '-gzip"')
+        res = self.client.get("/api/schema/",
+                              HTTP_IF_NONE_MATCH='"other", ' + res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], identity["ETag"])
+
+    def test_ignores_an_artifact_from_another_version(self):
+        self.build()
+        with override_settings(CODE_VERSION="other"):
+            self.client.get("/api/schema/")
+        self.assertEqual(self.get_schema.call_count, 1)
+
+    def test_unversioned_builds_are_neither_written_nor_served(self):
+        with override_settings(CODE_VERSION=""):
+            out = io.StringIO()
+            call_command("build_schema", stdout=out)
+            self.assertIn("no schema artifact written", out.getvalue())
+            self.assertEqual(os.listdir(self.root), [])
+            # Nor is an unversioned manifest already on disk served.
+            write_artifacts(self.root, {"openapi": "3.0.3"}, "")
+            self.client.get("/api/schema/")
+            self.client.get("/api/schema/")
+        self.assertEqual(self.get_schema.call_count, 1)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("gzip, deflate, br;q=0.5"),
+                         {"gzip", "deflate", "br"})
+        self.assertEqual(accepted_encodings("br;q=0, GZIP ;q=1"), {"gzip"})
+        self.assertEqual(accepted_encodings(""), set())
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """Safe-method API reads from a replica, pinned to the primary after a
+    write. The "replica" test database holds different rows from the
+    primary so the tests can tell which one answered."""
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        caches["default"].clear()
+        self.primary = Course.objects.create(name="Primary")
+        self.lecturer = Lecturer.objects.create(
+            first_name="Pri", last_name="Mary", email="primary@example.com")
+        # Same primary keys, other values. bulk_create, so no signal
+        # handler writes to the primary.
+        [course] = Course.objects.using("replica").bulk_create(
+            [Course(id=self.primary.id, name="Replica")])
+        [lecturer] = Lecturer.objects.using("replica").bulk_create([Lecturer(
+            id=self.lecturer.id, first_name="Rep", last_name="Lica",
+            email="replica@example.com")])
+        Subject.objects.using("replica").bulk_create(
+            [Subject(name="Lagging", course=course, lecturer=lecturer)])
+        self.client, self.other = (self.login(f"{name}@example.com")
+                                   for name in ("writer", "reader"))
+
+    def login(self, email):
+        client = APIClient()
+        use_token(client, make_user(email=email))
+        return client
+
+    def course_names(self, client):
+        res = client.get("/api/courses/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(course["name"] for course in res.data)
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.course_names(self.client), ["Replica"])
+        res = self.client.get("/api/stats/enrollments/")
+        self.assertEqual([c["name"] for c in res.data["courses"]],
+                         ["Replica"])
+        res = self.client.get(f"/api/lecturers/{self.lecturer.id}/")
+        self.assertEqual(res.data["email"], "replica@example.com")
+        # Exports stream after the view returns, still from the replica.
+        res = self.client.get("/api/subjects/export/?as=ndjson")
+        self.assertEqual(
+            [json.loads(line)["name"]
+             for line in b"".join(res.streaming_content).splitlines()],
+            ["Lagging"])
+
+    def test_writes_pin_the_writer_to_the_primary(self):
+        res = self.client.post("/api/courses/", {"name": "Written"},
+                               format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Course.objects.using("default")
+                        .filter(name="Written").exists())
+        self.assertFalse(Course.objects.using("replica")
+                         .filter(name="Written").exists())
+        self.assertEqual(self.course_names(self.client),
+                         ["Primary", "Written"])
+        self.assertEqual(self.course_names(self.other), ["Replica"])
+
+    @override_settings(REPLICA_ROUTING={"STICKY_SECONDS": 0,
+                                        "CACHE": "default"})
+    def test_pin_expires(self):
+        self.client.post("/api/courses/", {"name": "Written"}, format="json")
+        self.assertEqual(self.course_names(self.client), ["Replica"])
+
+    def test_cached_details_are_filled_from_the_primary(self):
+        res = self.client.get(f"/api/courses/{self.primary.id}/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["name"], "Primary")
+
+    async def test_async_reads_check_the_pin_off_the_event_loop(self):
+        await sync_to_async(self.client.post)(
+            "/api/courses/", {"name": "Written"}, format="json")
+        token = await Token.objects.aget(user__email="writer@example.com")
+        pins = caches["default"]
+        read_pin = pins.get
+
+        def get(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return read_pin(*args, **kwargs)
+            raise AssertionError("Pin read on the event loop.")
+
+        with mock.patch.object(pins, "get", side_effect=get):
+            res = await self.async_client.get(
+                "/api/async/courses/",
+                headers={"Authorization": f"Token {token.key}"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(c["name"] for c in json.loads(res.content)),
+                         ["Primary", "Written"])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_the_primary(self):
+        self.assertEqual(self.course_names(self.client), ["Primary"])
+
+
+class EnrollmentStatsTests(AuthenticatedAPITestCase):
+    """Counter columns follow every write path and back the stats API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Maths")
+        cls.other_course = Course.objects.create(name="Music")
+        cls.lecturer = Lecturer.objects.create(
+            first_name="Ada", last_name="L", email="ada@example.com")
+        cls.other_lecturer = Lecturer.objects.create(
+            first_name="Bo", last_name="M", email="bo@example.com")
+        cls.subjects = [Subject.objects.create(
+            name=f"Subject {n}", course=cls.course, lecturer=cls.lecturer)
+            for n in range(3)]
+        cls.students = [Student.objects.create(
+            first_name="S", last_name=str(n), email=f"s{n}@example.com",
+            date_of_birth="2000-01-01", course=cls.course)
+            for n in range(4)]
+
+    def counts(self):
+        return {
+            "courses": dict(Course.objects.values_list("id",
+                                                       "student_count")),
+            "subjects": dict(Subject.objects.values_list("id",
+                                                         "student_count")),
+            "lecturers": dict(Lecturer.objects.values_list("id",
+                                                           "subject_count")),
+        }
+
+    def assertCountsExact(self):
+        # Nothing to correct means every counter matches the tables.
+        self.assertEqual(rebuild(), {"course_students": 0,
+                                     "subject_students": 0,
+                                     "lecturer_subjects": 0})
+
+    def test_saves_and_deletes(self):
+        counts = self.counts()
+        self.assertEqual(counts["courses"][self.course.id], 4)
+        self.assertEqual(counts["lecturers"][self.lecturer.id], 3)
+
+        student = self.students[0]
+        student.course = self.other_course
+        student.save()
+        subject = self.subjects[0]
+        subject.lecturer = self.other_lecturer
+        subject.save()
+        self.students[1].delete()
+        self.subjects[1].delete()
+        counts = self.counts()
+        self.assertEqual(counts["courses"], {self.course.id: 2,
+                                             self.other_course.id: 1})
+        self.assertEqual(counts["lecturers"], {self.lecturer.id: 1,
+                                               self.other_lecturer.id: 1})
+        self.assertCountsExact()
+
+    def test_enrollment_changes(self):
+        first, second, third = self.subjects
+        self.students[0].subjects.add(first, second)
+        first.students.add(*self.students[1:])
+        self.students[2].subjects.remove(first)
+        second.students.clear()
+        self.assertEqual(self.counts()["subjects"],
+                         {first.id: 3, second.id: 0, third.id: 0})
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"student": self.students[3].id,
+             "subjects": [second.id, third.id]},
+        ]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts()["subjects"],
+                         {first.id: 2, second.id: 1, third.id: 1})
+        # Deleting a student drops its enrollments by cascade.
+        self.students[3].delete()
+        self.assertEqual(self.counts()["subjects"],
+                         {first.id: 2, second.id: 0, third.id: 0})
+        self.assertCountsExact()
+
+    def test_re_enrolling_an_existing_pair_changes_no_counts(self):
+        student, subject = self.students[0], self.subjects[0]
+        student.subjects.add(subject)
+        before = self.counts()["subjects"]
+        student.subjects.add(subject)
+        subject.students.add(student)
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"action": "add", "student": student.id,
+             "subjects": [subject.id]},
+        ]}, format="json")
+        self.assertEqual(res.data, {"added": 0, "removed": 0})
+        res = self.client.patch(f"/api/students/{student.id}/", {
+            "subjects": [subject.id]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # A sender repeating a pair still moves the counter once.
+        enrollment_changed.send(sender=Student,
+                                added=[(student.id, subject.id)] * 2,
+                                removed=[(student.id, subject.id)])
+        self.assertEqual(self.counts()["subjects"], before)
+        self.assertEqual(before[subject.id], 1)
+        self.assertCountsExact()
+
+    def test_removing_a_non_member_changes_no_counts(self):
+        student, subject = self.students[0], self.subjects[0]
+        student.subjects.add(subject)
+        before = self.counts()
+        student.subjects.remove(self.subjects[1])
+        self.subjects[2].students.remove(student)
+        student.subjects.remove(subject, self.subjects[1])
+        self.assertEqual(self.counts()["subjects"],
+                         {**before["subjects"], subject.id: 0})
+        self.assertEqual(self.counts()["courses"], before["courses"])
+        self.assertEqual(self.counts()["lecturers"], before["lecturers"])
+        self.assertCountsExact()
+
+    def test_api_writes(self):
+        res = self.client.post("/api/subjects/", {
+            "name": "New", "course": self.course.id,
+            "lecturer": self.other_lecturer.id,
+            "students": [s.id for s in self.students[:2]],
+        }, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.patch(f"/api/students/{self.students[3].id}/", {
+            "course": self.other_course.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.delete(f"/api/subjects/{self.subjects[0].id}/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCountsExact()
+
+    def test_stats_endpoint(self):
+        self.students[0].subjects.add(self.subjects[0])
+        self.client.get("/api/stats/enrollments/")  # warm the auth cache
+        with self.assertMaxQueries(3):
+            res = self.client.get("/api/stats/enrollments/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["courses"], [
+            {"id": self.course.id, "name": "Maths", "students": 4},
+            {"id": self.other_course.id, "name": "Music", "students": 0}])
+        self.assertEqual(res.data["subjects"][0], {
+            "id": self.subjects[0].id, "name": "Subject 0",
+            "course": self.course.id, "lecturer": self.lecturer.id,
+            "students": 1})
+        self.assertEqual(res.data["lecturers"][1], {
+            "id": self.other_lecturer.id, "first_name": "Bo",
+            "last_name": "M", "subjects": 0})
+
+    def test_stats_query_count_does_not_grow_with_students(self):
+        self.client.get("/api/stats/enrollments/")
+        for n in range(20):
+            student = Student.objects.create(
+                first_name="X", last_name=str(n), email=f"x{n}@example.com",
+                date_of_birth="2000-01-01", course=self.course)
+            student.subjects.set(self.subjects)
+        with self.assertMaxQueries(3):
+            res = self.client.get("/api/stats/enrollments/")
+        self.assertEqual(res.data["courses"][0]["students"], 24)
+        self.assertEqual(res.data["subjects"][0]["students"], 20)
+
+    def test_rebuild_command_corrects_drift(self):
+        Course.objects.filter(pk=self.course.pk).update(student_count=99)
+        Subject.objects.filter(pk=self.subjects[0].pk). \
+            update(student_count=-1)
+        out = io.StringIO()
+        call_command("rebuild_enrollment_stats", stdout=out)
+        self.assertIn("course_students: 1 rows corrected", out.getvalue())
+        self.assertIn("subject_students: 1 rows corrected", out.getvalue())
+        self.assertIn("lecturer_subjects: 0 rows corrected", out.getvalue())
+        self.assertEqual(self.counts()["courses"][self.course.id], 4)
+        self.assertEqual(self.counts()["subjects"][self.subjects[0].id], 0)
@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CourseViewSet, SubjectViewSet, LecturerViewSet
+from config.async_views import async_read_urls
+from .views import (
+    CourseViewSet,
+    EnrollmentStatsView,
+    LecturerViewSet,
+    SubjectViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"courses", CourseViewSet, basename="courses")
@@ -9,4 +15,10 @@ router.register(r"lecturers", LecturerViewSet, basename="lecturers")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("stats/enrollments/", EnrollmentStatsView.as_view(),
+         name="enrollment-stats"),
+    path("async/", include(
+        async_read_urls("courses", CourseViewSet, "courses")
+        + async_read_urls("subjects", SubjectViewSet, "subjects")
+        + async_read_urls("lecturers", LecturerViewSet, "lecturers"))),
 ]
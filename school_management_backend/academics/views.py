@@ -1,11 +1,27 @@
+from django.db.models import Prefetch
 from django.db.models.deletion import ProtectedError
+from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from config.conditional import ConditionalGetMixin
+from config.export import ExportMixin
+from config.fieldsets import SparseFieldsetMixin
+from config.filters import ID_PARAM
+from config.projection import ProjectedListMixin
+from config.replicas import ReplicaReadMixin
+from students.enrollment import apply_enrollment_operations
+from students.models import Student
+from students.serializers import BulkEnrollmentResultSerializer
 from .models import Course, Lecturer, Subject
+from .response_cache import CachedRetrieveMixin
 from .serializers import (
+    BulkSubjectEnrollmentSerializer,
     CourseSerializer,
     CourseDetailSerializer,
+    EnrollmentStatsSerializer,
     LecturerSerializer,
     LecturerDetailSerializer,
     SubjectSerializer,
@@ -13,8 +29,26 @@ from .serializers import (
 )
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+def teaching_in(queryset, course_id):
+    return queryset.filter(id__in=Subject.objects.filter(
+        course_id=course_id).values("lecturer_id"))
+
+
+class CourseViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                    ConditionalGetMixin, CachedRetrieveMixin,
+                    ProjectedListMixin, viewsets.ModelViewSet):
+    projected_list = True
     queryset = Course.objects.all()
+    cache_kind = "course"
+    conditional_related = {
+        "students": (Student, "course"),
+        "subjects": (Subject, "course"),
+        "lecturers": (Lecturer, "subjects__course"),
+        "enrolled": (Student, "subjects__course"),
+    }
+    search_fields = ["^name"]
+    ordering_fields = ["id", "name"]
+    ordering = ["id"]
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -32,8 +66,21 @@ class CourseViewSet(viewsets.ModelViewSet):
             )
 
 
-class LecturerViewSet(viewsets.ModelViewSet):
+class LecturerViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                      ConditionalGetMixin, ProjectedListMixin,
+                      viewsets.ModelViewSet):
+    projected_list = True
     queryset = Lecturer.objects.all()
+    conditional_related = {
+        "subjects": (Subject, "lecturer"),
+        "courses": (Course, "subjects__lecturer"),
+        "students": (Student, "subjects__lecturer"),
+    }
+    filter_params = {"course": teaching_in}
+    filter_param_fields = {"course": ID_PARAM}
+    search_fields = ["^first_name", "^last_name", "^email"]
+    ordering_fields = ["id", "first_name", "last_name", "email"]
+    ordering = ["id"]
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -51,11 +98,84 @@ class LecturerViewSet(viewsets.ModelViewSet):
             )
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
-    queryset = Subject.objects.select_related("course", "lecturer"). \
-        prefetch_related("students").all()
+class SubjectViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                     ConditionalGetMixin, CachedRetrieveMixin, ExportMixin,
+                     ProjectedListMixin, viewsets.ModelViewSet):
+    # list and retrieve derive their own lookups from the serializer; the
+    # roster is not prefetched for writes, which reload it after saving.
+    projected_list = True
+    queryset = Subject.objects.select_related("course", "lecturer").all()
+    cache_kind = "subject"
+    conditional_related = {
+        "course": (Course, "subjects"),
+        "lecturer": (Lecturer, "subjects"),
+        "students": (Student, "subjects"),
+    }
+    filter_params = {
+        "course": "course_id",
+        "lecturer": "lecturer_id",
+        "student": "students",
+    }
+    filter_param_fields = {
+        "course": ID_PARAM,
+        "lecturer": ID_PARAM,
+        "student": ID_PARAM,
+    }
+    search_fields = ["^name"]
+    ordering_fields = ["id", "name"]
+    ordering = ["id"]
+    export_fields = ["id", "name", "course", "lecturer", "lecturer_email",
+                     "students"]
+
+    def export_queryset(self, queryset):
+        return queryset.prefetch_related(None).prefetch_related(
+            Prefetch("students", queryset=Student.objects.only("email")))
+
+    def export_row(self, subject):
+        return {
+            "id": subject.id,
+            "name": subject.name,
+            "course": subject.course.name,
+            "lecturer": str(subject.lecturer),
+            "lecturer_email": subject.lecturer.email,
+            "students": [student.email for student in subject.students.all()],
+        }
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return SubjectDetailSerializer
+        if self.action == "bulk_enroll":
+            return BulkSubjectEnrollmentSerializer
         return SubjectSerializer
+
+    @extend_schema(responses={200: BulkEnrollmentResultSerializer},
+                   summary="Set, add or remove students for many subjects")
+    @action(detail=False, methods=["post"], url_path="bulk-enroll")
+    def bulk_enroll(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = [(op["action"], op["subject"], op["students"])
+                      for op in serializer.validated_data["operations"]]
+        result = apply_enrollment_operations(operations, owner="subject")
+        return Response(result)
+
+
+class EnrollmentStatsView(ReplicaReadMixin, APIView):
+    """Students per course and subject, subjects per lecturer.
+
+    Reads the counter columns kept by academics.signals, so the cost
+    depends on the number of courses, subjects and lecturers only.
+    """
+
+    @extend_schema(responses={200: EnrollmentStatsSerializer},
+                   summary="Enrollment counts for the dashboard")
+    def get(self, request):
+        serializer = EnrollmentStatsSerializer({
+            "courses": Course.objects.order_by("id").only(
+                "id", "name", "student_count"),
+            "subjects": Subject.objects.order_by("id").only(
+                "id", "name", "course_id", "lecturer_id", "student_count"),
+            "lecturers": Lecturer.objects.order_by("id").only(
+                "id", "first_name", "last_name", "subject_count"),
+        })
+        return Response(serializer.data)
@@ -0,0 +1,207 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+
+class TokenCache:
+    """Token key -> cached (user, token) used by CachedTokenAuthentication.
+
+    The first tier is an in-process LRU with a TTL. If ``SHARED_CACHE`` names
+    an alias in ``CACHES``, that Django cache is consulted on a local miss so
+    workers can share entries. Entries are dropped by the signal handlers in
+    ``accounts.signals`` when a token is deleted or its user is saved.
+
+    Other processes' local tiers cannot see those drops directly. With a
+    shared cache every drop also moves a shared revocation version, and a
+    local hit is only trusted while the version it was stored under is
+    current, so a revoked token is rejected everywhere as soon as the signal
+    handler has run. Without a shared cache the local TTL is capped at
+    ``LOCAL_TIMEOUT`` seconds, which is how long another worker may still
+    accept a revoked token.
+    """
+
+    key_prefix = "auth-token:"
+    version_key = "auth-token-version"
+
+    def __init__(self, timeout=60, max_entries=10000, shared_cache="",
+                 local_timeout=5):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.shared_cache = shared_cache
+        self.local_timeout = (
+            timeout if shared_cache else min(timeout, local_timeout))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "TOKEN_AUTH_CACHE", {})
+        return cls(
+            timeout=options.get("TIMEOUT", 60),
+            max_entries=options.get("MAX_ENTRIES", 10000),
+            shared_cache=options.get("SHARED_CACHE", ""),
+            local_timeout=options.get("LOCAL_TIMEOUT", 5),
+        )
+
+    @property
+    def enabled(self):
+        return self.timeout > 0
+
+    def _shared(self):
+        return caches[self.shared_cache] if self.shared_cache else None
+
+    def version(self):
+        """The shared revocation version, or None without a shared cache."""
+        shared = self._shared()
+        return shared.get(self.version_key) if shared is not None else None
+
+    def lookup(self, key):
+        """Return ``(version, value)``; pass the version on to ``set``."""
+        version = self.version()
+        return version, self.get(key, version)
+
+    def get(self, key, version=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, stored_version, value = entry
+                if expires_at > now and stored_version == version:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is None:
+            return None
+        value = shared.get(self.key_prefix + key)
+        if value is not None:
+            self._store(key, value, version, now)
+        return value
+
+    def set(self, key, value, version=None):
+        # A token revoked while it was being loaded must not be cached.
+        if version != self.version():
+            return
+        self._store(key, value, version, time.monotonic())
+        shared = self._shared()
+        if shared is not None:
+            shared.set(self.key_prefix + key, value, self.timeout)
+
+    def _store(self, key, value, version, now):
+        with self._lock:
+            self._entries[key] = (now + self.local_timeout, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        shared = self._shared()
+        if shared is not None:
+            shared.delete(self.key_prefix + key)
+            shared.set(self.version_key, uuid.uuid4().hex, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache.from_settings()
+
+
+def _field_values(instance, exclude=()):
+    return {field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields
+            if field.attname not in exclude}
+
+
+def cache_entry(user, token):
+    """The cached form of an authenticated ``(user, token)``: field values
+    only, without the password hash, so a dump of the shared cache leaks no
+    credentials."""
+    return (user._state.db, _field_values(user, exclude={"password"}),
+            _field_values(token))
+
+
+def restore_entry(entry, token_model):
+    """Fresh ``(user, token)`` instances from ``cache_entry``. The password
+    is a deferred field: it loads on access, and ``save()`` leaves it be."""
+    db, user_values, token_values = entry
+    user = get_user_model().from_db(db, list(user_values),
+                                    list(user_values.values()))
+    token = token_model.from_db(db, list(token_values),
+                                list(token_values.values()))
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token/User query on a cache hit."""
+
+    def authenticate_credentials(self, key):
+        if not token_cache.enabled:
+            return super().authenticate_credentials(key)
+
+        version, cached = token_cache.lookup(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, cache_entry(user, token), version)
+            return user, token
+        # Each request gets its own instances, so per-request state such as
+        # permission caches never leaks between requests.
+        return restore_entry(cached, self.get_model())
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for the async read views."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. No credentials provided."))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. "
+                  "Token string should not contain spaces."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. "
+                  "Token string should not contain invalid characters."))
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        version = cached = None
+        if token_cache.enabled:
+            # The shared tier is a blocking client; keep it off the loop.
+            version, cached = await sync_to_async(token_cache.lookup)(key)
+        if cached is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related("user").aget(
+                    key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(
+                    _("User inactive or deleted."))
+            if token_cache.enabled:
+                await sync_to_async(token_cache.set)(
+                    key, cache_entry(token.user, token), version)
+            return token.user, token
+        return restore_entry(cached, self.get_model())
@@ -0,0 +1,153 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingPoolFull(Exception):
+    """Raised when the login hashing pool has no free slot."""
+
+
+class SharedSlots:
+    """Counting semaphore kept in a Django cache.
+
+    Every process using the same cache alias draws from one ``limit``. The
+    backend's ``incr``/``decr`` must be atomic (Redis, Memcached, or local
+    memory within one process). Every acquire and release refreshes the
+    counter's expiry, so it never lapses while slots are in use; slots
+    leaked by killed workers are freed once no login has touched it for
+    ``timeout`` seconds.
+    """
+
+    key = "login-hash-slots"
+
+    def __init__(self, alias, limit, timeout=60):
+        self.alias = alias
+        self.limit = limit
+        self.timeout = timeout
+
+    def acquire(self):
+        cache = caches[self.alias]
+        try:
+            taken = cache.incr(self.key)
+        except ValueError:
+            cache.add(self.key, 0, self.timeout)
+            taken = cache.incr(self.key)
+        cache.touch(self.key, self.timeout)
+        if taken > self.limit:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        cache = caches[self.alias]
+        try:
+            cache.decr(self.key)
+            cache.touch(self.key, self.timeout)
+        except ValueError:
+            # The counter expired while the slot was held.
+            pass
+
+
+class HashingPool:
+    """Bounded thread pool for password hashing.
+
+    At most ``workers`` hashes run at once and at most ``max_pending`` more
+    may wait; anything beyond that is rejected immediately with
+    HashingPoolFull instead of queueing behind a burst. ``hashlib`` releases
+    the GIL while hashing, so the worker threads use real cores. With
+    ``workers=0`` hashing runs inline on the calling thread.
+
+    Those bounds are per process, so under sync workers (one request per
+    process) they never trip. ``shared_slots`` adds a limit counted across
+    every process sharing its cache; logins beyond it are rejected the same
+    way.
+    """
+
+    def __init__(self, workers, max_pending, shared_slots=None):
+        self.workers = workers
+        self.shared_slots = shared_slots
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_pending) \
+            if workers else None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "LOGIN_HASHING_POOL", {})
+        workers = options.get("WORKERS", os.cpu_count() or 1)
+        shared_slots = None
+        if options.get("SHARED_CACHE"):
+            shared_slots = SharedSlots(
+                options["SHARED_CACHE"],
+                limit=options.get("SHARED_LIMIT", os.cpu_count() or 1),
+            )
+        return cls(workers=workers,
+                   max_pending=options.get("MAX_PENDING", 16),
+                   shared_slots=shared_slots)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="login-hash",
+                )
+            return self._executor
+
+    def run(self, func, *args):
+        if self.shared_slots is None:
+            return self._run(func, *args)
+        if not self.shared_slots.acquire():
+            raise HashingPoolFull
+        try:
+            return self._run(func, *args)
+        finally:
+            self.shared_slots.release()
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolFull
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+hashing_pool = HashingPool.from_settings()
+
+
+def _verify(raw_password, encoded):
+    """Check a password; also rehash it if the preferred hasher changed.
+
+    Pure CPU work with no DB access, so it is safe to run on a pool thread.
+    Returns ``(is_valid, new_encoded_or_None)``.
+    """
+    rehashed = []
+    valid = check_password(raw_password, encoded,
+                           setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, (rehashed[0] if rehashed else None)
+
+
+def verify_password(user, raw_password):
+    """Check ``raw_password`` for ``user`` on the hashing pool.
+
+    When the stored hash uses an outdated hasher or iteration count, the new
+    hash is saved here on the caller's thread and DB connection.
+    """
+    valid, new_encoded = hashing_pool.run(_verify, raw_password, user.password)
+    if new_encoded:
+        user.password = new_encoded
+        user.save(update_fields=["password"])
+    return valid
+
+
+def hash_password(raw_password):
+    return hashing_pool.run(make_password, raw_password)
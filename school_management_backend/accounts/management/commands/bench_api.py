@@ -0,0 +1,355 @@
+import datetime
+import json
+import platform
+import resource
+import statistics
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from academics.models import Course, Subject
+from accounts.models import User
+from students.models import Student
+from .generate_load_data import EMAIL_DOMAIN, delete_generated
+
+BENCH_EMAIL = f'bench-api@{EMAIL_DOMAIN}'
+BENCH_PASSWORD = 'bench-api-password'
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def api_client(token=None):
+    # Requests go through the full middleware stack, so use a host that
+    # ALLOWED_HOSTS accepts.
+    hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS
+             if host != '*']
+    client = APIClient(SERVER_NAME=hosts[0] if hosts else 'localhost')
+    if token:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    """Execute wrapper counting every query, whatever the DEBUG setting."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Endpoint:
+    """One route and method to drive; ``body``/``path`` take the iteration."""
+
+    def __init__(self, name, method, path, body=None, collect=None,
+                 client=None):
+        self.name = name
+        self.method = method
+        self.path = path if callable(path) else (lambda i, path=path: path)
+        self.body = body or (lambda i: None)
+        self.collect = collect
+        self.client = client
+
+
+class Command(BaseCommand):
+    help = ('Benchmark every API endpoint at several data sizes and write '
+            'latency, query and memory figures as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma-separated student counts')
+        parser.add_argument('--requests', type=int, default=30,
+                            help='Timed requests per endpoint')
+        parser.add_argument('--only', help='Comma-separated endpoint names')
+        parser.add_argument('--output', help='Write results to this file')
+        parser.add_argument('--compare',
+                            help='Earlier results file to diff against')
+        parser.add_argument('--keep', action='store_true',
+                            help='Leave the generated data in place')
+        parser.add_argument('--current-data', metavar='FILE',
+                            help='Benchmark the data already loaded and '
+                                 'write that size\'s results to FILE; used '
+                                 'for the per-size child processes')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        self.requests = max(options['requests'], 1)
+        self.only = set(options['only'].split(',')) if options['only'] \
+            else None
+        if options['current_data']:
+            with open(options['current_data'], 'w') as handle:
+                json.dump(self.run_size(), handle)
+            return
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'created': datetime.datetime.now(datetime.timezone.utc)
+                .isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+                'requests': self.requests,
+            },
+            'sizes': {},
+        }
+        try:
+            for size in sizes:
+                self.stdout.write(f'Generating {size} students...')
+                call_command('generate_load_data', students=size,
+                             courses=max(size // 1000, 10), replace=True,
+                             stdout=self.stdout)
+                report['sizes'][str(size)] = self.run_child(options)
+        finally:
+            User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+            if not options['keep']:
+                delete_generated()
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {options["output"]}'))
+        if baseline:
+            self.compare(baseline, report)
+
+    # Running
+
+    def run_child(self, options):
+        """Benchmark the loaded data in a fresh process.
+
+        ru_maxrss only ever grows, so measuring every size in this process
+        would report the largest size's peak (and the data generation's)
+        for all of them. Each child's figure covers just its own run.
+        """
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        command = [sys.executable, '-m', 'django', 'bench_api',
+                   '--requests', str(self.requests), '--current-data', path]
+        if options['only']:
+            command += ['--only', options['only']]
+        try:
+            self.stdout.flush()
+            subprocess.run(command, check=True, cwd=settings.BASE_DIR,
+                           env={**os.environ, 'DJANGO_SETTINGS_MODULE':
+                                os.environ.get('DJANGO_SETTINGS_MODULE',
+                                               'config.settings')})
+            with open(path) as result:
+                return json.load(result)
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(f'Benchmark process failed: {exc}')
+        finally:
+            os.remove(path)
+
+    def run_size(self):
+        user, _ = User.objects.get_or_create(email=BENCH_EMAIL)
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+        token, _ = Token.objects.get_or_create(user=user)
+        client = api_client(token)
+
+        results = {}
+        for endpoint in self.endpoints():
+            if self.only and endpoint.name not in self.only:
+                continue
+            results[endpoint.name] = self.measure(endpoint,
+                                                  endpoint.client or client)
+            row = results[endpoint.name]
+            self.stdout.write(
+                f'  {endpoint.name:<24} p50={row["p50_ms"]:>8.1f}ms '
+                f'p95={row["p95_ms"]:>8.1f}ms p99={row["p99_ms"]:>8.1f}ms '
+                f'queries={row["queries"]:>4} '
+                f'alloc={row["peak_alloc_mb"]:.1f}MB'
+            )
+        User.objects.filter(email__startswith='bench-logout').delete()
+        return {'endpoints': results, 'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+    def call(self, endpoint, client, i):
+        method = getattr(client, endpoint.method)
+        response = method(endpoint.path(i), endpoint.body(i), format='json')
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        if endpoint.collect:
+            endpoint.collect(response)
+        return response
+
+    def measure(self, endpoint, client):
+        # The first request is the probe: it counts queries and traces
+        # Python allocations, both of which would skew the timings.
+        queries = QueryCounter()
+        tracemalloc.start()
+        with connection.execute_wrapper(queries):
+            self.call(endpoint, client, 0)
+        peak_alloc = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        latencies, statuses = [], Counter()
+        for i in range(1, self.requests + 1):
+            started = time.perf_counter()
+            response = self.call(endpoint, client, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] += 1
+        quantiles = statistics.quantiles(latencies, n=100) \
+            if len(latencies) > 1 else latencies * 99
+        return {
+            'p50_ms': round(quantiles[49], 2),
+            'p95_ms': round(quantiles[94], 2),
+            'p99_ms': round(quantiles[98], 2),
+            'queries': queries.count,
+            'peak_alloc_mb': round(peak_alloc / (1024 * 1024), 2),
+            'statuses': dict(statuses),
+        }
+
+    def endpoints(self):
+        """Every route in accounts, academics, students and changes urls,
+        plus the schema."""
+        course = Course.objects.filter(name__startswith='Load').first()
+        subject = Subject.objects.filter(course=course).first()
+        lecturer = subject.lecturer
+        student = Student.objects.filter(course=course).first()
+        if student is None:
+            raise CommandError('Generated data has no students.')
+        n = self.requests + 1
+
+        # Objects created by the "create" endpoints are updated and then
+        # deleted by the later ones, so every write leaves the data as it was.
+        created = {'courses': [], 'lecturers': [], 'subjects': [],
+                   'students': []}
+
+        def keep(kind):
+            return lambda response: created[kind].append(response.data['id'])
+
+        def detail(kind):
+            return lambda i: f'/api/{kind}/{created[kind][i]}/'
+
+        course_body = lambda i: {'name': f'Bench course {i}',
+                                 'description': ''}
+        lecturer_body = lambda i: {'first_name': 'Bench', 'last_name': f'{i}',
+                                   'email': f'bench{i}@{EMAIL_DOMAIN}'}
+        subject_body = lambda i: {'name': f'Bench subject {i}',
+                                  'description': '', 'course': course.id,
+                                  'lecturer': lecturer.id}
+        student_body = lambda i: {'first_name': 'Bench', 'last_name': f'{i}',
+                                  'email': f'bench.student{i}@{EMAIL_DOMAIN}',
+                                  'date_of_birth': '2001-01-01',
+                                  'course': course.id,
+                                  'subjects': [subject.id]}
+        enrolled = list(student.subjects.values_list('id', flat=True))
+        roster = list(subject.students.values_list('id', flat=True))
+
+        logout_clients = []
+        for i in range(n):
+            other = User(email=f'bench-logout{i}@{EMAIL_DOMAIN}')
+            other.set_unusable_password()
+            other.save()
+            logout_clients.append(
+                api_client(Token.objects.create(user=other)))
+
+        class Rotating:
+            """A client that logs out with a fresh token every call."""
+            def post(self, *args, **kwargs):
+                return logout_clients.pop().post(*args, **kwargs)
+
+        endpoints = [
+            Endpoint('login', 'post', '/api/login/',
+                     lambda i: {'email': BENCH_EMAIL,
+                                'password': BENCH_PASSWORD}),
+            Endpoint('logout', 'post', '/api/logout/', client=Rotating()),
+        ]
+        for kind, body, sample in (
+                ('courses', course_body, course),
+                ('lecturers', lecturer_body, lecturer),
+                ('subjects', subject_body, subject),
+                ('students', student_body, student)):
+            endpoints += [
+                Endpoint(f'{kind}-list', 'get', f'/api/{kind}/'),
+                Endpoint(f'{kind}-list-page', 'get',
+                         f'/api/{kind}/?page_size=100'),
+                Endpoint(f'{kind}-detail', 'get', f'/api/{kind}/{sample.id}/'),
+                Endpoint(f'async-{kind}-list', 'get', f'/api/async/{kind}/'),
+                Endpoint(f'async-{kind}-detail', 'get',
+                         f'/api/async/{kind}/{sample.id}/'),
+                Endpoint(f'{kind}-create', 'post', f'/api/{kind}/', body,
+                         collect=keep(kind)),
+                Endpoint(f'{kind}-update', 'put', detail(kind), body),
+                Endpoint(f'{kind}-partial-update', 'patch', detail(kind),
+                         lambda i, kind=kind: {'description': f'Updated {i}'}
+                         if kind in ('courses', 'subjects') else
+                         {'first_name': f'Updated {i}'}),
+            ]
+        endpoints += [
+            Endpoint('enrollment-stats', 'get', '/api/stats/enrollments/'),
+            Endpoint('changes', 'get', '/api/changes/'),
+            Endpoint('schema', 'get', '/api/schema/'),
+            Endpoint('students-export', 'get', '/api/students/export/'),
+            Endpoint('subjects-export', 'get', '/api/subjects/export/'),
+            Endpoint('students-bulk-enroll', 'post',
+                     '/api/students/bulk-enroll/',
+                     lambda i: {'operations': [{'student': student.id,
+                                                'subjects': enrolled}]}),
+            Endpoint('subjects-bulk-enroll', 'post',
+                     '/api/subjects/bulk-enroll/',
+                     lambda i: {'operations': [{'subject': subject.id,
+                                                'students': roster}]}),
+        ]
+        # Dependants first: students and subjects before their lecturer.
+        for kind in ('students', 'subjects', 'lecturers', 'courses'):
+            endpoints.append(Endpoint(f'{kind}-delete', 'delete',
+                                      detail(kind)))
+        return endpoints
+
+    # Reporting
+
+    def compare(self, baseline, report):
+        """Print p95 and query-count changes against an earlier run."""
+        self.stdout.write(f'\nCompared with {baseline["meta"].get("commit")}:')
+        for size, current in report['sizes'].items():
+            before = baseline.get('sizes', {}).get(size)
+            if not before:
+                continue
+            self.stdout.write(f'{size} students')
+            for name, row in current['endpoints'].items():
+                old = before['endpoints'].get(name)
+                if not old:
+                    continue
+                change = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] \
+                    if old['p95_ms'] else 0
+                line = (f'  {name:<24} p95 {old["p95_ms"]:>8.1f} -> '
+                        f'{row["p95_ms"]:>8.1f}ms ({change:+.0%}) '
+                        f'queries {old["queries"]} -> {row["queries"]}')
+                regressed = change > 0.2 or row['queries'] > old['queries']
+                self.stdout.write(self.style.WARNING(line) if regressed
+                                  else line)
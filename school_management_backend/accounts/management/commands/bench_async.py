@@ -0,0 +1,149 @@
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+
+from academics.models import Course, Lecturer, Subject
+from accounts.models import User
+from students.models import Student
+from .bench_connections import percentile
+
+RESOURCES = {
+    'students': Student,
+    'subjects': Subject,
+    'courses': Course,
+    'lecturers': Lecturer,
+}
+
+
+class SlowDatabase:
+    """Execute wrapper adding fixed latency, like a remote database."""
+
+    def __init__(self, ms):
+        self.seconds = ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Compare the sync and async read endpoints under concurrent '
+            'load through the ASGI handler')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resources', default=','.join(RESOURCES),
+                            help='Comma-separated resources to request')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per resource and route')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=100,
+                            help='List page size; 0 requests the full list')
+        parser.add_argument('--db-latency-ms', type=float, default=0,
+                            help='Add this much latency to every query')
+
+    def handle(self, *args, **options):
+        resources = options['resources'].split(',')
+        for name in resources:
+            if name not in RESOURCES:
+                raise CommandError(f'Unknown resource {name!r}.')
+        samples = {name: RESOURCES[name].objects.order_by('id')
+                   .values_list('id', flat=True).first()
+                   for name in resources}
+        if None in samples.values():
+            raise CommandError('No data to read; run generate_load_data '
+                               'first.')
+
+        slow = SlowDatabase(options['db_latency_ms'])
+
+        def add_latency(sender, connection, **kwargs):
+            # Connections are per thread; wrap each one as it opens.
+            connection.execute_wrappers.append(slow)
+
+        if options['db_latency_ms']:
+            connection_created.connect(add_latency)
+
+        user = User(email=f'bench-async-{uuid.uuid4().hex[:12]}@example.com')
+        user.set_unusable_password()
+        user.save()
+        token = Token.objects.create(user=user)
+        self.headers = {'Authorization': f'Token {token.key}'}
+        query = f'?page_size={options["page_size"]}' \
+            if options['page_size'] else ''
+
+        self.stdout.write(
+            f'{options["requests"]} requests per route, concurrency '
+            f'{options["concurrency"]}, added DB latency '
+            f'{options["db_latency_ms"]}ms')
+        self.stdout.write(f'{"route":<32}{"req/s":>9}{"p50 ms":>9}'
+                          f'{"p95 ms":>9}{"threads":>9}')
+        # AsyncClient always sends "Host: testserver".
+        hosts = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+        hosts.enable()
+        try:
+            for name in resources:
+                for label, path in (
+                        ('list', f'/{name}/{query}'),
+                        ('detail', f'/{name}/{samples[name]}/')):
+                    rows = {}
+                    for route in ('sync', 'async'):
+                        prefix = '/api/async' if route == 'async' else '/api'
+                        rows[route] = asyncio.run(
+                            self.measure(prefix + path, options))
+                        row = rows[route]
+                        self.stdout.write(
+                            f'{route + " " + name + " " + label:<32}'
+                            f'{row["rps"]:>9.1f}{row["p50_ms"]:>9.2f}'
+                            f'{row["p95_ms"]:>9.2f}'
+                            f'{row["threads"]:>9}')
+                    change = rows['async']['rps'] / rows['sync']['rps'] - 1
+                    self.stdout.write(self.style.SUCCESS(
+                        f'  async {name} {label}: {change:+.0%} throughput'))
+        finally:
+            hosts.disable()
+            connection_created.disconnect(add_latency)
+            user.delete()
+
+    async def measure(self, path, options):
+        client = AsyncClient()
+        # Warm caches and connections.
+        response = await client.get(path, headers=self.headers)
+        if response.status_code != 200:
+            raise CommandError(f'{path} answered {response.status_code}')
+
+        gate = asyncio.Semaphore(max(options['concurrency'], 1))
+        latencies = []
+        threads = threading.active_count()
+
+        async def one():
+            nonlocal threads
+            # An ASGI server gives each request its own context, so sync
+            # code of concurrent requests runs on separate threads.
+            async with gate, ThreadSensitiveContext():
+                started = time.perf_counter()
+                response = await client.get(path, headers=self.headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                threads = max(threads, threading.active_count())
+                if response.status_code != 200:
+                    raise CommandError(f'{path} answered '
+                                       f'{response.status_code}')
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(
+            max(options['requests'], 1))))
+        elapsed = time.perf_counter() - started
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 95),
+            'threads': threads,
+        }
@@ -0,0 +1,134 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from rest_framework.authtoken.models import Token
+
+from accounts.models import User
+from .bench_api import api_client
+
+MODES = ('none', 'persistent', 'pgbouncer', 'pool')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def pool_size():
+    """Connections opened so far by the psycopg pool, if one is in use."""
+    pool = getattr(connection, 'pool', None)
+    return None if pool is None else pool.get_stats()['connections_num']
+
+
+class Command(BaseCommand):
+    help = ('Compare request latency and connections opened under each '
+            'DB_CONN_MODE')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='none,persistent',
+                            help=f'Comma-separated modes from {MODES}')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--path', default='/api/courses/',
+                            help='Endpoint to request')
+        parser.add_argument('--json', action='store_true',
+                            help='Measure the current DB_CONN_MODE only and '
+                                 'print JSON')
+
+    def handle(self, *args, **options):
+        if options['json']:
+            self.stdout.write(json.dumps(self.measure(options)))
+            return
+
+        # Settings are read once per process, so each mode runs in its own.
+        rows = []
+        for mode in options['modes'].split(','):
+            if mode not in MODES:
+                raise CommandError(f'Unknown mode {mode!r}.')
+            result = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_connections', '--json',
+                 f'--requests={options["requests"]}',
+                 f'--path={options["path"]}'],
+                env={**os.environ, 'DB_CONN_MODE': mode},
+                capture_output=True, text=True,
+            )
+            if result.returncode:
+                raise CommandError(f'{mode}: {result.stderr.strip()}')
+            rows.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(f'{settings.DATABASES["default"]["ENGINE"]} '
+                          f'GET {options["path"]} x{options["requests"]}')
+        self.stdout.write(f'{"mode":<12}{"connects":>9}{"p50 ms":>9}'
+                          f'{"p95 ms":>9}{"setup ms":>10}')
+        for row in rows:
+            self.stdout.write(
+                f'{row["mode"]:<12}{row["connections"]:>9}'
+                f'{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["connect_ms"]:>10.2f}'
+            )
+        baseline = rows[0]
+        for row in rows[1:]:
+            saved = baseline['p50_ms'] - row['p50_ms']
+            self.stdout.write(self.style.SUCCESS(
+                f'{row["mode"]}: p50 {saved:+.2f}ms vs {baseline["mode"]} '
+                f'({baseline["connections"] - row["connections"]} fewer '
+                f'connections)'
+            ))
+
+    def measure(self, options):
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        # Cost of one brand-new connection, outside any pool.
+        setups = []
+        for _ in range(5):
+            started = time.perf_counter()
+            raw = connection.Database.connect(
+                **connection.get_connection_params())
+            raw.cursor().execute('SELECT 1')
+            setups.append((time.perf_counter() - started) * 1000)
+            raw.close()
+
+        user = User(email=f'bench-conn-{uuid.uuid4().hex[:12]}@example.com')
+        user.set_unusable_password()
+        user.save()
+        client = api_client(Token.objects.create(user=user))
+        try:
+            client.get(options['path'])  # warm caches and the pool
+            pooled = pool_size()
+            connection_created.connect(count)
+            latencies = []
+            for _ in range(max(options['requests'], 1)):
+                # The test client skips the request_started/finished
+                # connection handling a WSGI server does; do it here.
+                started = time.perf_counter()
+                close_old_connections()
+                response = client.get(options['path'])
+                close_old_connections()
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{options["path"]} answered '
+                                       f'{response.status_code}')
+        finally:
+            connection_created.disconnect(count)
+            user.delete()
+        return {
+            'mode': settings.DB_CONN_MODE,
+            # A pool reports every checkout as a new connection; count the
+            # physical connections it opened instead.
+            'connections': len(opened) if pooled is None
+            else pool_size() - pooled,
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 95),
+            'connect_ms': statistics.median(setups),
+        }
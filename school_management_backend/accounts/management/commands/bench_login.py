@@ -0,0 +1,88 @@
+import os
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from accounts.views import LoginView
+
+
+class Command(BaseCommand):
+    help = 'Measure /api/login/ throughput and latency under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Total login attempts')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Client threads issuing logins')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        concurrency = options['concurrency']
+        email = f'bench-{uuid.uuid4().hex[:12]}@example.com'
+        password = uuid.uuid4().hex
+        User.objects.create_user(email=email, password=password)
+
+        view = LoginView.as_view()
+        factory = APIRequestFactory()
+        latencies = []
+        statuses = {}
+        lock = threading.Lock()
+        remaining = iter(range(total))
+
+        def client():
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    request = factory.post('/api/login/',
+                                           {'email': email, 'password': password},
+                                           format='json')
+                    started = time.perf_counter()
+                    response = view(request)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses[response.status_code] = \
+                            statuses.get(response.status_code, 0) + 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        User.objects.filter(email=email).delete()
+
+        workers = settings.LOGIN_HASHING_POOL['WORKERS'] or 1
+        cores = min(workers, os.cpu_count() or 1)
+        ok = statuses.get(200, 0)
+        latencies.sort()
+        quantiles = statistics.quantiles(latencies, n=100) \
+            if len(latencies) > 1 else latencies * 99
+        self.stdout.write(
+            f'hasher={settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1]} '
+            f'pool_workers={settings.LOGIN_HASHING_POOL["WORKERS"]} '
+            f'max_pending={settings.LOGIN_HASHING_POOL["MAX_PENDING"]} '
+            f'concurrency={concurrency}'
+        )
+        self.stdout.write(f'statuses: {dict(sorted(statuses.items()))}')
+        self.stdout.write(
+            f'latency ms: p50={quantiles[49] * 1000:.1f} '
+            f'p95={quantiles[94] * 1000:.1f} p99={quantiles[98] * 1000:.1f}'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{ok / wall:.1f} successful logins/sec, '
+            f'{ok / wall / cores:.1f} per core ({cores} cores used)'
+        ))
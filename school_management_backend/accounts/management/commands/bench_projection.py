@@ -0,0 +1,75 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from academics.models import Course, Lecturer, Subject
+from academics.serializers import (
+    CourseSerializer, LecturerSerializer, SubjectSerializer,
+)
+from config.projection import Projection
+from config.renderers import FastJSONRenderer
+from students.models import Student
+from students.serializers import StudentSerializer
+from .bench_renderers import serialized, timed
+from .generate_load_data import delete_generated
+
+LISTS = {
+    'students': (StudentSerializer, Student, {}),
+    'subjects': (SubjectSerializer, Subject, {}),
+    'subjects+': (SubjectSerializer, Subject,
+                  {'expand': ['course', 'lecturer']}),
+    'courses': (CourseSerializer, Course, {}),
+    'lecturers': (LecturerSerializer, Lecturer, {}),
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare list serialization through the serializers with the '
+            'values() projection: time, peak allocations and output. '
+            '"subjects+" expands course and lecturer')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help='Students in the list payload')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--keep', action='store_true',
+                            help='Leave generated data in place')
+
+    def handle(self, *args, **options):
+        rows = max(options['rows'], 1)
+        repeat = max(options['repeat'], 1)
+        generated = Student.objects.count() < rows
+        if generated:
+            call_command('generate_load_data', students=rows,
+                         replace=True, stdout=self.stdout)
+        renderer = FastJSONRenderer()
+        self.stdout.write(f'median of {repeat}, including queries')
+        self.stdout.write(f'{"list":<12}{"path":<12}{"rows":>7}{"ms":>10}'
+                          f'{"alloc KB":>10}')
+        try:
+            for name, (serializer_class, model, kwargs) in LISTS.items():
+                queryset = model.objects.order_by('id')[:rows]
+                projection = Projection(serializer_class(**kwargs))
+                paths = {
+                    'serializer': lambda: serialized(
+                        serializer_class, queryset, **kwargs),
+                    'projection': lambda: projection.rows(
+                        projection.values(queryset)),
+                }
+                results = {}
+                for path, func in paths.items():
+                    data = func()
+                    ms, peak = timed(func, repeat)
+                    results[path] = renderer.render(data), ms, peak
+                    self.stdout.write(
+                        f'{name:<12}{path:<12}{len(data):>7}{ms:>10.2f}'
+                        f'{peak / 1024:>10.0f}')
+                body, ms, peak = results['serializer']
+                same = body == results['projection'][0]
+                message = f'  {ms / results["projection"][1]:.1f}x faster, ' \
+                    f'{peak / results["projection"][2]:.1f}x less memory, ' \
+                    + ('identical output' if same else 'OUTPUT DIFFERS')
+                self.stdout.write(self.style.SUCCESS(message) if same
+                                  else self.style.ERROR(message))
+        finally:
+            if generated and not options['keep']:
+                delete_generated()
@@ -0,0 +1,104 @@
+import io
+import statistics
+import time
+import tracemalloc
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from academics.models import Course, Subject
+from academics.serializers import CourseDetailSerializer, SubjectSerializer
+from config.fieldsets import related_lookups
+from config.renderers import FastJSONParser, FastJSONRenderer, orjson
+from students.models import Student
+from students.serializers import StudentSerializer
+from .generate_load_data import delete_generated
+
+
+def serialized(serializer_class, queryset, many=True, **kwargs):
+    select, prefetch = related_lookups(serializer_class(**kwargs))
+    if select:
+        queryset = queryset.select_related(*select)
+    queryset = queryset.prefetch_related(*prefetch)
+    if many:
+        return serializer_class(list(queryset), many=True, **kwargs).data
+    return serializer_class(queryset.get(), **kwargs).data
+
+
+def timed(func, repeat):
+    """Median milliseconds per call and peak traced bytes of one call."""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), peak
+
+
+class Command(BaseCommand):
+    help = ('Compare JSON render and parse time and allocations of DRF '
+            'JSONRenderer/JSONParser and the fast versions')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help='Students in the list payload')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--keep', action='store_true',
+                            help='Leave generated data in place')
+
+    def handle(self, *args, **options):
+        rows = max(options['rows'], 1)
+        generated = Student.objects.count() < rows
+        if generated:
+            call_command('generate_load_data', students=rows,
+                         replace=True, stdout=self.stdout)
+        try:
+            busiest = Course.objects.annotate(n=Count('students')) \
+                .order_by('-n').values_list('id', flat=True).first()
+            payloads = {
+                f'students list ({rows})': serialized(
+                    StudentSerializer, Student.objects.order_by('id')[:rows]),
+                'subjects list': serialized(
+                    SubjectSerializer, Subject.objects.order_by('id')),
+                'busiest course detail': serialized(
+                    CourseDetailSerializer,
+                    Course.objects.filter(id=busiest), many=False),
+            }
+        finally:
+            if generated and not options['keep']:
+                delete_generated()
+
+        repeat = max(options['repeat'], 1)
+        version = orjson.__version__ if orjson else 'not installed'
+        self.stdout.write(f'orjson {version}, median of {repeat}')
+        self.stdout.write(f'{"payload":<26}{"codec":<7}{"KB":>8}'
+                          f'{"render ms":>11}{"alloc KB":>10}'
+                          f'{"parse ms":>10}{"alloc KB":>10}')
+        for name, data in payloads.items():
+            results = {}
+            for codec, renderer, parser in (
+                    ('drf', JSONRenderer(), JSONParser()),
+                    ('fast', FastJSONRenderer(), FastJSONParser())):
+                body = renderer.render(data)
+                render_ms, render_peak = timed(
+                    lambda: renderer.render(data), repeat)
+                parse_ms, parse_peak = timed(
+                    lambda: parser.parse(io.BytesIO(body)), repeat)
+                results[codec] = body, render_ms
+                self.stdout.write(
+                    f'{name:<26}{codec:<7}{len(body) / 1024:>8.0f}'
+                    f'{render_ms:>11.2f}{render_peak / 1024:>10.0f}'
+                    f'{parse_ms:>10.2f}{parse_peak / 1024:>10.0f}')
+            same = results['drf'][0] == results['fast'][0]
+            speedup = results['drf'][1] / results['fast'][1]
+            message = f'  render {speedup:.1f}x faster, ' + \
+                ('identical output' if same else 'OUTPUT DIFFERS')
+            self.stdout.write(self.style.SUCCESS(message) if same
+                              else self.style.ERROR(message))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from drf_spectacular.settings import spectacular_settings
+
+from config.schema import write_artifacts
+
+
+class Command(BaseCommand):
+    help = ('Generate the OpenAPI schema once and write it, with gzip and '
+            'brotli variants, for /api/schema/ to serve.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root', default=str(settings.SCHEMA_ARTIFACT['ROOT']),
+            help='Directory to write the artifact to '
+                 '(default: SCHEMA_ARTIFACT_ROOT).')
+
+    def handle(self, *args, **options):
+        if not settings.CODE_VERSION:
+            # An unversioned artifact would be served to every later build;
+            # the view generates the schema at runtime instead.
+            self.stdout.write(self.style.WARNING(
+                'CODE_VERSION is not set; no schema artifact written.'))
+            return
+        started = time.perf_counter()
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        schema = generator.get_schema(request=None, public=True)
+        artifacts = write_artifacts(options['root'], schema,
+                                    settings.CODE_VERSION)
+        elapsed = (time.perf_counter() - started) * 1000
+        for fmt, artifact in artifacts.items():
+            sizes = ', '.join(f'{coding or "identity"} {len(body)} B'
+                              for coding, body in artifact.bodies.items())
+            self.stdout.write(f'openapi.{fmt}: {sizes}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote the schema for version '
+            f'{settings.CODE_VERSION} to {options["root"]} '
+            f'in {elapsed:.0f} ms.'))
@@ -0,0 +1,220 @@
+import datetime
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from academics.models import Course, Lecturer, Subject
+from academics.response_cache import response_cache
+from academics.stats import adjust_counts
+from changes.feed import record_deleted, record_enrollments, record_saved
+from students.enrollment import Enrollment
+from students.models import Student
+
+# Every generated row is tagged so it can be found and replaced later.
+EMAIL_DOMAIN = 'load.example.com'
+COURSE_PREFIX = 'Load Course'
+
+FIRST_NAMES = [
+    'Sipho', 'Naledi', 'Thabo', 'Zanele', 'Bongani', 'Lerato', 'Ayanda',
+    'Nomvula', 'Mandla', 'Lindiwe', 'Kagiso', 'Palesa', 'Tshepo', 'Karabo',
+    'Neo', 'Lwazi', 'Amahle', 'Sibusiso', 'Refilwe', 'Themba', 'Anna',
+    'David', 'Sarah', 'James', 'Priya', 'Ahmed', 'Maria', 'Johan',
+]
+LAST_NAMES = [
+    'Dlamini', 'Khumalo', 'Mthembu', 'Ngcobo', 'Sithole', 'Molefe', 'Zulu',
+    'Cele', 'Nkosi', 'Mokoena', 'Naidoo', 'van der Merwe', 'Botha',
+    'Pillay', 'Ndlovu', 'Mahlangu', 'Maseko', 'Radebe', 'Smith', 'Pretorius',
+]
+AREAS = [
+    'Computing', 'Engineering', 'Business', 'Law', 'Medicine', 'Education',
+    'Economics', 'Architecture', 'Psychology', 'Mathematics', 'Music',
+    'Chemistry', 'Physics', 'History', 'Languages', 'Agriculture',
+]
+TOPICS = [
+    'Foundations', 'Methods', 'Systems', 'Theory', 'Practice', 'Analysis',
+    'Design', 'Ethics', 'Research', 'Applications', 'Seminar', 'Project',
+]
+
+BATCH_SIZE = 5000
+
+
+def zipf_weights(count, exponent=1.1):
+    """Popularity weights where rank r gets 1 / r**exponent."""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def delete_rows(model, ids):
+    """``DELETE ... WHERE pk IN (...)`` in batches.
+
+    Plain SQL skips the per-object signals and cascade collection that
+    QuerySet.delete() runs, which would cost a few queries per generated
+    row. Callers must delete dependent rows first.
+    """
+    quote = connection.ops.quote_name
+    table, pk = quote(model._meta.db_table), quote(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {pk} IN ({placeholders})', batch)
+
+
+def delete_generated():
+    """Remove rows created by a previous run, without per-row signals."""
+    students = Student.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+    courses = Course.objects.filter(name__startswith=COURSE_PREFIX)
+    subjects = Subject.objects.filter(course__in=courses)
+    course_ids = list(courses.values_list('id', flat=True))
+    subject_rows = list(subjects.values_list('id', 'lecturer_id'))
+    student_rows = list(students.values_list('id', 'course_id'))
+    subject_ids = [pk for pk, _ in subject_rows]
+    student_ids = [pk for pk, _ in student_rows]
+    with transaction.atomic():
+        enrollments = Enrollment.objects.filter(
+            Q(student__in=students) | Q(subject__in=subjects))
+        pairs = list(enrollments.values_list('student_id', 'subject_id'))
+        record_enrollments([], pairs)
+        enrollments.delete()
+        # Raw deletes send no signals; uncount them as creating counts them.
+        for model, counter, targets in (
+                (Subject, 'student_count', [pk for _, pk in pairs]),
+                (Course, 'student_count', [pk for _, pk in student_rows]),
+                (Lecturer, 'subject_count', [pk for _, pk in subject_rows])):
+            adjust_counts(model, counter, {
+                pk: -n for pk, n in Counter(targets).items()})
+        delete_rows(Student, student_ids)
+        delete_rows(Subject, subject_ids)
+        delete_rows(Course, course_ids)
+        record_deleted(Student, student_ids)
+        record_deleted(Subject, subject_ids)
+        record_deleted(Course, course_ids)
+        Lecturer.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}',
+                                subjects=None).delete()
+        response_cache.invalidate('course', course_ids)
+        response_cache.invalidate('subject', subject_ids)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, skewed synthetic data set for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=10)
+        parser.add_argument('--subjects-per-course', type=int, default=8)
+        parser.add_argument('--lecturers', type=int,
+                            help='Default: one per three subjects')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Random seed; the same seed gives the '
+                                 'same data set')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete previously generated rows first')
+        parser.add_argument('--delete', action='store_true',
+                            help='Only delete previously generated rows')
+
+    def handle(self, *args, **options):
+        if options['replace'] or options['delete']:
+            delete_generated()
+            if options['delete']:
+                self.stdout.write(self.style.SUCCESS('Deleted generated data'))
+                return
+        elif Course.objects.filter(name__startswith=COURSE_PREFIX).exists():
+            raise CommandError('Generated data already exists; '
+                               'pass --replace to regenerate it.')
+
+        rng = random.Random(options['seed'])
+        course_count = max(options['courses'], 1)
+        per_course = max(options['subjects_per_course'], 1)
+        lecturer_count = options['lecturers'] or \
+            max(course_count * per_course // 3, 1)
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            courses = Course.objects.bulk_create([
+                Course(name=f'{COURSE_PREFIX} {n:03} - '
+                            f'{AREAS[n % len(AREAS)]}',
+                       description=f'Synthetic course {n}')
+                for n in range(1, course_count + 1)
+            ])
+            lecturers = Lecturer.objects.bulk_create([
+                Lecturer(first_name=rng.choice(FIRST_NAMES),
+                         last_name=rng.choice(LAST_NAMES),
+                         email=f'lecturer{n}@{EMAIL_DOMAIN}')
+                for n in range(1, lecturer_count + 1)
+            ], batch_size=BATCH_SIZE)
+            # A few lecturers teach most subjects.
+            lecturer_weights = zipf_weights(lecturer_count)
+            subjects = Subject.objects.bulk_create([
+                Subject(name=f'{TOPICS[k % len(TOPICS)]} {k + 1}',
+                        description='', course=course,
+                        lecturer=rng.choices(lecturers, lecturer_weights)[0])
+                for course in courses for k in range(per_course)
+            ], batch_size=BATCH_SIZE)
+            # Bulk inserts send no signals; count and log them here.
+            adjust_counts(Lecturer, 'subject_count',
+                          Counter(subject.lecturer_id for subject in subjects))
+            for objs in (courses, lecturers, subjects):
+                record_saved(objs, created=True)
+        if any(obj.pk is None for obj in [*courses, *lecturers, *subjects]):
+            raise CommandError('The database backend does not return ids '
+                               'from bulk inserts.')
+
+        by_course = {}
+        for subject in subjects:
+            by_course.setdefault(subject.course_id, []).append(subject.pk)
+        # Course sizes and subject popularity both follow a Zipf curve, so a
+        # few courses and subjects carry most of the enrollments.
+        course_weights = zipf_weights(course_count)
+        subject_counts = [max(round(100 * weight), 1)
+                          for weight in zipf_weights(per_course)]
+        first_year = datetime.date(1995, 1, 1).toordinal()
+        last_year = datetime.date(2007, 12, 31).toordinal()
+
+        total = options['students']
+        enrollments = 0
+        for start in range(0, total, BATCH_SIZE):
+            students = []
+            for n in range(start, min(start + BATCH_SIZE, total)):
+                first = rng.choice(FIRST_NAMES)
+                last = rng.choice(LAST_NAMES)
+                students.append(Student(
+                    first_name=first, last_name=last,
+                    email=f'{first}.{last}.{n}@{EMAIL_DOMAIN}'.lower()
+                    .replace(' ', ''),
+                    date_of_birth=datetime.date.fromordinal(
+                        rng.randint(first_year, last_year)),
+                    course=rng.choices(courses, course_weights)[0],
+                ))
+            with transaction.atomic():
+                Student.objects.bulk_create(students)
+                rows = []
+                for student in students:
+                    pool = by_course[student.course_id]
+                    taken = min(rng.choice((2, 3, 4, 4, 5, 6)), len(pool))
+                    picked = set(rng.sample(pool, taken,
+                                            counts=subject_counts))
+                    rows.extend(Enrollment(student_id=student.pk,
+                                           subject_id=subject_id)
+                                for subject_id in picked)
+                Enrollment.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+                adjust_counts(Course, 'student_count', Counter(
+                    student.course_id for student in students))
+                adjust_counts(Subject, 'student_count', Counter(
+                    row.subject_id for row in rows))
+                record_saved(students, created=True)
+                record_enrollments([(row.student_id, row.subject_id)
+                                    for row in rows], [])
+            enrollments += len(rows)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{min(start + BATCH_SIZE, total)} students')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {course_count} courses, {lecturer_count} lecturers, '
+            f'{len(subjects)} subjects, {total} students and {enrollments} '
+            f'enrollments in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,399 @@
+import csv
+import io
+import json
+import os
+import time
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from academics.models import Course, Lecturer, Subject
+from academics.response_cache import response_cache
+from academics.stats import adjust_counts
+from changes.feed import record_saved
+from students.enrollment import Enrollment, enrollment_changed
+from students.models import Student
+
+KINDS = ('course', 'lecturer', 'subject', 'student', 'enrollment')
+
+# Columns read for each kind. Courses, lecturers and students are matched
+# by name/email; a subject by its name within its course; an enrollment
+# names a student by email and a subject in that student's course.
+COLUMNS = {
+    'course': ('name', 'description'),
+    'lecturer': ('first_name', 'last_name', 'email'),
+    'subject': ('name', 'description', 'course', 'lecturer'),
+    'student': ('first_name', 'last_name', 'email', 'date_of_birth',
+                'course', 'subjects'),
+    'enrollment': ('student', 'subject'),
+}
+
+BATCH_SIZE = 1000
+
+
+class RowError(Exception):
+    """A row that cannot be imported; ``errors`` maps column to messages."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def clean(model, row, names):
+    """Validate ``names`` from ``row`` with the model's own field rules."""
+    values, errors = {}, {}
+    for name in names:
+        field = model._meta.get_field(name)
+        raw = row.get(name)
+        raw = '' if raw is None else str(raw).strip()
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    if errors:
+        raise RowError(errors)
+    return values
+
+
+def split_names(value):
+    if isinstance(value, list):
+        names = value
+    else:
+        names = (value or '').split(';')
+    return [str(name).strip() for name in names if str(name).strip()]
+
+
+class Command(BaseCommand):
+    help = ('Bulk-import courses, lecturers, subjects, students or '
+            'enrollments from a CSV or JSON-lines file')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('path', help='CSV or JSON-lines (.jsonl) file')
+        parser.add_argument('--format', choices=('csv', 'jsonl'),
+                            help='Input format (default: from extension)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Rows inserted per transaction')
+        parser.add_argument('--checkpoint',
+                            help='Progress file (default: <path>.checkpoint)')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip rows recorded in the checkpoint')
+        parser.add_argument('--errors',
+                            help='Write rejected rows here as JSON lines')
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Use bulk_create even on PostgreSQL')
+
+    def handle(self, *args, **options):
+        self.kind = options['kind']
+        self.verbosity = options['verbosity']
+        self.path = options['path']
+        self.batch_size = max(options['batch_size'], 1)
+        self.use_copy = connection.vendor == 'postgresql' \
+            and not options['no_copy']
+        fmt = options['format'] or \
+            ('jsonl' if self.path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        checkpoint = options['checkpoint'] or f'{self.path}.checkpoint'
+        start = self.read_checkpoint(checkpoint) if options['resume'] else 0
+
+        self.load_maps()
+        build = getattr(self, f'build_{self.kind}')
+        flush = getattr(self, f'flush_{self.kind}')
+        errors_file = open(options['errors'], 'a') if options['errors'] \
+            else None
+        self.stats = {'created': 0, 'enrolled': 0, 'existing': 0, 'bad': 0}
+        batch, position, read = [], start, 0
+        started = time.perf_counter()
+        try:
+            for position, row in self.read_rows(fmt, start):
+                read += 1
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    item = build(row)
+                except RowError as exc:
+                    self.reject(errors_file, position, row, exc.errors)
+                    continue
+                if item is None:
+                    self.stats['existing'] += 1
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self.commit(flush, batch, checkpoint, position)
+                    batch = []
+                    self.progress(read, started)
+            self.commit(flush, batch, checkpoint, position)
+        finally:
+            if errors_file:
+                errors_file.close()
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{read} rows read in {elapsed:.1f}s '
+            f'({read / elapsed if elapsed else 0:.0f} rows/sec): '
+            f'{self.stats["created"]} created, '
+            f'{self.stats["enrolled"]} enrollments, '
+            f'{self.stats["existing"]} already present, '
+            f'{self.stats["bad"]} bad'
+        )
+        style = self.style.WARNING if self.stats['bad'] else self.style.SUCCESS
+        self.stdout.write(style(f'Imported {self.kind} rows from {self.path}'))
+
+    # Input
+
+    def read_rows(self, fmt, start):
+        """Yield ``(row_number, row)``, skipping rows up to ``start``."""
+        if fmt == 'csv':
+            with open(self.path, newline='', encoding='utf-8-sig') as handle:
+                for number, row in enumerate(csv.DictReader(handle), 1):
+                    if number > start:
+                        yield number, row
+            return
+        with open(self.path, encoding='utf-8') as handle:
+            number = 0
+            for line in handle:
+                if not line.strip():
+                    continue
+                number += 1
+                if number <= start:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    row = RowError({'row': [f'Invalid JSON: {exc}']})
+                else:
+                    if not isinstance(row, dict):
+                        row = RowError({'row': ['Expected a JSON object.']})
+                yield number, row
+
+    def read_checkpoint(self, checkpoint):
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as handle:
+            state = json.load(handle)
+        if state.get('kind') != self.kind:
+            raise CommandError(f'{checkpoint} records a {state.get("kind")} '
+                               f'import, not {self.kind}.')
+        self.stdout.write(f'Resuming after row {state["rows"]}')
+        return state['rows']
+
+    def reject(self, errors_file, position, row, errors):
+        self.stats['bad'] += 1
+        if errors_file:
+            errors_file.write(json.dumps({
+                'row': position, 'errors': errors,
+                'data': None if isinstance(row, RowError) else row,
+            }) + '\n')
+        elif self.stats['bad'] <= 20:
+            self.stderr.write(f'row {position}: {json.dumps(errors)}')
+
+    def progress(self, read, started):
+        if self.verbosity > 1:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{read} rows, {read / elapsed:.0f} rows/sec')
+
+    # Natural-key maps
+
+    def load_maps(self):
+        self.courses = dict(Course.objects.values_list('name', 'id'))
+        self.lecturers = dict(Lecturer.objects.values_list('email', 'id'))
+        self.subjects = {(course_id, name): pk for pk, course_id, name in
+                         Subject.objects.values_list('id', 'course_id', 'name')}
+        self.students = {email: (pk, course_id) for pk, email, course_id in
+                         Student.objects.values_list('id', 'email',
+                                                     'course_id')}
+
+    def course_id(self, name, column='course'):
+        course_id = self.courses.get(name)
+        if course_id is None:
+            raise RowError({column: [f'Unknown course "{name}".']})
+        return course_id
+
+    def subject_ids(self, course_id, names, column):
+        ids = [self.subjects.get((course_id, name)) for name in names]
+        missing = [name for name, pk in zip(names, ids) if pk is None]
+        if missing:
+            raise RowError({column: [f'Unknown subjects in the student\'s '
+                                     f'course: {missing}.']})
+        return ids
+
+    # Row builders: return an unsaved object (plus related data), None for a
+    # row that already exists, or raise RowError.
+
+    def build_course(self, row):
+        values = clean(Course, row, COLUMNS['course'])
+        if values['name'] in self.courses:
+            return None
+        self.courses[values['name']] = None
+        return Course(**values)
+
+    def build_lecturer(self, row):
+        values = clean(Lecturer, row, COLUMNS['lecturer'])
+        if values['email'] in self.lecturers:
+            return None
+        self.lecturers[values['email']] = None
+        return Lecturer(**values)
+
+    def build_subject(self, row):
+        values = clean(Subject, row, ('name', 'description'))
+        course_id = self.course_id(str(row.get('course') or '').strip())
+        email = str(row.get('lecturer') or '').strip()
+        lecturer_id = self.lecturers.get(email)
+        if lecturer_id is None:
+            raise RowError({'lecturer': [f'Unknown lecturer "{email}".']})
+        key = (course_id, values['name'])
+        if key in self.subjects:
+            return None
+        self.subjects[key] = None
+        return Subject(course_id=course_id, lecturer_id=lecturer_id, **values)
+
+    def build_student(self, row):
+        values = clean(Student, row, ('first_name', 'last_name', 'email',
+                                      'date_of_birth'))
+        course_id = self.course_id(str(row.get('course') or '').strip())
+        subject_ids = self.subject_ids(
+            course_id, split_names(row.get('subjects')), 'subjects')
+        if values['email'] in self.students:
+            return None
+        self.students[values['email']] = (None, course_id)
+        return Student(course_id=course_id, **values), subject_ids
+
+    def build_enrollment(self, row):
+        email = str(row.get('student') or '').strip()
+        student_id, course_id = self.students.get(email, (None, None))
+        if student_id is None:
+            raise RowError({'student': [f'Unknown student "{email}".']})
+        names = split_names(row.get('subject'))
+        if not names:
+            raise RowError({'subject': ['This field cannot be blank.']})
+        return [(student_id, subject_id) for subject_id in
+                self.subject_ids(course_id, names, 'subject')]
+
+    # Batch writers, each run inside one transaction.
+
+    def commit(self, flush, batch, checkpoint, position):
+        if batch:
+            with transaction.atomic():
+                flush(batch)
+        with open(checkpoint, 'w') as handle:
+            json.dump({'kind': self.kind, 'path': self.path,
+                       'rows': position}, handle)
+
+    def flush_course(self, batch):
+        self.insert(Course, batch)
+        self.courses.update(self.lookup(Course, 'name', batch))
+        self.log_created(batch, lambda course: self.courses[course.name])
+
+    def flush_lecturer(self, batch):
+        self.insert(Lecturer, batch)
+        self.lecturers.update(self.lookup(Lecturer, 'email', batch))
+        self.log_created(batch,
+                         lambda lecturer: self.lecturers[lecturer.email])
+
+    def flush_subject(self, batch):
+        self.insert(Subject, batch)
+        # Bulk inserts send no post_save, so keep the counters here.
+        adjust_counts(Lecturer, 'subject_count',
+                      Counter(subject.lecturer_id for subject in batch))
+        if any(subject.pk is None for subject in batch):
+            rows = Subject.objects.filter(
+                course_id__in={subject.course_id for subject in batch},
+                name__in={subject.name for subject in batch},
+            ).values_list('course_id', 'name', 'id')
+            self.subjects.update({(course_id, name): pk
+                                  for course_id, name, pk in rows})
+        else:
+            self.subjects.update({(subject.course_id, subject.name): subject.pk
+                                  for subject in batch})
+        self.log_created(batch, lambda subject: self.subjects[
+            (subject.course_id, subject.name)])
+        response_cache.invalidate(
+            'course', {subject.course_id for subject in batch})
+
+    def flush_student(self, batch):
+        students = [student for student, _ in batch]
+        self.insert(Student, students)
+        adjust_counts(Course, 'student_count',
+                      Counter(student.course_id for student in students))
+        ids = self.lookup(Student, 'email', students)
+        for student in students:
+            self.students[student.email] = (ids[student.email],
+                                            student.course_id)
+        self.log_created(students, lambda student: ids[student.email])
+        response_cache.invalidate(
+            'course', {student.course_id for student in students})
+        self.enroll([(ids[student.email], subject_id)
+                     for student, subject_ids in batch
+                     for subject_id in subject_ids])
+
+    def flush_enrollment(self, batch):
+        self.enroll([pair for pairs in batch for pair in pairs])
+
+    def enroll(self, pairs):
+        """Insert the new (student_id, subject_id) pairs in bulk."""
+        pairs = set(pairs)
+        if not pairs:
+            return
+        existing = set(Enrollment.objects.filter(
+            student_id__in={student for student, _ in pairs},
+        ).values_list('student_id', 'subject_id'))
+        added = sorted(pairs - existing)
+        self.insert(Enrollment, [Enrollment(student_id=student_id,
+                                            subject_id=subject_id)
+                                 for student_id, subject_id in added],
+                    count='enrolled')
+        if added:
+            enrollment_changed.send(sender=Student, added=added, removed=[])
+
+    def log_created(self, objs, pk):
+        """Add bulk-inserted ``objs`` to the change feed; ``pk(obj)`` gives
+        the id, which COPY does not set."""
+        for obj in objs:
+            obj.pk = pk(obj)
+        record_saved(objs, created=True)
+
+    # Low-level inserts
+
+    def insert(self, model, objs, count='created'):
+        if not objs:
+            return
+        if self.use_copy:
+            self.copy(model, objs)
+        else:
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.stats[count] += len(objs)
+
+    def lookup(self, model, key, objs):
+        """Map natural key to pk for ``objs`` (COPY does not return pks)."""
+        if all(obj.pk is not None for obj in objs):
+            return {getattr(obj, key): obj.pk for obj in objs}
+        return dict(model.objects.filter(
+            **{f'{key}__in': [getattr(obj, key) for obj in objs]},
+        ).values_list(key, 'id'))
+
+    def copy(self, model, objs):
+        """Stream ``objs`` into ``model``'s table with PostgreSQL COPY."""
+        fields = [field for field in model._meta.concrete_fields
+                  if not field.primary_key]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for obj in objs:
+            writer.writerow([
+                field.get_db_prep_save(field.pre_save(obj, True), connection)
+                for field in fields
+            ])
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        sql = (f'COPY {quote(model._meta.db_table)} '
+               f'({", ".join(quote(field.column) for field in fields)}) '
+               f'FROM STDIN WITH (FORMAT csv)')
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    # Covers logout, token rotation and users deleted with their token.
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def drop_user_tokens(sender, instance, **kwargs):
+    # A cached entry holds a copy of the user, so any change (is_active,
+    # permissions, password) must force the next request back to the DB.
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        token_cache.delete(key)
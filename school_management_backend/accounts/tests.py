@@ -1,11 +1,36 @@
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import models
+from django.test import SimpleTestCase, TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
-from accounts.models import User
+from rest_framework.authtoken.models import Token
+from accounts.authentication import TokenCache, token_cache
+from accounts.hashing import (
+    HashingPool,
+    HashingPoolFull,
+    SharedSlots,
+    hashing_pool,
+)
+from academics.models import Course, Lecturer, Subject
+from academics.stats import rebuild
+from students.enrollment import Enrollment
+from students.models import Student
+from config.testing import QueryCountAssertionsMixin, make_user, use_token
 
 
 class LoginTests(APITestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(email="admin@example.com", password="admin12345")
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user(email="admin@example.com")
 
     def test_login_returns_token(self):
         res = self.client.post(
@@ -47,3 +72,342 @@ class LoginTests(APITestCase):
             format="json",
         )
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CachedTokenAuthenticationTests(QueryCountAssertionsMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def setUp(self):
+        token_cache.clear()
+        self.token = use_token(self.client, self.user)
+
+    def test_cache_hit_costs_no_queries(self):
+        cold = self.count_queries(self.client.get, "/api/courses/")
+        warm = self.count_queries(self.client.get, "/api/courses/")
+        self.assertEqual(cold - warm, 1)
+
+    def test_shared_entries_hold_no_password_hash(self):
+        caches["default"].clear()
+        with mock.patch.object(token_cache, "shared_cache", "default"):
+            self.client.get("/api/courses/")
+            entry = caches["default"].get(token_cache.key_prefix +
+                                          self.token.key)
+            self.assertNotIn(self.user.password, repr(entry))
+            token_cache.clear()
+            warm = self.count_queries(self.client.get, "/api/courses/")
+            res = self.client.get("/api/courses/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(warm, self.count_queries(self.client.get,
+                                                  "/api/courses/"))
+        user = res.wsgi_request.user
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.get_deferred_fields(), {"password"})
+        self.assertTrue(user.check_password("admin12345"))
+
+    def test_deactivating_user_invalidates_cache(self):
+        self.client.get("/api/courses/")
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get("/api/courses/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_is_rejected(self):
+        self.client.get("/api/courses/")
+        self.token.delete()
+        Token.objects.create(user=self.user)
+        res = self.client.get("/api/courses/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_token(self):
+        self.client.get("/api/courses/")
+        res = self.client.post("/api/logout/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        res = self.client.get("/api/courses/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_revocation_elsewhere_rejects_local_hits(self):
+        # Two workers sharing one cache, each with its own local tier.
+        here = TokenCache(shared_cache="default")
+        there = TokenCache(shared_cache="default")
+        version, cached = here.lookup("key")
+        self.assertIsNone(cached)
+        here.set("key", "entry", version)
+        self.assertEqual(here.lookup("key")[1], "entry")
+        there.delete("key")
+        self.assertIsNone(here.lookup("key")[1])
+
+    def test_entry_revoked_while_loading_is_not_cached(self):
+        cache = TokenCache(shared_cache="default")
+        version, _ = cache.lookup("key")
+        cache.delete("key")
+        cache.set("key", "stale", version)
+        self.assertIsNone(cache.lookup("key")[1])
+
+    def test_local_only_entries_expire_after_local_timeout(self):
+        cache = TokenCache(timeout=60, local_timeout=5)
+        self.assertEqual(cache.local_timeout, 5)
+        with mock.patch("accounts.authentication.time.monotonic",
+                        return_value=100.0):
+            cache.set("key", "entry")
+        with mock.patch("accounts.authentication.time.monotonic",
+                        return_value=106.0):
+            self.assertIsNone(cache.get("key"))
+
+
+class HashingPoolTests(SimpleTestCase):
+    def test_rejects_when_workers_and_queue_are_busy(self):
+        pool = HashingPool(workers=1, max_pending=0)
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(busy,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(HashingPoolFull):
+            pool.run(lambda: None)
+        release.set()
+        worker.join()
+        self.assertEqual(pool.run(lambda: 42), 42)
+
+    def test_zero_workers_runs_inline(self):
+        pool = HashingPool(workers=0, max_pending=0)
+        self.assertEqual(pool.run(threading.get_ident),
+                         threading.get_ident())
+
+    def test_shared_slots_limit_inline_workers_across_pools(self):
+        # Two single-request workers sharing one slot through the cache.
+        caches["default"].clear()
+        first = HashingPool(workers=0, max_pending=0,
+                            shared_slots=SharedSlots("default", limit=1))
+        second = HashingPool(workers=0, max_pending=0,
+                             shared_slots=SharedSlots("default", limit=1))
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=first.run, args=(busy,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(HashingPoolFull):
+            second.run(lambda: None)
+        release.set()
+        worker.join()
+        self.assertEqual(second.run(lambda: 42), 42)
+
+    def test_shared_slots_do_not_expire_while_in_use(self):
+        caches["default"].clear()
+        slots = SharedSlots("default", limit=2, timeout=60)
+        with mock.patch("time.time", return_value=1000.0):
+            self.assertTrue(slots.acquire())
+        with mock.patch("time.time", return_value=1050.0):
+            self.assertTrue(slots.acquire())
+        # Past the first acquire's expiry, both slots are still held.
+        with mock.patch("time.time", return_value=1070.0):
+            self.assertFalse(slots.acquire())
+            slots.release()
+        # The release refreshed the counter too: one slot is still held.
+        with mock.patch("time.time", return_value=1125.0):
+            self.assertTrue(slots.acquire())
+            self.assertFalse(slots.acquire())
+
+
+class PooledLoginTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user(email="admin@example.com")
+
+    def login(self):
+        return self.client.post(
+            "/api/login/",
+            {"email": "admin@example.com", "password": "admin12345"},
+            format="json",
+        )
+
+    def test_saturated_pool_returns_429(self):
+        with mock.patch.object(hashing_pool, "run",
+                               side_effect=HashingPoolFull):
+            res = self.login()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_successful_login_rehashes_with_preferred_hasher(self):
+        # The test settings hash with MD5 first.
+        self.assertTrue(self.user.password.startswith("md5$"))
+        with override_settings(PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+            *settings.PASSWORD_HASHERS,
+        ]):
+            res = self.login()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha1$"))
+        self.assertTrue(self.user.check_password("admin12345"))
+
+
+class ImportSchoolDataTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as handle:
+            handle.write(text)
+        return path
+
+    def run_import(self, *args, **options):
+        out = StringIO()
+        call_command("import_school_data", *args, stdout=out, stderr=StringIO(),
+                     **options)
+        return out.getvalue()
+
+    def load_catalogue(self):
+        self.run_import("course", self.write(
+            "courses.csv", "name,description\nCS,Computing\nEE,\n"))
+        self.run_import("lecturer", self.write(
+            "lecturers.jsonl",
+            '{"first_name": "Ada", "last_name": "L", "email": "ada@x.com"}\n'))
+        self.run_import("subject", self.write(
+            "subjects.csv",
+            "name,description,course,lecturer\n"
+            "Algorithms,,CS,ada@x.com\nDatabases,,CS,ada@x.com\n"
+            "Circuits,,EE,ada@x.com\n"))
+
+    def test_imports_each_kind_by_natural_key(self):
+        self.load_catalogue()
+        self.run_import("student", self.write(
+            "students.csv",
+            "first_name,last_name,email,date_of_birth,course,subjects\n"
+            "Sipho,D,sipho@x.com,2000-01-01,CS,Algorithms;Databases\n"
+            "Zanele,N,zanele@x.com,2001-02-03,EE,\n"))
+        self.run_import("enrollment", self.write(
+            "enrollments.jsonl",
+            '{"student": "zanele@x.com", "subject": "Circuits"}\n'))
+
+        self.assertEqual(Course.objects.count(), 2)
+        self.assertEqual(Lecturer.objects.count(), 1)
+        self.assertEqual(Subject.objects.filter(course__name="CS").count(), 2)
+        sipho = Student.objects.get(email="sipho@x.com")
+        self.assertEqual(sipho.course.name, "CS")
+        self.assertEqual(set(sipho.subjects.values_list("name", flat=True)),
+                         {"Algorithms", "Databases"})
+        self.assertEqual(list(Student.objects.get(email="zanele@x.com")
+                              .subjects.values_list("name", flat=True)),
+                         ["Circuits"])
+        # Bulk inserts keep the enrollment counters in step.
+        self.assertEqual(rebuild(), {"course_students": 0,
+                                     "subject_students": 0,
+                                     "lecturer_subjects": 0})
+        self.assertEqual(Lecturer.objects.get().subject_count, 3)
+
+    def test_rerun_skips_existing_rows(self):
+        self.load_catalogue()
+        output = self.run_import("course", self.write(
+            "again.csv", "name,description\nCS,Computing\nBA,Business\n"))
+        self.assertIn("1 created", output)
+        self.assertIn("1 already present", output)
+        self.assertEqual(Course.objects.count(), 3)
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        self.load_catalogue()
+        errors = os.path.join(self.tmp.name, "errors.jsonl")
+        output = self.run_import("student", self.write(
+            "students.csv",
+            "first_name,last_name,email,date_of_birth,course,subjects\n"
+            "A,B,not-an-email,2000-01-01,CS,\n"
+            "C,D,c@x.com,2000-13-01,CS,\n"
+            "E,F,e@x.com,2000-01-01,Law,\n"
+            "G,H,g@x.com,2000-01-01,EE,Algorithms\n"
+            "I,J,i@x.com,2000-01-01,CS,Algorithms\n"), errors=errors)
+
+        self.assertIn("4 bad", output)
+        self.assertEqual(list(Student.objects.values_list("email", flat=True)),
+                         ["i@x.com"])
+        with open(errors) as handle:
+            rejected = [json.loads(line) for line in handle]
+        self.assertEqual([row["row"] for row in rejected], [1, 2, 3, 4])
+        self.assertIn("email", rejected[0]["errors"])
+        self.assertIn("date_of_birth", rejected[1]["errors"])
+        self.assertIn("course", rejected[2]["errors"])
+        self.assertIn("subjects", rejected[3]["errors"])
+
+    def test_queries_scale_with_batches_not_rows(self):
+        self.load_catalogue()
+        rows = "".join(f"S,{n},s{n}@x.com,2000-01-01,CS,Algorithms\n"
+                       for n in range(200))
+        path = self.write(
+            "students.csv",
+            "first_name,last_name,email,date_of_birth,course,subjects\n" + rows)
+        with self.assertMaxQueries(30):
+            self.run_import("student", path, batch_size=100)
+        self.assertEqual(Subject.objects.get(name="Algorithms")
+                         .students.count(), 200)
+
+    def test_resume_skips_rows_in_checkpoint(self):
+        self.load_catalogue()
+        path = self.write("courses.csv",
+                          "name,description\nLaw,\nArt,\nMusic,\n")
+        checkpoint = self.write("progress.json", json.dumps(
+            {"kind": "course", "path": path, "rows": 2}))
+        self.run_import("course", path, checkpoint=checkpoint, resume=True)
+        self.assertTrue(Course.objects.filter(name="Music").exists())
+        self.assertFalse(Course.objects.filter(name="Law").exists())
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+class GenerateLoadDataTests(TestCase):
+    def generate(self, **options):
+        call_command("generate_load_data", stdout=StringIO(), **options)
+
+    def test_generates_skewed_enrollments_within_each_course(self):
+        self.generate(students=300, courses=4, subjects_per_course=5, seed=3)
+        self.assertEqual(Course.objects.count(), 4)
+        self.assertEqual(Subject.objects.count(), 20)
+        self.assertEqual(Student.objects.count(), 300)
+        # Course sizes are skewed towards the first courses.
+        sizes = [course.students.count()
+                 for course in Course.objects.order_by("id")]
+        self.assertGreater(sizes[0], sizes[-1])
+        # Nobody is enrolled outside their course.
+        self.assertTrue(Enrollment.objects.exists())
+        self.assertFalse(Enrollment.objects.exclude(
+            subject__course=models.F("student__course")).exists())
+
+    def test_replace_regenerates_and_leaves_other_rows_alone(self):
+        kept = Course.objects.create(name="Real course")
+        self.generate(students=50)
+        with self.assertRaises(CommandError):
+            self.generate(students=50)
+        self.generate(students=20, replace=True)
+        self.assertEqual(Student.objects.count(), 20)
+        self.generate(delete=True)
+        self.assertEqual(list(Course.objects.all()), [kept])
+        self.assertEqual(Lecturer.objects.count(), 0)
+
+    def test_delete_uncounts_what_it_removes(self):
+        self.generate(students=30)
+        lecturer = Lecturer.objects.create(
+            first_name="Real", last_name="L", email="real@example.com")
+        subject = Subject.objects.create(
+            name="Real subject", lecturer=lecturer,
+            course=Course.objects.create(name="Real course"))
+        subject.students.add(*Student.objects.all()[:3])
+        Subject.objects.create(name="Extra", lecturer=lecturer,
+                               course=Course.objects.first())
+        self.generate(delete=True)
+        self.assertEqual(rebuild(), {"course_students": 0,
+                                     "subject_students": 0,
+                                     "lecturer_subjects": 0})
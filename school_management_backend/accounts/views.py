@@ -1,11 +1,13 @@
 from django.contrib.auth import authenticate
 from rest_framework import status
+from rest_framework.exceptions import Throttled
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema
 
+from .hashing import HashingPoolFull
 from .serializers import LoginRequestSerializer, LoginResponseSerializer
 
 
@@ -26,10 +28,27 @@ class LoginView(APIView):
         email = serializer.validated_data["email"]
         password = serializer.validated_data["password"]
 
-        user = authenticate(request, username=email, password=password)
+        try:
+            user = authenticate(request, username=email, password=password)
+        except HashingPoolFull:
+            raise Throttled(wait=1, detail="Too many logins in progress. "
+                                           "Try again shortly.")
         if not user:
             return Response({"detail": "Invalid credentials."},
                             status=status.HTTP_401_UNAUTHORIZED)
 
         token, _ = Token.objects.get_or_create(user=user)
-        return Response({"token": token.key}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({"token": token.key}, status=status.HTTP_200_OK)
+
+
+class LogoutView(APIView):
+    @extend_schema(
+        request=None,
+        responses={204: None},
+        tags=["auth"],
+        summary="Logout and revoke the current token",
+    )
+    def post(self, request):
+        # Deleting the token also evicts it from the auth cache.
+        request.auth.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
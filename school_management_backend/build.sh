@@ -4,6 +4,7 @@ set -o errexit
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
+python manage.py build_schema
 python manage.py migrate
 python manage.py create_admin
 python manage.py seed_data
@@ -0,0 +1,95 @@
+import logging
+
+from django.db import transaction
+
+from .models import Change, ChangeFeed
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot(obj):
+    """Editable field values of ``obj``, with foreign keys as ids."""
+    return {field.name: field.value_from_object(obj)
+            for field in obj._meta.concrete_fields
+            if field.editable or field.primary_key}
+
+
+def record(changes):
+    """Append unsaved Change rows and publish them once committed.
+
+    One publish covers every change in the transaction, so the hook is
+    registered only once per transaction, however many writes it records.
+    """
+    if not changes:
+        return
+    Change.objects.bulk_create(changes, batch_size=BATCH_SIZE)
+    # A hook registered in this atomic block or one nested in it that is
+    # still pending runs with this commit; rolled-back savepoints drop
+    # theirs from run_on_commit.
+    connection = transaction.get_connection()
+    current = set(connection.savepoint_ids)
+    if not any(func is publish_committed and current <= sids
+               for sids, func, *_ in connection.run_on_commit):
+        transaction.on_commit(publish_committed)
+
+
+def publish_committed():
+    """publish() for on_commit. The write has committed by then, so a
+    failure is logged rather than raised to the writer; the next publish
+    or the ``publish_changes`` sweep numbers the rows it left behind."""
+    try:
+        publish()
+    except Exception:
+        logger.exception("Publishing committed changes failed")
+
+
+def record_saved(objs, created):
+    record([Change(model=obj._meta.model_name, object_id=obj.pk,
+                   action="create" if created else "update",
+                   data=snapshot(obj)) for obj in objs])
+
+
+def record_deleted(model, pks):
+    record([Change(model=model._meta.model_name, object_id=pk,
+                   action="delete") for pk in pks])
+
+
+def record_enrollments(added, removed):
+    record([Change(model="enrollment", action=action,
+                   data={"student": student, "subject": subject})
+            for action, pairs in (("create", added), ("delete", removed))
+            for student, subject in pairs])
+
+
+def publish():
+    """Number committed, unpublished changes after the last sequence, and
+    return the last sequence number.
+
+    Runs after every transaction that records changes, and from the
+    ``publish_changes`` command for rows left unnumbered when a process
+    stopped between its commit and this call. Readers never call it.
+    Holding the ChangeFeed row lock serializes publishers, and only
+    committed rows are visible, so sequence order is commit order.
+    """
+    while True:
+        with transaction.atomic():
+            feed, _ = ChangeFeed.objects.select_for_update(). \
+                get_or_create(pk=1)
+            pending = list(Change.objects.filter(seq=None).order_by("id")
+                           .only("id")[:BATCH_SIZE])
+            for seq, change in enumerate(pending, feed.last_seq + 1):
+                change.seq = seq
+            Change.objects.bulk_update(pending, ["seq"])
+            if pending:
+                feed.last_seq = pending[-1].seq
+                feed.save(update_fields=["last_seq"])
+        if len(pending) < BATCH_SIZE:
+            return feed.last_seq
+
+
+def published_seq():
+    """The last sequence number published, read without locking."""
+    return ChangeFeed.objects.filter(pk=1). \
+        values_list("last_seq", flat=True).first() or 0
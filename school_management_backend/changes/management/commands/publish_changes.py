@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from changes.feed import publish
+
+
+class Command(BaseCommand):
+    help = ('Number change-log rows committed but left unpublished, e.g. by '
+            'a worker that stopped between its commit and publishing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep sweeping every this many seconds '
+                                 'instead of running once')
+
+    def handle(self, *args, **options):
+        while True:
+            last_seq = publish()
+            self.stdout.write(f'Published up to seq {last_seq}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
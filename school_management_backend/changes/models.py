@@ -0,0 +1,50 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+
+
+class LoggedModel(models.Model):
+    """Base for models whose writes go to the change feed.
+
+    ``save()`` runs in a transaction so the change row written by the
+    post_save receiver commits or rolls back with the row itself; Django
+    sends post_save after its own transaction. Deletes already send
+    post_delete inside theirs.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class Change(models.Model):
+    """One row-level change, appended in the writing transaction.
+
+    ``seq`` is assigned by ``changes.feed.publish`` after commit, in commit
+    order, so a reader that has seen ``seq`` N never later finds a change
+    below N.
+    """
+    ACTIONS = [("create", "create"), ("update", "update"),
+               ("delete", "delete")]
+
+    seq = models.BigIntegerField(null=True, unique=True)
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField(null=True)
+    action = models.CharField(max_length=6, choices=ACTIONS)
+    # Field values after a create or update; the (student, subject) pair
+    # for enrollments; null for deletes.
+    data = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.seq} {self.action} {self.model} {self.object_id}"
+
+
+class ChangeFeed(models.Model):
+    """Single row holding the last published sequence number; locking it
+    serializes publishers."""
+    last_seq = models.BigIntegerField(default=0)
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from .models import Change
+
+MODELS = ["course", "lecturer", "subject", "student", "enrollment"]
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="object_id", allow_null=True)
+    at = serializers.DateTimeField(source="created_at")
+
+    class Meta:
+        model = Change
+        fields = ["seq", "model", "id", "action", "data", "at"]
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    results = ChangeSerializer(many=True)
+    last_seq = serializers.IntegerField()
+    more = serializers.BooleanField()
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=5000,
+                                     default=500)
+    models = serializers.CharField(required=False)
+
+    def validate_models(self, value):
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in MODELS]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown models {', '.join(unknown)}; choose from "
+                f"{', '.join(MODELS)}.")
+        return names
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academics.models import Course, Lecturer, Subject
+from students.enrollment import enrollment_changed
+from students.models import Student
+from .feed import record_deleted, record_enrollments, record_saved
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lecturer)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Student)
+def log_saved(sender, instance, created, **kwargs):
+    record_saved([instance], created)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lecturer)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Student)
+def log_deleted(sender, instance, **kwargs):
+    record_deleted(sender, [instance.pk])
+
+
+@receiver(enrollment_changed)
+def log_enrollments(sender, added, removed, **kwargs):
+    record_enrollments(added, removed)
@@ -0,0 +1,183 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from config.testing import AuthenticatedAPITestCase
+from academics.models import Course, Lecturer, Subject
+from students.models import Student
+from .feed import publish, publish_committed
+from .models import Change
+
+
+class ChangeFeedTests(AuthenticatedAPITestCase):
+    """Row-level change log and the /api/changes/ feed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Feeds", description="")
+        cls.lecturer = Lecturer.objects.create(
+            first_name="Out", last_name="Box", email="outbox@example.com")
+        cls.subject = Subject.objects.create(
+            name="Logs", course=cls.course, lecturer=cls.lecturer)
+        cls.since = publish()
+
+    def feed(self, query=""):
+        publish()  # as the writers' on_commit hooks would
+        res = self.client.get(f"/api/changes/?since={self.since}{query}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def summary(self, data):
+        return [(change["model"], change["action"], change["id"])
+                for change in data["results"]]
+
+    def test_api_writes_are_logged_in_order(self):
+        res = self.client.post("/api/students/", {
+            "first_name": "Ann", "last_name": "Log",
+            "email": "ann@example.com", "date_of_birth": "2001-02-03",
+            "course": self.course.id, "subjects": [self.subject.id],
+        }, format="json")
+        student_id = res.data["id"]
+        self.client.patch(f"/api/courses/{self.course.id}/",
+                          {"description": "Changed"}, format="json")
+        self.client.delete(f"/api/students/{student_id}/")
+
+        data = self.feed()
+        self.assertEqual(self.summary(data), [
+            ("student", "create", student_id),
+            ("enrollment", "create", None),
+            ("course", "update", self.course.id),
+            ("enrollment", "delete", None),
+            ("student", "delete", student_id),
+        ])
+        created = data["results"][0]["data"]
+        self.assertEqual(created["email"], "ann@example.com")
+        self.assertEqual(created["date_of_birth"], "2001-02-03")
+        self.assertEqual(created["course"], self.course.id)
+        self.assertEqual(data["results"][1]["data"],
+                         {"student": student_id, "subject": self.subject.id})
+        self.assertEqual(data["results"][2]["data"]["description"],
+                         "Changed")
+        self.assertIsNone(data["results"][4]["data"])
+        seqs = [change["seq"] for change in data["results"]]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(data["last_seq"], seqs[-1])
+        self.assertFalse(data["more"])
+
+    def test_related_manager_and_cascades(self):
+        student = Student.objects.create(
+            first_name="Bo", last_name="M", email="bo@example.com",
+            date_of_birth="2000-01-01", course=self.course)
+        self.since = publish()
+        subject_id = self.subject.id
+        student.subjects.add(self.subject)
+        self.subject.students.clear()
+        student.subjects.add(self.subject)
+        self.subject.delete()
+        self.assertEqual(self.summary(self.feed()), [
+            ("enrollment", "create", None),
+            ("enrollment", "delete", None),
+            ("enrollment", "create", None),
+            ("enrollment", "delete", None),
+            ("subject", "delete", subject_id),
+        ])
+
+    def test_removing_a_non_member_records_nothing(self):
+        student = Student.objects.create(
+            first_name="Cy", last_name="N", email="cy@example.com",
+            date_of_birth="2000-01-01", course=self.course)
+        self.since = publish()
+        student.subjects.remove(self.subject)
+        self.subject.students.remove(student)
+        self.assertEqual(self.feed()["results"], [])
+
+    def test_one_publish_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                student = Student.objects.create(
+                    first_name="Di", last_name="O", email="di@example.com",
+                    date_of_birth="2000-01-01", course=self.course)
+                student.subjects.add(self.subject)
+                self.course.description = "Busy"
+                self.course.save()
+        self.assertEqual(callbacks.count(publish_committed), 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        Course.objects.create(name="Undone")
+                        raise RuntimeError
+                Course.objects.create(name="Kept")
+        self.assertEqual(callbacks.count(publish_committed), 1)
+
+    def test_rolled_back_writes_leave_no_changes(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Course.objects.create(name="Ghost")
+                raise RuntimeError
+        self.assertEqual(self.feed()["results"], [])
+
+    def test_batches_and_filters(self):
+        for n in range(5):
+            Course.objects.create(name=f"Course {n}")
+        data = self.feed("&limit=2")
+        self.assertEqual(len(data["results"]), 2)
+        self.assertTrue(data["more"])
+        self.since = data["last_seq"]
+        data = self.feed("&limit=3")
+        self.assertEqual([c["data"]["name"] for c in data["results"]],
+                         ["Course 2", "Course 3", "Course 4"])
+        self.assertFalse(data["more"])
+
+        # A filtered batch with nothing to report still moves forward.
+        Lecturer.objects.create(first_name="N", last_name="L",
+                                email="nl@example.com")
+        self.since = data["last_seq"]
+        data = self.feed("&models=student,enrollment")
+        self.assertEqual(data["results"], [])
+        self.assertGreater(data["last_seq"], self.since)
+
+    def test_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(name="Committed")
+        self.assertFalse(Change.objects.filter(seq=None).exists())
+
+    def test_reading_does_not_publish(self):
+        Course.objects.create(name="Unpublished")
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(f"/api/changes/?since={self.since}")
+        self.assertEqual([q["sql"] for q in ctx.captured_queries
+                          if not q["sql"].startswith("SELECT")
+                          or "FOR UPDATE" in q["sql"]], [])
+        self.assertEqual(res.data["results"], [])
+        self.assertEqual(res.data["last_seq"], self.since)
+        self.assertTrue(Change.objects.filter(seq=None).exists())
+
+        out = StringIO()
+        call_command("publish_changes", stdout=out)
+        self.assertFalse(Change.objects.filter(seq=None).exists())
+        self.assertEqual(out.getvalue().strip(),
+                         f"Published up to seq {self.since + 1}")
+
+    def test_publish_failures_are_logged(self):
+        with mock.patch("changes.feed.publish",
+                        side_effect=RuntimeError("boom")):
+            with self.assertLogs("changes.feed", "ERROR") as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    Course.objects.create(name="Failed")
+        self.assertIn("boom", logs.output[0])
+        self.assertTrue(Change.objects.filter(seq=None).exists())
+
+    def test_invalid_parameters(self):
+        for query in ("since=-1", "since=abc", "limit=0", "models=users"):
+            res = self.client.get(f"/api/changes/?{query}")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST,
+                             query)
+        self.client.credentials()
+        res = self.client.get("/api/changes/")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -2,5 +2,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Persistent connections leak under ASGI; settings picks the pool instead.
+os.environ.setdefault("SERVER_INTERFACE", "asgi")
 
 application = get_asgi_application()
@@ -0,0 +1,179 @@
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.urls import path
+from django.utils.cache import get_conditional_response
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from academics.response_cache import CachedRetrieveMixin, response_cache
+from .conditional import ConditionalGetMixin
+from .projection import ProjectedListMixin
+from .replicas import use_primary
+
+
+class AuthenticationResult(BaseAuthentication):
+    """Replays an outcome reached by ``authenticate`` below.
+
+    Installed as the request's only authenticator, it lets DRF's own
+    lazy ``request.user`` path record the user, token and successful
+    authenticator without anything here touching Request internals.
+    """
+
+    def __init__(self, result):
+        self.result = result
+
+    def authenticate(self, request):
+        return self.result
+
+
+async def authenticate(request):
+    """Async counterpart of DRF's ``Request._authenticate``.
+
+    Authenticators with an ``aauthenticate`` coroutine are awaited; any
+    others run in a worker thread.
+    """
+    result = None
+    try:
+        for authenticator in request.authenticators:
+            method = getattr(authenticator, "aauthenticate", None) or \
+                sync_to_async(authenticator.authenticate)
+            result = await method(request)
+            if result is not None:
+                break
+    finally:
+        # request.user resolves lazily through the recorded outcome, so a
+        # failed attempt leaves the request anonymous, as in DRF.
+        request.authenticators = (AuthenticationResult(result),)
+
+
+async def conditional(view, request, state, handler):
+    """ConditionalGetMixin.conditional_response for async handlers."""
+    if state is None:
+        return await handler()
+    etag = view.validator(request, state, request.accepted_renderer.format)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = await handler()
+    response["ETag"] = etag
+    return response
+
+
+async def list_response(view, request):
+    projection = view.list_projection() \
+        if isinstance(view, ProjectedListMixin) else None
+    if projection is None:
+        queryset = view.filter_queryset(view.get_queryset())
+    else:
+        queryset = view.projected_queryset(projection)
+
+    async def data(rows):
+        if projection is None:
+            return view.get_serializer(rows, many=True).data
+        return await projection.arows(rows)
+
+    paginator = view.paginator
+    if paginator is not None and getattr(
+            paginator, "requested", lambda request: True)(request):
+        # Keyset pagination builds its own slices; let it run in a thread.
+        page = await sync_to_async(view.paginate_queryset)(queryset)
+        if page is not None:
+            return view.get_paginated_response(await data(page))
+    return Response(await data([row async for row in queryset]))
+
+
+async def retrieve_response(view, request):
+    pk = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+    cached = isinstance(view, CachedRetrieveMixin)
+    variant = request.query_params.urlencode()
+    if cached:
+        pk = view.cache_pk()
+        if pk is None:
+            raise Http404
+        version = await response_cache.aversion(view.cache_kind, pk)
+        data = await response_cache.aget(view.cache_kind, pk, variant,
+                                         version)
+        if data is not None:
+            return Response(data)
+    queryset = view.filter_queryset(view.get_queryset())
+    # Cache fills read the primary, as in CachedRetrieveMixin.retrieve.
+    try:
+        with use_primary() if cached else nullcontext():
+            obj = await queryset.aget(**{view.lookup_field: pk})
+    except (queryset.model.DoesNotExist, TypeError, ValueError,
+            ValidationError):
+        raise Http404
+    view.check_object_permissions(request, obj)
+    data = view.get_serializer(obj).data
+    if cached:
+        await response_cache.aset(view.cache_kind, pk, variant, data,
+                                  version)
+    return Response(data)
+
+
+async def handle(view, request, action):
+    conditional_get = isinstance(view, ConditionalGetMixin)
+    if action == "list":
+        state = await view.alist_state() if conditional_get else None
+        return await conditional(view, request, state,
+                                 lambda: list_response(view, request))
+    state = await view.adetail_state() if conditional_get else None
+    return await conditional(view, request, state,
+                             lambda: retrieve_response(view, request))
+
+
+def async_read_view(viewset, action):
+    """An ASGI-native view serving ``viewset``'s list or retrieve action.
+
+    The viewset supplies queryset, filters, serializer, pagination,
+    permissions and conditional GET exactly as on its sync routes; rows are
+    fetched with the async ORM (``async for``/``aget``) and serialized from
+    the prefetched objects, or projected for ProjectedListMixin lists,
+    without leaving the event loop. Only JSON is rendered, since the
+    browsable API renderer queries the database.
+    """
+    renderer_classes = [renderer for renderer in viewset.renderer_classes
+                        if not issubclass(renderer, BrowsableAPIRenderer)]
+
+    async def view(request, *args, **kwargs):
+        self = viewset(action=action, detail=action == "retrieve",
+                       renderer_classes=renderer_classes)
+        self.action_map = {"get": action}
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = {**self.default_response_headers,
+                        "Allow": "GET, HEAD"}
+        try:
+            if request.method not in ("GET", "HEAD"):
+                raise exceptions.MethodNotAllowed(request.method)
+            await authenticate(request)
+            if hasattr(self, "ainitial"):
+                await self.ainitial(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+            response = await handle(self, request, action)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response,
+                                               *args, **kwargs)
+        if isinstance(self.response, Response):
+            self.response.render()
+        return self.response
+
+    view.csrf_exempt = True
+    return view
+
+
+def async_read_urls(prefix, viewset, basename):
+    """``<prefix>/`` and ``<prefix>/<pk>/`` routes for ``async_read_view``."""
+    return [
+        path(f"{prefix}/", async_read_view(viewset, "list"),
+             name=f"async-{basename}-list"),
+        path(f"{prefix}/<int:pk>/", async_read_view(viewset, "retrieve"),
+             name=f"async-{basename}-detail"),
+    ]
@@ -0,0 +1,146 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def related_aggregate(model, path, aggregate):
+    """Scalar subquery computing ``aggregate`` over ``model`` rows whose
+    ``path`` points at the outer row."""
+    rows = model.objects.filter(**{path: OuterRef("pk")}).order_by(). \
+        values(path).annotate(value=aggregate).values("value")
+    return Subquery(rows)
+
+
+class ConditionalGetMixin:
+    """Answer list/retrieve with 304 Not Modified without rendering a body.
+
+    Validators come from one query over ``updated_at``. For a paginated
+    list it reads the ids and timestamps of the requested page only, so no
+    request counts the whole table. An unpaginated list is one aggregate
+    over the filtered queryset. For detail views it covers the object plus
+    every nested relation named in ``conditional_related``, a mapping of
+    label to ``(model, lookup back to this object)``. Row counts are
+    included so deletions change the ETag too. Lists add the aggregates
+    from ``list_state_aggregates``; a paginated list reads them over the
+    page's rows in a second query.
+
+    Only an ETag is sent, no ``Last-Modified``: removing a row from a list
+    or a nested relation moves no timestamp, so ``If-Modified-Since``
+    alone would answer 304 with a stale body. The counts in the ETag
+    catch those changes.
+    """
+    conditional_related = {}
+
+    def list_state_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        return queryset.prefetch_related(None)
+
+    def list_paginated(self):
+        paginator = self.paginator
+        return paginator is not None and getattr(
+            paginator, "requested", lambda request: True)(self.request)
+
+    def page_state(self, queryset):
+        """Ids and timestamps of the rows on the requested page."""
+        # A fresh paginator: paginate_queryset() keeps per-page state.
+        paginator = self.pagination_class()
+        get_ordering = getattr(paginator, "get_ordering", None)
+        ordering = get_ordering(self.request, queryset, self) \
+            if get_ordering else ()
+        columns = dict.fromkeys(
+            ["pk", "updated_at", *(name.lstrip("-") for name in ordering)])
+        page = paginator.paginate_queryset(
+            queryset.select_related(None).values(*columns), self.request,
+            self)
+        rows = tuple((row["pk"], row["updated_at"]) for row in page)
+        return {"rows": rows,
+                "last": max((row[1] for row in rows), default=None)}
+
+    def list_state_aggregates(self):
+        """Extra aggregates over the listed rows for the list state, e.g.
+        timestamps of the related rows a list nests."""
+        return {}
+
+    def page_rows(self, queryset, state):
+        """The rows of a page read by ``page_state``, unordered."""
+        return queryset.order_by().filter(
+            pk__in=[pk for pk, _ in state["rows"]])
+
+    def list_state(self):
+        queryset = self.list_state_queryset()
+        aggregates = self.list_state_aggregates()
+        if self.list_paginated():
+            state = self.page_state(queryset)
+            if aggregates:
+                state.update(self.page_rows(queryset, state).aggregate(
+                    **aggregates))
+            return state
+        # Joined relations repeat rows; count each listed row once.
+        return queryset.aggregate(count=Count("pk", distinct=bool(aggregates)),
+                                  last=Max("updated_at"), **aggregates)
+
+    async def alist_state(self):
+        queryset = self.list_state_queryset()
+        aggregates = self.list_state_aggregates()
+        if self.list_paginated():
+            state = await sync_to_async(self.page_state)(queryset)
+            if aggregates:
+                state.update(await self.page_rows(queryset, state).
+                             aaggregate(**aggregates))
+            return state
+        return await queryset.aaggregate(
+            count=Count("pk", distinct=bool(aggregates)),
+            last=Max("updated_at"), **aggregates)
+
+    def detail_state_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        annotations = {}
+        for name, (model, path) in self.conditional_related.items():
+            annotations[f"{name}_count"] = related_aggregate(
+                model, path, Count("pk"))
+            annotations[f"{name}_last"] = related_aggregate(
+                model, path, Max("updated_at"))
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            queryset = queryset.prefetch_related(None).order_by().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            # As in get_object_or_404: retrieve answers 404 for these.
+            return None
+        return queryset.values("updated_at").annotate(**annotations)
+
+    def detail_state(self):
+        queryset = self.detail_state_queryset()
+        return queryset.first() if queryset is not None else None
+
+    async def adetail_state(self):
+        queryset = self.detail_state_queryset()
+        return await queryset.afirst() if queryset is not None else None
+
+    def validator(self, request, state, fmt):
+        """The ETag for ``state`` rendered as ``fmt``."""
+        fingerprint = repr((sorted(state.items()), request.get_full_path(),
+                            fmt))
+        return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+    def conditional_response(self, request, state, handler, *args, **kwargs):
+        if state is None:
+            return handler(request, *args, **kwargs)
+        etag = self.validator(request, state, request.accepted_renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.list_state(), super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.detail_state(), super().retrieve, *args, **kwargs)
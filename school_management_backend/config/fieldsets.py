@@ -0,0 +1,184 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Max, Prefetch
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers
+
+
+def split_param(value):
+    """``"id, course.name"`` -> ``["id", "course.name"]``; None if absent."""
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def parse_fieldset(values):
+    """Split dotted names into top-level names and per-name remainders."""
+    names, nested = [], {}
+    for value in values:
+        name, _, rest = value.partition(".")
+        if name not in names:
+            names.append(name)
+        if rest:
+            nested.setdefault(name, []).append(rest)
+    return names, nested
+
+
+class DynamicFieldsMixin:
+    """ModelSerializer mixin taking ``fields`` and ``expand`` arguments.
+
+    ``fields`` keeps only the named fields. ``expand`` replaces the
+    primary keys of relations listed in ``Meta.expandable_fields`` (name ->
+    ``(serializer class, kwargs)``) with the nested serializer. Both accept
+    dotted names, passed on to the nested serializer: ``subjects.name``.
+    Without ``expand``, the relations named in ``Meta.default_expand`` are
+    nested; with it, only the listed ones are, at every level.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.requested_fields = fields
+        self.requested_expand = expand
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        only, nested_fields = (None, {}) if self.requested_fields is None \
+            else parse_fieldset(self.requested_fields)
+        if self.requested_expand is None:
+            expand = {name: None
+                      for name in getattr(self.Meta, "default_expand", ())}
+        else:
+            names, nested = parse_fieldset(self.requested_expand)
+            unknown = [name for name in names if name not in expandable]
+            if unknown:
+                raise serializers.ValidationError({"expand": [
+                    f"Cannot expand {', '.join(unknown)}; choose from "
+                    f"{', '.join(expandable) or 'nothing'}."]})
+            expand = {name: nested.get(name, []) for name in names}
+
+        if only is not None:
+            unknown = [name for name in only if name not in fields]
+            if unknown:
+                raise serializers.ValidationError({"fields": [
+                    f"Unknown fields {', '.join(unknown)}."]})
+            fields = {name: field for name, field in fields.items()
+                      if name in only}
+            unexpanded = [name for name in nested_fields if name not in expand]
+            if unexpanded:
+                raise serializers.ValidationError({"fields": [
+                    "Cannot select fields of unexpanded relations "
+                    f"{', '.join(unexpanded)}."]})
+        for name, nested_expand in expand.items():
+            if name not in fields:
+                continue
+            serializer_class, kwargs = expandable[name]
+            fields[name] = serializer_class(
+                read_only=True, fields=nested_fields.get(name),
+                expand=nested_expand, **kwargs)
+        return fields
+
+
+def related_lookups(serializer):
+    """``(select_related, prefetch_related)`` that ``serializer`` renders.
+
+    Walks the serializer's fields, so relations pruned by ``fields`` or left
+    unexpanded are not loaded. ``Meta.related_lookups`` names extra lookups
+    for method fields.
+    """
+    model = serializer.Meta.model
+    select, prefetch = [], []
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.SerializerMethodField):
+            prefetch += getattr(serializer.Meta, "related_lookups",
+                                {}).get(name, [])
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+        nested = getattr(field, "child", field)
+        if not isinstance(nested, serializers.BaseSerializer):
+            # Primary keys of a to-one relation come from its column; pk
+            # lists are ordered so they match the projected list path.
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.append(Prefetch(
+                    field.source, queryset=model_field.related_model.
+                    _default_manager.order_by("pk")))
+            continue
+        nested_select, nested_prefetch = related_lookups(nested)
+        if model_field.many_to_many or model_field.one_to_many:
+            queryset = model_field.related_model._default_manager. \
+                prefetch_related(*nested_prefetch)
+            if nested_select:
+                queryset = queryset.select_related(*nested_select)
+            prefetch.append(Prefetch(field.source, queryset=queryset))
+            continue
+        select.append(field.source)
+        select += [f"{field.source}__{lookup}" for lookup in nested_select]
+        for lookup in nested_prefetch:
+            if isinstance(lookup, Prefetch):
+                lookup.add_prefix(field.source)
+                prefetch.append(lookup)
+            else:
+                prefetch.append(f"{field.source}__{lookup}")
+    return select, prefetch
+
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter("fields", str, description=(
+        "Comma-separated fields to return; dotted names select fields of "
+        "expanded relations (subjects.name)")),
+    OpenApiParameter("expand", str, description=(
+        "Comma-separated relations to nest instead of returning their ids")),
+]
+
+
+class SparseFieldsetMixin:
+    """``?fields=`` and ``?expand=`` for list and retrieve.
+
+    The serializer prunes and expands its output, and the queryset's
+    ``select_related``/``prefetch_related`` are derived from what it will
+    render, so pruned relations are not queried.
+    """
+    fieldset_actions = ("list", "retrieve")
+
+    def fieldset_kwargs(self):
+        if self.action not in self.fieldset_actions:
+            return {}
+        params = getattr(self.request, "query_params", {})
+        return {"fields": split_param(params.get("fields")),
+                "expand": split_param(params.get("expand"))}
+
+    def list_state_aggregates(self):
+        # Conditional GETs must see changes to the rows nested by expand.
+        aggregates = super().list_state_aggregates()
+        for name in self.fieldset_kwargs().get("expand") or ():
+            lookup = name.replace(".", "__")
+            aggregates[f"{lookup}_last"] = Max(f"{lookup}__updated_at")
+        return aggregates
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(
+            *args, **{**self.fieldset_kwargs(), **kwargs})
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.fieldset_actions:
+            return queryset
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context(), **self.fieldset_kwargs())
+        select, prefetch = related_lookups(serializer)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:  # select_related() with no names follows every relation
+            queryset = queryset.select_related(*select)
+        return queryset.prefetch_related(*prefetch)
+
+    @extend_schema(parameters=FIELDSET_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(parameters=FIELDSET_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,176 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_QUERY_MS": 100,
+    "MAX_QUERIES": 50,
+    "DUPLICATE_QUERIES": 5,
+}
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+_current = ContextVar("request_timing", default=None)
+
+
+def fingerprint(sql):
+    """SQL with IN lists collapsed, so N+1 lookups group together."""
+    return IN_LIST.sub("IN (...)", sql)
+
+
+class RequestTiming:
+    """Timings and queries collected for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.render_ms = 0.0
+        self.render_started = None
+        self.serializing = 0
+        self.queries = []  # (fingerprint, ms)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.db_ms += elapsed
+            self.queries.append((fingerprint(sql), elapsed))
+
+    def end_render(self, response):
+        if self.render_started is not None:
+            self.render_ms += (time.perf_counter() - self.render_started) \
+                * 1000
+        return response
+
+
+def timed_data(data):
+    """Wrap BaseSerializer.data so top-level serialization is timed."""
+
+    def wrapper(serializer):
+        timing = _current.get()
+        if timing is None or timing.serializing:
+            return data.fget(serializer)
+        timing.serializing += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            timing.serializing -= 1
+            timing.serialize_ms += (time.perf_counter() - started) * 1000
+
+    wrapper.timed = True
+    return property(wrapper)
+
+
+def install_serializer_timing():
+    if not getattr(BaseSerializer.data.fget, "timed", False):
+        BaseSerializer.data = timed_data(BaseSerializer.data)
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    func = match.func
+    cls = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if cls is None:
+        return match.view_name or match._func_path
+    name = f"{cls.__module__}.{cls.__name__}"
+    action = (getattr(func, "actions", None) or {}).get(
+        request.method.lower())
+    return f"{name}.{action}" if action else name
+
+
+class RequestTimingMiddleware:
+    """Per-request DB, serializer and render timings.
+
+    Adds a ``Server-Timing`` header and logs one JSON line for requests
+    that are slow, run too many queries or repeat the same query (an N+1
+    pattern). Configured by ``REQUEST_TIMING``; when it is disabled the
+    middleware drops out of the chain at startup, so it costs nothing.
+    """
+
+    def __init__(self, get_response):
+        self.options = {**DEFAULTS, **getattr(settings, "REQUEST_TIMING", {})}
+        if not self.options["ENABLED"]:
+            raise MiddlewareNotUsed
+        install_serializer_timing()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - timing.started) * 1000
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={timing.db_ms:.1f};desc="{len(timing.queries)} queries"',
+            f"serialize;dur={timing.serialize_ms:.1f}",
+            f"render;dur={timing.render_ms:.1f}",
+            f"total;dur={total_ms:.1f}",
+        ])
+        self.report(request, response, timing, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        timing = _current.get()
+        if timing is not None:
+            timing.render_started = time.perf_counter()
+            response.add_post_render_callback(timing.end_render)
+        return response
+
+    def report(self, request, response, timing, total_ms):
+        options = self.options
+        counts = Counter(sql for sql, _ in timing.queries)
+        duplicates = [{"sql": sql, "count": count}
+                      for sql, count in counts.most_common()
+                      if count >= options["DUPLICATE_QUERIES"]]
+        slow_queries = [{"sql": sql, "ms": round(ms, 1)}
+                        for sql, ms in timing.queries
+                        if ms >= options["SLOW_QUERY_MS"]]
+        reasons = [reason for reason, hit in (
+            ("slow", total_ms >= options["SLOW_REQUEST_MS"]),
+            ("queries", len(timing.queries) > options["MAX_QUERIES"]),
+            ("duplicates", bool(duplicates)),
+            ("slow_queries", bool(slow_queries)),
+        ) if hit]
+        if not reasons:
+            return
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "reasons": reasons,
+            "method": request.method,
+            "path": request.path,
+            "view": view_name(request),
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "db_ms": round(timing.db_ms, 1),
+            "queries": len(timing.queries),
+            "serialize_ms": round(timing.serialize_ms, 1),
+            "render_ms": round(timing.render_ms, 1),
+            "duplicates": duplicates,
+            "slow_queries": slow_queries,
+        }))
@@ -0,0 +1,33 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination ordered by primary key.
+
+    Pages are fetched with ``WHERE id > <cursor> ORDER BY id LIMIT n``, so
+    there is no OFFSET scan and no COUNT(*) per page. ``?ordering=`` may
+    replace the order; ``id`` is then appended as a final tiebreaker so a
+    non-unique field still gives every row one place and the cursor
+    neither skips nor repeats rows. Pagination is opt-in: lists stay a
+    bare array unless the client sends ``?page_size=`` or follows a
+    ``cursor`` link, which keeps existing callers working.
+    """
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def requested(self, request):
+        params = request.query_params
+        return (self.cursor_query_param in params
+                or self.page_size_query_param in params)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(name.lstrip("-") in ("id", "pk") for name in ordering):
+            ordering += ("id",)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
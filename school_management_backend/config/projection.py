@@ -0,0 +1,256 @@
+import datetime
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# to_representation() methods that return DB values unchanged.
+IDENTITY = (serializers.CharField.to_representation,
+            serializers.IntegerField.to_representation,
+            serializers.BooleanField.to_representation)
+NOT_COLUMNS = (relations.RelatedField, relations.ManyRelatedField,
+               serializers.BaseSerializer, serializers.SerializerMethodField)
+
+
+class Unsupported(Exception):
+    """The serializer has a field the projection cannot reproduce."""
+
+
+def to_one_column(model, field, nested=False):
+    """The column holding a to-one relation's key: ``course_id``, or the
+    ``course`` lookup when reached through a join."""
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        raise Unsupported(field.field_name)
+    if not (model_field.many_to_one or model_field.one_to_one) \
+            or not model_field.concrete:
+        raise Unsupported(field.field_name)
+    return model_field.name if nested else model_field.attname
+
+
+def many_pairs(model, field):
+    """``(queryset, owner column, related column)`` for a pk-list field."""
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        raise Unsupported(field.field_name)
+    if model_field.many_to_many:
+        m2m = model_field if model_field.concrete else model_field.field
+        through = m2m.remote_field.through
+        owner, other = m2m.m2m_field_name(), m2m.m2m_reverse_field_name()
+        if not model_field.concrete:
+            owner, other = other, owner
+        owner = through._meta.get_field(owner).attname
+        other = through._meta.get_field(other).attname
+        return through._default_manager.all(), owner, other
+    if model_field.one_to_many:
+        related = model_field.related_model
+        return related._default_manager.all(), \
+            model_field.field.attname, related._meta.pk.attname
+    raise Unsupported(field.field_name)
+
+
+def converter(field):
+    """Callable mapping a non-None column value to the field's output, or
+    None when the value is output unchanged."""
+    if isinstance(field, NOT_COLUMNS) or field.source == "*" \
+            or "." in field.source:
+        raise Unsupported(field.field_name)
+    if type(field).to_representation in IDENTITY:
+        return None
+    if isinstance(field, serializers.DateField) and not isinstance(
+            field, serializers.DateTimeField):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if isinstance(output_format, str) and \
+                output_format.lower() == ISO_8601:
+            return datetime.date.isoformat
+    return field.to_representation
+
+
+class Projection:
+    """Maps ``.values()`` rows to what ``serializer`` would output.
+
+    Built once per serializer class and field selection. Plain columns
+    are copied (or converted with the field's own ``to_representation``);
+    primary-key relations come from their ``_id`` column, expanded to-one
+    relations from joined columns, and pk lists from one query on the
+    through table per page. Expanded lists, method fields and dotted
+    sources raise Unsupported.
+    """
+
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.pk = model._meta.pk.attname
+        self.columns = [self.pk]
+        self.many = []
+        self.scope = {}
+        source = "def project(row):\n    return %s\n" % \
+            self.expression(serializer, model)
+        exec(compile(source, f"<projection {type(serializer).__name__}>",
+                     "exec"), self.scope)
+        self.project = self.scope.pop("project")
+
+    def column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return f"row[{name!r}]"
+
+    def expression(self, serializer, model, prefix=""):
+        """Source of a dict literal building ``serializer``'s output for
+        ``model`` from columns under ``prefix`` (``"course__"``)."""
+        items = []
+        for field in serializer._readable_fields:
+            name = field.field_name
+            if isinstance(field, relations.ManyRelatedField):
+                child = field.child_relation
+                if prefix or not isinstance(
+                        child, relations.PrimaryKeyRelatedField) \
+                        or child.pk_field is not None:
+                    raise Unsupported(name)
+                self.many.append((name, *many_pairs(model, field)))
+                # Placeholder, filled in by rows().
+                items.append(f"{name!r}: None")
+                continue
+            if isinstance(field, relations.PrimaryKeyRelatedField):
+                if field.pk_field is not None:
+                    raise Unsupported(name)
+                value = self.column(prefix + to_one_column(
+                    model, field, nested=bool(prefix)))
+            elif isinstance(field, serializers.Serializer):
+                # An expanded to-one relation, joined in the same query.
+                related = field.Meta.model
+                key = self.column(prefix + to_one_column(
+                    model, field, nested=bool(prefix)))
+                nested = self.expression(
+                    field, related, f"{prefix}{field.source}__")
+                value = f"(None if {key} is None else {nested})"
+            else:
+                convert = converter(field)
+                try:
+                    model_field = model._meta.get_field(field.source)
+                except FieldDoesNotExist:
+                    raise Unsupported(name)
+                value = self.column(prefix + (
+                    model_field.name if prefix else model_field.attname))
+                if convert is not None:
+                    helper = f"c{len(self.scope)}"
+                    self.scope[helper] = convert
+                    value = f"(None if {value} is None else " \
+                        f"{helper}({value}))"
+            items.append(f"{name!r}: {value}")
+        return "{%s}" % ", ".join(items)
+
+    def values(self, queryset, ordering=()):
+        """``queryset.values()`` of the projected columns, plus those named
+        in ``ordering`` so a cursor paginator can read its position."""
+        columns = list(self.columns)
+        for name in ordering:
+            if name.lstrip("-") not in columns:
+                columns.append(name.lstrip("-"))
+        return queryset.select_related(None).prefetch_related(None). \
+            values(*columns)
+
+    def pairs(self, queryset, owner, other, ids):
+        return queryset.filter(**{f"{owner}__in": ids}). \
+            order_by(other).values_list(owner, other)
+
+    def fill(self, data, ids, name, pairs):
+        groups = defaultdict(list)
+        for owner_id, other_id in pairs:
+            groups[owner_id].append(other_id)
+        for obj, pk in zip(data, ids):
+            obj[name] = groups.get(pk, [])
+
+    def rows(self, values):
+        """Project ``values`` (dicts from ``values()``) to output dicts."""
+        values = list(values)
+        data = [self.project(row) for row in values]
+        if self.many and values:
+            ids = [row[self.pk] for row in values]
+            for name, queryset, owner, other in self.many:
+                self.fill(data, ids, name,
+                          self.pairs(queryset, owner, other, ids))
+        return data
+
+    async def arows(self, values):
+        """rows() querying pk lists with the async ORM; ``values`` must be
+        fetched already."""
+        data = [self.project(row) for row in values]
+        if self.many and values:
+            ids = [row[self.pk] for row in values]
+            for name, queryset, owner, other in self.many:
+                pairs = self.pairs(queryset, owner, other, ids)
+                self.fill(data, ids, name, [pair async for pair in pairs])
+        return data
+
+
+# Compiled projections, least recently used first. The key space is every
+# valid field selection, so it is bounded.
+MAX_PROJECTIONS = 256
+_projections = OrderedDict()
+_projections_lock = threading.Lock()
+
+
+def get_projection(serializer_class, key, build):
+    """Cached Projection for ``serializer_class`` and selection ``key``;
+    ``build()`` makes the serializer on a miss. None if unsupported.
+
+    ``build()`` validates the selection, so a request naming unknown
+    fields raises before anything is cached.
+    """
+    cache_key = (serializer_class, key)
+    with _projections_lock:
+        if cache_key in _projections:
+            _projections.move_to_end(cache_key)
+            return _projections[cache_key]
+    try:
+        projection = Projection(build())
+    except Unsupported:
+        projection = None
+    with _projections_lock:
+        _projections[cache_key] = projection
+        while len(_projections) > MAX_PROJECTIONS:
+            _projections.popitem(last=False)
+    return projection
+
+
+class ProjectedListMixin:
+    """Serve ``list`` from ``.values()`` rows through a Projection.
+
+    Opt in per viewset with ``projected_list = True``. Falls back to the
+    serializer when its fields cannot be projected (expanded lists, method
+    fields). Output is identical either way.
+    """
+    projected_list = False
+
+    def list_projection(self):
+        if not self.projected_list:
+            return None
+        kwargs = self.fieldset_kwargs() \
+            if hasattr(self, "fieldset_kwargs") else {}
+        # Output order follows the serializer, so equal sets share a key.
+        key = tuple((name, None if value is None
+                     else tuple(sorted(set(value))))
+                    for name, value in sorted(kwargs.items()))
+        return get_projection(self.get_serializer_class(), key,
+                              self.get_serializer)
+
+    def projected_queryset(self, projection):
+        queryset = self.filter_queryset(self.get_queryset())
+        get_ordering = getattr(self.paginator, "get_ordering", None)
+        return projection.values(queryset, get_ordering(
+            self.request, queryset, self) if get_ordering else ())
+
+    def list(self, request, *args, **kwargs):
+        projection = self.list_projection()
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.projected_queryset(projection)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.rows(page))
+        return Response(projection.rows(queryset))
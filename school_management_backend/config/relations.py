@@ -0,0 +1,94 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class RelatedObjects(list):
+    """Objects resolved by BulkManyRelatedField, in submitted order.
+
+    ``missing`` holds the submitted pks that matched no row, when the field
+    leaves reporting them to ``check_scope()``.
+    """
+
+    def __init__(self, objs, missing=()):
+        super().__init__(objs)
+        self.missing = list(missing)
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """ManyRelatedField that resolves every submitted pk with one IN query.
+
+    The stock field calls ``queryset.get()`` once per item. This one checks
+    the pk types, loads all rows with a single ``in_bulk()`` and reports
+    every missing pk in one error.
+
+    With ``scope`` naming a to-one field of the related model (``"course"``)
+    the missing pks are not reported here. The serializer's ``validate()``
+    calls ``check_scope()`` once it knows the value that field must have,
+    and gets the missing and out-of-scope pks in one error.
+    """
+    default_error_messages = {
+        "does_not_exist": "Invalid pks {pk_value} - objects do not exist.",
+        "out_of_scope": "Invalid pks {pk_value} - objects belong to a "
+                        "different {scope}.",
+    }
+
+    def __init__(self, *args, scope=None, **kwargs):
+        self.scope = scope
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(pk_field.to_python(item))
+            except (TypeError, DjangoValidationError):
+                child.fail("incorrect_type", data_type=type(item).__name__)
+
+        pks = list(dict.fromkeys(pks))
+        found = queryset.in_bulk(pks)
+        missing = [pk for pk in pks if pk not in found]
+        if missing and self.scope is None:
+            self.fail("does_not_exist", pk_value=missing)
+        return RelatedObjects([found[pk] for pk in pks if pk in found],
+                              missing)
+
+    def check_scope(self, objs, value):
+        """Raise one error listing the missing pks of ``objs`` and those
+        whose ``scope`` field is not ``value``."""
+        model = self.child_relation.get_queryset().model
+        attname = model._meta.get_field(self.scope).attname
+        value = getattr(value, "pk", value)
+        errors = []
+        if objs.missing:
+            errors.append(self.error_messages["does_not_exist"].format(
+                pk_value=objs.missing))
+        wrong = [obj.pk for obj in objs if getattr(obj, attname) != value]
+        if wrong:
+            errors.append(self.error_messages["out_of_scope"].format(
+                pk_value=wrong, scope=self.scope))
+        if errors:
+            raise serializers.ValidationError({self.field_name: errors})
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField whose ``many=True`` form validates in bulk."""
+
+    @classmethod
+    def many_init(cls, *args, scope=None, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs),
+                       "scope": scope}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
@@ -0,0 +1,66 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # the stdlib json module is used instead
+    orjson = None
+
+# Datetimes go through DRF's encoder so they keep its format (millisecond
+# precision, "Z" for UTC) instead of orjson's.
+ORJSON_OPTIONS = 0 if orjson is None else \
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    The output matches JSONRenderer's compact UTF-8 form byte for byte.
+    Values orjson does not know (dates and datetimes, Decimal, lazy
+    translation strings, UUIDs in dict keys...) are handed to the same
+    ``encoder_class`` JSONRenderer uses. Indented output, ASCII-only or
+    non-compact settings and integers beyond 64 bits fall back to the
+    stdlib encoder. Unlike strict JSONRenderer, NaN and infinite floats are
+    written as ``null`` rather than raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii \
+                or not self.compact or self.get_indent(
+                    accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep JSONRenderer's escaping of U+2028/U+2029 for JavaScript.
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028"). \
+                replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes UTF-8 bodies with orjson when installed.
+
+    Bodies orjson rejects are re-parsed by the stdlib so error messages
+    (and the rare document only Python accepts, such as huge integers) stay
+    as before.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,108 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# The replica the current request reads from; None reads the primary.
+_read_alias = ContextVar("read_alias", default=None)
+
+
+class ReplicaRouter:
+    """Send reads to the replica ReplicaReadMixin chose for the request.
+
+    Outside such a request (writes, the admin, management commands,
+    signal handlers) every query goes to the primary. Writes always do,
+    even for objects loaded from a replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so objects may be mixed.
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, even in a replica request."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_key(request):
+    """Cache key pinning the caller to the primary: per token, or per user
+    for other authentication. None for anonymous requests."""
+    token = getattr(request.auth, "key", None)
+    if token:
+        return "replica-pin:" + hashlib.sha256(token.encode()).hexdigest()
+    if request.user.is_authenticated:
+        return f"replica-pin:user:{request.user.pk}"
+    return None
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests from a read replica.
+
+    Each GET/HEAD/OPTIONS request picks one alias from
+    ``DATABASE_REPLICAS`` at random. Any other request pins its token to
+    the primary for ``REPLICA_ROUTING["STICKY_SECONDS"]``, so the caller
+    reads its own writes despite replication lag. Pins live in the
+    ``REPLICA_ROUTING["CACHE"]`` cache. With no replicas configured this
+    does nothing.
+    """
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        key = self.replica_pin_key(request)
+        if key is not False and (key is None or not caches[
+                settings.REPLICA_ROUTING["CACHE"]].get(key)):
+            self.read_from_replica()
+
+    async def ainitial(self, request, *args, **kwargs):
+        """``initial`` for the async read views; the pin is read with
+        ``aget`` so a network cache never blocks the event loop."""
+        super().initial(request, *args, **kwargs)
+        key = self.replica_pin_key(request)
+        if key is not False and (key is None or not await caches[
+                settings.REPLICA_ROUTING["CACHE"]].aget(key)):
+            self.read_from_replica()
+
+    def replica_pin_key(self, request):
+        """The pin to check before reading a replica, None if there is
+        none to check, or False if this request reads the primary."""
+        if not settings.DATABASE_REPLICAS or \
+                request.method not in SAFE_METHODS:
+            return False
+        return pin_key(request)
+
+    def read_from_replica(self):
+        self._replica_token = _read_alias.set(
+            random.choice(settings.DATABASE_REPLICAS))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            _read_alias.reset(self._replica_token)
+            self._replica_token = None
+        elif settings.DATABASE_REPLICAS and \
+                request.method not in SAFE_METHODS:
+            key = pin_key(request)
+            if key is not None:
+                caches[settings.REPLICA_ROUTING["CACHE"]].set(
+                    key, True, settings.REPLICA_ROUTING["STICKY_SECONDS"])
+        return super().finalize_response(request, response, *args, **kwargs)
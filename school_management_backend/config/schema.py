@@ -0,0 +1,184 @@
+import hashlib
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.settings import api_settings
+from whitenoise.compress import Compressor, brotli_installed
+
+# Artifact files per renderer format, written by ``manage.py build_schema``.
+RENDERERS = {"json": OpenApiJsonRenderer, "yaml": OpenApiYamlRenderer}
+MANIFEST = "manifest.json"
+# Content-codings in order of preference, with their file suffixes.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def accepted_encodings(header):
+    """Content-codings in an Accept-Encoding header, minus those at q=0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, param = part.partition(";")
+        param = param.replace(" ", "")
+        if param.startswith("q="):
+            try:
+                if float(param[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class SchemaArtifact:
+    """A rendered schema with its compressed variants and ETags.
+
+    ``bodies`` maps a content-coding ("" for none) to bytes. The ETags
+    hash the uncompressed document, so they stay the same across
+    processes and deploys until the schema itself changes; each coding
+    gets its own suffix since strong validators differ per coding.
+    """
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        digest = hashlib.sha256(bodies[""]).hexdigest()[:32]
+        self.etags = {coding: f'"{digest}-{coding}"' if coding
+                      else f'"{digest}"' for coding in bodies}
+
+    @classmethod
+    def compress(cls, content):
+        bodies = {"": content}
+        if brotli_installed:
+            bodies["br"] = Compressor.compress_brotli(content)
+        bodies["gzip"] = Compressor.compress_gzip(content)
+        return cls({coding: body for coding, body in bodies.items()
+                    if not coding or len(body) < len(content)})
+
+    @classmethod
+    def render(cls, schema, fmt):
+        return cls.compress(RENDERERS[fmt]().render(schema,
+                                                   renderer_context={}))
+
+    def write(self, root, fmt):
+        path = Path(root) / f"openapi.{fmt}"
+        for coding, body in self.bodies.items():
+            path.with_name(path.name + ENCODINGS.get(coding, "")). \
+                write_bytes(body)
+
+    @classmethod
+    def read(cls, root, fmt):
+        path = Path(root) / f"openapi.{fmt}"
+        bodies = {"": path.read_bytes()}
+        for coding, suffix in ENCODINGS.items():
+            variant = path.with_name(path.name + suffix)
+            if variant.exists():
+                bodies[coding] = variant.read_bytes()
+        return cls(bodies)
+
+    def response(self, request, content_type, headers):
+        accepted = accepted_encodings(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        coding = next((coding for coding in ENCODINGS
+                       if coding in self.bodies and coding in accepted), "")
+        response = HttpResponse(self.bodies[coding],
+                                content_type=content_type, headers=headers)
+        if coding:
+            response["Content-Encoding"] = coding
+        response["ETag"] = etag = self.etags[coding]
+        response["Cache-Control"] = \
+            f"public, max-age={settings.SCHEMA_ARTIFACT['MAX_AGE']}"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        # A validator for any coding matches: the document is the same.
+        matched = set(parse_etags(
+            request.META.get("HTTP_IF_NONE_MATCH", ""))) \
+            & set(self.etags.values())
+        return get_conditional_response(
+            request, etag=matched.pop() if matched else etag,
+            response=response)
+
+
+def write_artifacts(root, schema, version):
+    """Write every format of ``schema`` and its compressed variants under
+    ``root``, then a manifest recording the code ``version``."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    # A manifest that is missing or names another version disables the
+    # artifact, so a half-written build is never served.
+    (root / MANIFEST).unlink(missing_ok=True)
+    artifacts = {fmt: SchemaArtifact.render(schema, fmt)
+                 for fmt in RENDERERS}
+    for fmt, artifact in artifacts.items():
+        artifact.write(root, fmt)
+    (root / MANIFEST).write_text(json.dumps({"version": version}))
+    return artifacts
+
+
+_prebuilt = {}
+_generated = {}
+
+
+def prebuilt(fmt):
+    """The build-time artifact for ``fmt``, or None when there is none
+    for the running ``CODE_VERSION``. Read from disk once per process."""
+    if not settings.CODE_VERSION:
+        # Without a version a manifest cannot tell one build from another.
+        return None
+    root = Path(settings.SCHEMA_ARTIFACT["ROOT"])
+    key = (root, settings.CODE_VERSION, fmt)
+    if key not in _prebuilt:
+        try:
+            manifest = json.loads((root / MANIFEST).read_text())
+            _prebuilt[key] = SchemaArtifact.read(root, fmt) \
+                if manifest.get("version") == settings.CODE_VERSION \
+                else None
+        except (OSError, ValueError):
+            _prebuilt[key] = None
+    return _prebuilt[key]
+
+
+class SchemaView(SpectacularAPIView):
+    """SpectacularAPIView that does not regenerate the schema per request.
+
+    The default schema comes from the artifact ``build_schema`` wrote for
+    this ``CODE_VERSION``. Without one, and for ``?lang=`` or API version
+    variants, the schema is generated once per process and kept in
+    memory, keyed by code version. Responses carry an ETag and are sent
+    brotli- or gzip-compressed when the client accepts it.
+    """
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or \
+            self._get_version_parameter(request)
+        lang = request.GET.get("lang") if settings.USE_I18N else None
+        fmt = request.accepted_renderer.format
+        artifact = prebuilt(fmt) if not version and not lang \
+            and self.serve_public and self.custom_settings is None \
+            and self.urlconf is None and self.patterns is None else None
+        if artifact is None:
+            # Arbitrary ?lang= or ?version= values must not grow the cache.
+            cacheable = self.serve_public \
+                and (not lang or lang in dict(settings.LANGUAGES)) \
+                and (not version
+                     or version in (api_settings.ALLOWED_VERSIONS or ()))
+            key = (settings.CODE_VERSION, type(self), fmt, version, lang)
+            artifact = _generated.get(key) if cacheable else None
+            if artifact is None:
+                generator = self.generator_class(
+                    urlconf=self.urlconf, api_version=version,
+                    patterns=self.patterns)
+                artifact = SchemaArtifact.render(generator.get_schema(
+                    request=request, public=self.serve_public), fmt)
+                if cacheable:
+                    _generated[key] = artifact
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+        filename = self._get_filename(request, version)
+        return artifact.response(request, content_type, {
+            "Content-Disposition": f'inline; filename="{filename}"'})
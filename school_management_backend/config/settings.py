@@ -1,7 +1,10 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+from django.conf import global_settings
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -29,12 +32,14 @@ INSTALLED_APPS = [
     "accounts",
     "academics",
     "students",
+    "changes",
 ]
 
 MIDDLEWARE = [
+    "config.instrumentation.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "config.static.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -63,12 +68,88 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# DB_CONN_MODE decides how connections are reused between requests:
+#   persistent  each worker thread keeps its connection for DB_CONN_MAX_AGE
+#               seconds and health-checks it before reuse (default under
+#               WSGI)
+#   pool        one psycopg 3 pool per process, DB_POOL_MIN_SIZE to
+#               DB_POOL_MAX_SIZE connections (default under ASGI)
+#   pgbouncer   persistent connections to a transaction-mode pgbouncer;
+#               server-side cursors are disabled since they cannot span
+#               pooled transactions
+#   none        a new connection for every request
+# Under ASGI each sync_to_async thread would keep its own persistent
+# connection, so config.asgi sets SERVER_INTERFACE and the default switches
+# to the pool, which hands connections back at the end of every request.
+SERVER_INTERFACE = os.getenv("SERVER_INTERFACE", "wsgi").strip().lower()
+DB_CONN_MODE = os.getenv(
+    "DB_CONN_MODE", "pool" if SERVER_INTERFACE == "asgi" else "persistent",
+).strip().lower()
+if DB_CONN_MODE not in ("persistent", "pool", "pgbouncer", "none"):
+    raise ImproperlyConfigured(f"Unknown DB_CONN_MODE {DB_CONN_MODE!r}.")
+DB_CONN_OPTIONS = {
+    "conn_max_age": int(os.getenv("DB_CONN_MAX_AGE", "600"))
+    if DB_CONN_MODE in ("persistent", "pgbouncer") else 0,
+    "conn_health_checks": DB_CONN_MODE in ("persistent", "pgbouncer"),
+    "disable_server_side_cursors": DB_CONN_MODE == "pgbouncer",
+}
 DATABASES = {
     "default": dj_database_url.config(
-        default=f"postgresql://{os.getenv('DB_USER', 'postgres')}:{os.getenv('DB_PASSWORD', 'postgres')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5433')}/{os.getenv('DB_NAME', 'school_management')}"
+        default=f"postgresql://{os.getenv('DB_USER', 'postgres')}:{os.getenv('DB_PASSWORD', 'postgres')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5433')}/{os.getenv('DB_NAME', 'school_management')}",
+        **DB_CONN_OPTIONS,
     )
 }
 
+# Read replicas: DATABASE_REPLICA_URLS is a comma-separated list of database
+# URLs, added as replica1, replica2, ... Safe-method requests to the API
+# viewsets read from one of them (config.replicas); after a write the same
+# token reads from the primary for REPLICA_STICKY_SECONDS. Pins are kept in
+# the REPLICA_STICKY_CACHE alias, which must be shared between workers: with
+# replicas configured, startup fails if it names a local memory or dummy
+# cache (the default alias is local memory).
+DATABASE_REPLICAS = []
+for number, url in enumerate([u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()], 1):
+    DATABASES[f"replica{number}"] = {
+        **dj_database_url.parse(url, **DB_CONN_OPTIONS),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+REPLICA_ROUTING = {
+    "STICKY_SECONDS": int(os.getenv("REPLICA_STICKY_SECONDS", "5")),
+    "CACHE": os.getenv("REPLICA_STICKY_CACHE", "default"),
+}
+
+if DB_CONN_MODE == "pool":
+    for database in DATABASES.values():
+        if database["ENGINE"].endswith("postgresql"):
+            database.setdefault("OPTIONS", {})["pool"] = {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            }
+
+AUTHENTICATION_BACKENDS = ["accounts.backends.PooledModelBackend"]
+
+# New hashes use PASSWORD_HASHER; hashes made with any other listed hasher are
+# upgraded transparently on the user's next successful login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", global_settings.PASSWORD_HASHERS[0])
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    h for h in global_settings.PASSWORD_HASHERS if h != PASSWORD_HASHER
+]
+
+# Login password hashing runs on a bounded thread pool. Once WORKERS hashes
+# are running and MAX_PENDING are waiting, further logins get a fast 429.
+# WORKERS=0 hashes inline on the request thread. Those limits are per
+# process; with sync workers set SHARED_CACHE to a CACHES alias with atomic
+# incr (Redis, Memcached) to cap hashing at SHARED_LIMIT across all workers.
+LOGIN_HASHING_POOL = {
+    "WORKERS": int(os.getenv("LOGIN_HASH_WORKERS", str(os.cpu_count() or 1))),
+    "MAX_PENDING": int(os.getenv("LOGIN_HASH_MAX_PENDING", "16")),
+    "SHARED_CACHE": os.getenv("LOGIN_HASH_SHARED_CACHE", ""),
+    "SHARED_LIMIT": int(os.getenv("LOGIN_HASH_SHARED_LIMIT", str(os.cpu_count() or 1))),
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -90,16 +171,114 @@ AUTH_USER_MODEL = "accounts.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson when installed, with a stdlib fallback (config.renderers).
+    "DEFAULT_RENDERER_CLASSES": [
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "config.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_FILTER_BACKENDS": [
+        "config.filters.QueryParamFilterBackend",
+        "rest_framework.filters.SearchFilter",
+        "rest_framework.filters.OrderingFilter",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetPagination",
+    "PAGE_SIZE": 100,
+}
+
+# Course/subject detail payloads are cached in the "responses" alias.
+# RESPONSE_CACHE_BACKEND is "file", "redis" (any Redis-protocol server;
+# needs the redis package), "locmem" or a dotted backend path. Writes
+# invalidate entries in this cache, so every worker must share it: the
+# default file cache is shared by the workers on one host, multi-host
+# deployments need Redis, and locmem only suits a single process. The test
+# settings (config.test_settings) use a dummy cache.
+RESPONSE_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "file")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": RESPONSE_CACHE_BACKENDS.get(RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_BACKEND),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", os.path.join(tempfile.gettempdir(), "school-management-responses")),
+        "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300")),
+    },
+}
+
+_sticky_backend = CACHES.get(REPLICA_ROUTING["CACHE"], {}).get("BACKEND")
+if DATABASE_REPLICAS and _sticky_backend in (None, RESPONSE_CACHE_BACKENDS["locmem"], RESPONSE_CACHE_BACKENDS["dummy"]):
+    raise ImproperlyConfigured(
+        f"REPLICA_STICKY_CACHE {REPLICA_ROUTING['CACHE']!r} must name a cache "
+        f"shared between workers (file, Redis, Memcached) when "
+        f"DATABASE_REPLICA_URLS is set, or writes are not pinned to the "
+        f"primary for later reads."
+    )
+
+# Token -> user lookups are cached for TIMEOUT seconds (0 disables). Set
+# SHARED_CACHE to an alias in CACHES to share entries and revocations between
+# workers; without it each worker trusts its own entries for at most
+# LOCAL_TIMEOUT seconds, the window in which a token revoked elsewhere works.
+TOKEN_AUTH_CACHE = {
+    "TIMEOUT": int(os.getenv("TOKEN_AUTH_CACHE_TIMEOUT", "60")),
+    "MAX_ENTRIES": int(os.getenv("TOKEN_AUTH_CACHE_MAX_ENTRIES", "10000")),
+    "SHARED_CACHE": os.getenv("TOKEN_AUTH_SHARED_CACHE", ""),
+    "LOCAL_TIMEOUT": int(os.getenv("TOKEN_AUTH_CACHE_LOCAL_TIMEOUT", "5")),
+}
+
+# Per-request DB/serializer/render timings (config.instrumentation): adds
+# Server-Timing headers and logs slow requests and repeated queries. When
+# disabled the middleware removes itself at startup.
+REQUEST_TIMING = {
+    "ENABLED": os.getenv("REQUEST_TIMING", "False").strip().lower() == "true",
+    "SLOW_REQUEST_MS": float(os.getenv("REQUEST_TIMING_SLOW_MS", "500")),
+    "SLOW_QUERY_MS": float(os.getenv("REQUEST_TIMING_SLOW_QUERY_MS", "100")),
+    "MAX_QUERIES": int(os.getenv("REQUEST_TIMING_MAX_QUERIES", "50")),
+    "DUPLICATE_QUERIES": int(os.getenv("REQUEST_TIMING_DUPLICATE_QUERIES", "5")),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "config.instrumentation": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }
 
 CORS_ALLOWED_ORIGINS = [h.strip() for h in os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:4200").split(",") if h.strip()]
 CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL_ORIGINS", "False").strip().lower() == "true"
 
+# /api/schema/ serves the artifact `manage.py build_schema` wrote to
+# SCHEMA_ARTIFACT["ROOT"] when it was built for the running CODE_VERSION.
+# Otherwise the schema is generated once per process and kept in memory.
+# CODE_VERSION defaults to the commit Render builds and runs.
+CODE_VERSION = os.getenv("CODE_VERSION", os.getenv("RENDER_GIT_COMMIT", ""))
+SCHEMA_ARTIFACT = {
+    "ROOT": Path(os.getenv("SCHEMA_ARTIFACT_ROOT", BASE_DIR / "schema")),
+    "MAX_AGE": int(os.getenv("SCHEMA_MAX_AGE", "3600")),
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "School Management API",
     "DESCRIPTION": """
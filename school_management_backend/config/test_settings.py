@@ -0,0 +1,27 @@
+"""Settings for the test suite. ``manage.py test`` uses them unless
+DJANGO_SETTINGS_MODULE says otherwise."""
+import copy
+
+from django.conf import global_settings
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES, RESPONSE_CACHE_BACKENDS
+
+# Password hashing is deliberately slow; the suite does not measure it.
+# The production hashers stay listed so their hashes still verify.
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+    *global_settings.PASSWORD_HASHERS,
+]
+
+# Rolled-back rows must never leak into cached payloads; the response
+# cache tests switch to local memory themselves.
+CACHES["responses"]["BACKEND"] = RESPONSE_CACHE_BACKENDS["dummy"]
+
+# A separate database standing in for a replica in the routing tests.
+# Nothing reads from it unless a test puts it in DATABASE_REPLICAS.
+DATABASES["replica"] = copy.deepcopy(DATABASES["default"])
+DATABASES["replica"]["TEST"] = {}
+if not DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    DATABASES["replica"]["TEST"]["NAME"] = \
+        f"test_{DATABASES['default']['NAME']}_replica"
@@ -0,0 +1,117 @@
+"""Helpers shared by the app test suites.
+
+``make_*`` build rows with unique names and emails, so they can be called
+from ``setUpTestData`` of any test case without clashing. ``use_token``
+authenticates a test client with a real token but skips the login round
+trip and its password hash.
+"""
+from contextlib import contextmanager
+from itertools import count
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from academics.models import Course, Lecturer, Subject
+from students.models import Student
+
+PASSWORD = "admin12345"
+
+_sequence = count(1)
+
+
+def make_user(email=None, password=PASSWORD, **fields):
+    email = email or f"user{next(_sequence)}@example.com"
+    return User.objects.create_user(email=email, password=password, **fields)
+
+
+def make_course(**fields):
+    fields.setdefault("name", f"Course {next(_sequence)}")
+    fields.setdefault("description", "")
+    return Course.objects.create(**fields)
+
+
+def make_lecturer(**fields):
+    n = next(_sequence)
+    fields.setdefault("first_name", "Lecturer")
+    fields.setdefault("last_name", str(n))
+    fields.setdefault("email", f"lecturer{n}@example.com")
+    return Lecturer.objects.create(**fields)
+
+
+def make_subject(course=None, lecturer=None, **fields):
+    fields.setdefault("name", f"Subject {next(_sequence)}")
+    fields.setdefault("description", "")
+    return Subject.objects.create(course=course or make_course(),
+                                  lecturer=lecturer or make_lecturer(),
+                                  **fields)
+
+
+def make_student(course=None, subjects=(), **fields):
+    n = next(_sequence)
+    fields.setdefault("first_name", "Student")
+    fields.setdefault("last_name", str(n))
+    fields.setdefault("email", f"student{n}@example.com")
+    fields.setdefault("date_of_birth", "2004-01-01")
+    student = Student.objects.create(course=course or make_course(),
+                                     **fields)
+    if subjects:
+        student.subjects.set(subjects)
+    return student
+
+
+def use_token(client, user):
+    """Send ``user``'s token with every request ``client`` makes."""
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return token
+
+
+class QueryCountAssertionsMixin:
+    """Test case mixin for asserting upper bounds on executed queries."""
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        if executed > limit:
+            sql = "\n".join(q["sql"] for q in ctx.captured_queries)
+            self.fail(f"{executed} queries executed, expected at most "
+                      f"{limit}:\n{sql}")
+
+    def count_queries(self, func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        with CaptureQueriesContext(connections[using]) as ctx:
+            func(*args, **kwargs)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, func, grow, limit=None):
+        """``func()`` runs as many queries (at most ``limit``) after
+        ``grow()`` adds rows as before it. Returns the last result."""
+        func()  # warm per-process caches such as token authentication
+        small = self.count_queries(func)
+        grow()
+        with self.assertMaxQueries(small if limit is None else limit):
+            result = func()
+        self.assertEqual(self.count_queries(func), small)
+        return result
+
+
+class AuthenticatedAPITestCase(QueryCountAssertionsMixin, APITestCase):
+    """APITestCase whose client sends the token of ``self.user``.
+
+    The user and token are created once per class; subclasses add their
+    rows in ``setUpTestData`` after calling super().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user(email="admin@example.com")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.token.key}")
@@ -6,7 +6,11 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # The test suite has its own settings (fast password hasher, test-only
+    # databases); an explicit DJANGO_SETTINGS_MODULE still wins.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE",
+                          "config.test_settings" if sys.argv[1:2] == ["test"]
+                          else "config.settings")
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.dispatch import Signal
+from rest_framework import serializers
+
+from academics.models import Subject
+from .models import Student
+
+Enrollment = Student.subjects.through
+
+# Sent with ``added`` and ``removed`` lists of (student_id, subject_id) pairs
+# whenever rows of the through table change: via the related managers, the
+# bulk path below, or cascades when a student or subject is deleted. Only
+# pairs whose rows were actually inserted or deleted are listed; receivers
+# such as the enrollment counters rely on that.
+enrollment_changed = Signal()
+
+ACTIONS = ("set", "add", "remove")
+
+BATCH_SIZE = 1000
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def apply_enrollment_operations(operations, owner="student"):
+    """Apply set/add/remove operations to the Student.subjects through table.
+
+    ``operations`` is a list of ``(action, owner_id, other_ids)`` tuples where
+    ``owner`` says which side ``owner_id`` refers to ("student" or
+    "subject"). Operations are applied in order, so later entries for the
+    same owner see the result of earlier ones.
+
+    All ids and the same-course rule are checked with one locking query per
+    table inside the transaction that writes the diff with bulk
+    insert/delete. Raises ValidationError with one error dict per operation
+    if anything is invalid; nothing is written in that case.
+
+    Returns ``{"added": n, "removed": n}``, counting only pairs that were
+    not enrolled before and pairs that were. The existing rows are read
+    after the locks are taken, so concurrent calls touching the same
+    students or subjects cannot both count one new pair.
+    """
+    if owner == "student":
+        owner_model, other_model = Student, Subject
+        owner_col, other_col = "student_id", "subject_id"
+        other_field = "subjects"
+    else:
+        owner_model, other_model = Subject, Student
+        owner_col, other_col = "subject_id", "student_id"
+        other_field = "students"
+
+    owner_ids = {owner_id for _, owner_id, _ in operations}
+    other_ids = {pk for _, _, ids in operations for pk in ids}
+
+    with transaction.atomic():
+        # Lock both sides before checking them: the same-course rule holds
+        # until commit, and concurrent bulk operations on the same rows
+        # queue here, so the enrollment rows read below are current.
+        student_ids, subject_ids = (owner_ids, other_ids) \
+            if owner == "student" else (other_ids, owner_ids)
+        courses = {
+            model: dict(model.objects.select_for_update().filter(id__in=ids)
+                        .order_by("id").values_list("id", "course_id"))
+            for model, ids in ((Student, student_ids), (Subject, subject_ids))
+        }
+        owner_courses = courses[owner_model]
+        other_courses = courses[other_model]
+
+        errors = []
+        for action, owner_id, ids in operations:
+            op_errors = {}
+            if owner_id not in owner_courses:
+                op_errors[owner] = [f"Invalid pk \"{owner_id}\" - object "
+                                    f"does not exist."]
+            missing = sorted(pk for pk in ids if pk not in other_courses)
+            if missing:
+                op_errors[other_field] = [f"Invalid pks {missing} - "
+                                          f"objects do not exist."]
+            if action != "remove" and owner_id in owner_courses:
+                course_id = owner_courses[owner_id]
+                wrong = sorted(pk for pk in ids if pk in other_courses
+                               and other_courses[pk] != course_id)
+                if wrong:
+                    op_errors.setdefault("non_field_errors", []).append(
+                        f"Students cannot enroll in subjects outside "
+                        f"their course: {wrong}."
+                    )
+            errors.append(op_errors)
+        if any(errors):
+            raise serializers.ValidationError({"operations": errors})
+
+        rows = Enrollment.objects.filter(**{f"{owner_col}__in": owner_ids}). \
+            values_list("id", owner_col, other_col)
+        existing = {}
+        current = defaultdict(set)
+        for row_id, owner_id, other_id in rows:
+            existing[(owner_id, other_id)] = row_id
+            current[owner_id].add(other_id)
+
+        for action, owner_id, ids in operations:
+            if action == "set":
+                current[owner_id] = set(ids)
+            elif action == "add":
+                current[owner_id].update(ids)
+            else:
+                current[owner_id].difference_update(ids)
+
+        desired = {(owner_id, other_id)
+                   for owner_id, others in current.items()
+                   for other_id in others}
+        to_add = desired - existing.keys()
+        to_remove = {pair: row_id for pair, row_id in existing.items()
+                     if pair not in desired}
+
+        for chunk in _chunks(to_remove.values()):
+            Enrollment.objects.filter(id__in=chunk).delete()
+        Enrollment.objects.bulk_create(
+            [Enrollment(**{owner_col: owner_id, other_col: other_id})
+             for owner_id, other_id in to_add],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+        if owner == "student":
+            added, removed = list(to_add), list(to_remove)
+        else:
+            added = [(b, a) for a, b in to_add]
+            removed = [(b, a) for a, b in to_remove]
+        if added or removed:
+            enrollment_changed.send(sender=Student, added=added,
+                                    removed=removed)
+
+    return {"added": len(to_add), "removed": len(to_remove)}
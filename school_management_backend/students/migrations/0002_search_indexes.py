@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+# Trigram indexes on UPPER(column) serve the case-insensitive prefix search
+# (``istartswith``) used by the list endpoints. PostgreSQL only.
+TRIGRAM_INDEXES = [
+    ("students_student_first_name_trgm", "students_student", "first_name"),
+    ("students_student_last_name_trgm", "students_student", "last_name"),
+    ("students_student_email_trgm", "students_student", "email"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["course", "last_name", "first_name"],
+                name="student_course_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["last_name", "first_name"], name="student_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["date_of_birth"], name="student_dob_idx"),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
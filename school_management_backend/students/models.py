@@ -1,8 +1,9 @@
 from django.db import models
 from academics.models import Course, Subject
+from changes.models import LoggedModel
 
 
-class Student(models.Model):
+class Student(LoggedModel):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
@@ -11,6 +12,17 @@ class Student(models.Model):
                               related_name="students")
     subjects = models.ManyToManyField(Subject, blank=True,
                                       related_name="students")
+    # Bumped on every save and on enrollment changes; drives conditional GET.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["course", "last_name", "first_name"],
+                         name="student_course_name_idx"),
+            models.Index(fields=["last_name", "first_name"],
+                         name="student_name_idx"),
+            models.Index(fields=["date_of_birth"], name="student_dob_idx"),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -1,14 +1,30 @@
 from rest_framework import serializers
 from academics.models import Subject, Course
-from academics.serializers import CourseSerializer, SubjectDetailSerializer
+from academics.serializers import (
+    CourseSerializer,
+    SubjectDetailSerializer,
+    SubjectSerializer,
+)
+from config.fieldsets import DynamicFieldsMixin
+from config.relations import BulkPrimaryKeyRelatedField
+from .enrollment import ACTIONS
 from .models import Student
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = Student
         fields = ["id", "first_name", "last_name", "email",
                   "date_of_birth", "course", "subjects"]
+        # Missing and wrong-course subjects are reported together by
+        # validate().
+        extra_kwargs = {"subjects": {"scope": "course"}}
+        expandable_fields = {
+            "course": (CourseSerializer, {}),
+            "subjects": (SubjectSerializer, {"many": True}),
+        }
 
     def validate(self, data):
         instance = getattr(self, "instance", None)
@@ -17,20 +33,13 @@ class StudentSerializer(serializers.ModelSerializer):
 
         # If subjects explicitly provided, validate them against new_course
         if "subjects" in data:
-            subjects = data.get("subjects") or []
-            invalid = [s.id for s in subjects if s.course_id != new_course.id]
-            if invalid:
-                raise serializers.ValidationError(
-                    "Student cannot enroll in subjects outside their course."
-                )
+            self.fields["subjects"].check_scope(data["subjects"], new_course)
         else:
             # If course is being changed but subjects are not being provided,
             # validate existing subjects remain within the new course.
             if instance and "course" in data:
-                existing_subjects = instance.subjects.all()
-                invalid_existing = [s.id for s in existing_subjects
-                                    if s.course_id != new_course.id]
-                if invalid_existing:
+                invalid_existing = instance.subjects.exclude(course=new_course)
+                if invalid_existing.exists():
                     raise serializers.ValidationError(
                         "Cannot change course while enrolled subjects are "
                         "outside the new course. Clear/replace subjects."
@@ -39,11 +48,31 @@ class StudentSerializer(serializers.ModelSerializer):
         return data
 
 
-class StudentDetailSerializer(serializers.ModelSerializer):
-    course = CourseSerializer(read_only=True)
-    subjects = SubjectDetailSerializer(many=True, read_only=True)
-
+class StudentDetailSerializer(DynamicFieldsMixin,
+                              serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = ["id", "first_name", "last_name", "email",
                   "date_of_birth", "course", "subjects"]
+        read_only_fields = fields
+        expandable_fields = {
+            "course": (CourseSerializer, {}),
+            "subjects": (SubjectDetailSerializer, {"many": True}),
+        }
+        default_expand = ["course", "subjects"]
+
+
+class StudentEnrollmentOperationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=ACTIONS, default="set")
+    student = serializers.IntegerField()
+    subjects = serializers.ListField(child=serializers.IntegerField())
+
+
+class BulkStudentEnrollmentSerializer(serializers.Serializer):
+    operations = StudentEnrollmentOperationSerializer(many=True,
+                                                      allow_empty=False)
+
+
+class BulkEnrollmentResultSerializer(serializers.Serializer):
+    added = serializers.IntegerField()
+    removed = serializers.IntegerField()
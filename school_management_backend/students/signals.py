@@ -0,0 +1,59 @@
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from academics.models import Subject
+from .enrollment import Enrollment, enrollment_changed
+from .models import Student
+
+
+@receiver(m2m_changed, sender=Enrollment)
+def relay_enrollment_changes(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Translate related-manager changes into enrollment_changed."""
+    related = instance.students if reverse else instance.subjects
+    if action == "pre_clear":
+        instance._cleared_enrollments = set(
+            related.values_list("pk", flat=True))
+        return
+    if action == "pre_remove":
+        # pk_set lists every pk passed to remove(), enrolled or not.
+        instance._removed_enrollments = set(
+            related.filter(pk__in=pk_set).values_list("pk", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_enrollments", set())
+    elif action == "post_remove":
+        pk_set = instance.__dict__.pop("_removed_enrollments", set())
+    elif action != "post_add":
+        return
+    if not pk_set:
+        return
+    pairs = [(pk, instance.pk) if reverse else (instance.pk, pk)
+             for pk in pk_set]
+    if action == "post_add":
+        enrollment_changed.send(sender=Student, added=pairs, removed=[])
+    else:
+        enrollment_changed.send(sender=Student, added=[], removed=pairs)
+
+
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Subject)
+def relay_cascaded_enrollments(sender, instance, **kwargs):
+    """Through rows deleted by cascade send no m2m_changed; report them."""
+    column = "student_id" if sender is Student else "subject_id"
+    pairs = list(Enrollment.objects.filter(**{column: instance.pk})
+                 .values_list("student_id", "subject_id"))
+    if pairs:
+        enrollment_changed.send(sender=Student, added=[], removed=pairs)
+
+
+@receiver(enrollment_changed)
+def touch_enrolled_rows(sender, added, removed, **kwargs):
+    """Bump updated_at on both sides so conditional GETs see the change."""
+    pairs = [*added, *removed]
+    now = timezone.now()
+    Student.objects.filter(pk__in={student for student, _ in pairs}). \
+        update(updated_at=now)
+    Subject.objects.filter(pk__in={subject for _, subject in pairs}). \
+        update(updated_at=now)
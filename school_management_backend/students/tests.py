@@ -1,39 +1,39 @@
-from rest_framework.test import APITestCase
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+
 from rest_framework import status
 
-from accounts.models import User
+from config.export import ExportMixin
+from config import projection
+from config.projection import Projection
+from config.testing import AuthenticatedAPITestCase
 from academics.models import Course, Lecturer, Subject
 from students.models import Student
+from students.views import StudentViewSet
 
 
-class BackendAssessmentTests(APITestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(email="admin@example.com",
-                                              password="admin12345")
-
-        login = self.client.post("/api/login/",
-                                  {"email": "admin@example.com",
-                                   "password": "admin12345"},
-                                  format="json")
-        self.assertEqual(login.status_code, status.HTTP_200_OK)
-        token = login.data["token"]
-        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
-
-        self.course_a = Course.objects.create(name="Course A",
-                                                 description="A")
-        self.course_b = Course.objects.create(name="Course B",
-                                                 description="B")
-
-        self.lecturer = Lecturer.objects.create(first_name="Lee",
-                                                  last_name="Kim",
-                                                  email="lee@example.com")
-
-        self.sub_a = Subject.objects.create(name="Math A", description="",
-                                            course=self.course_a,
-                                            lecturer=self.lecturer)
-        self.sub_b = Subject.objects.create(name="Math B", description="",
-                                            course=self.course_b,
-                                            lecturer=self.lecturer)
+class BackendAssessmentTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course_a = Course.objects.create(name="Course A",
+                                             description="A")
+        cls.course_b = Course.objects.create(name="Course B",
+                                             description="B")
+
+        cls.lecturer = Lecturer.objects.create(first_name="Lee",
+                                               last_name="Kim",
+                                               email="lee@example.com")
+
+        cls.sub_a = Subject.objects.create(name="Math A", description="",
+                                           course=cls.course_a,
+                                           lecturer=cls.lecturer)
+        cls.sub_b = Subject.objects.create(name="Math B", description="",
+                                           course=cls.course_b,
+                                           lecturer=cls.lecturer)
 
     def test_auth_required(self):
         self.client.credentials()
@@ -64,6 +64,23 @@ class BackendAssessmentTests(APITestCase):
         res = self.client.post("/api/students/", payload, format="json")
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_missing_and_wrong_course_subjects_reported_together(self):
+        payload = {
+            "first_name": "Jo",
+            "last_name": "Doe",
+            "email": "jo@example.com",
+            "date_of_birth": "2006-02-02",
+            "course": self.course_a.id,
+            "subjects": [self.sub_a.id, 999999, self.sub_b.id],
+        }
+        res = self.client.post("/api/students/", payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["subjects"], [
+            "Invalid pks [999999] - objects do not exist.",
+            f"Invalid pks [{self.sub_b.id}] - objects belong to a different "
+            "course.",
+        ])
+
     def test_student_detail_includes_course_and_subjects(self):
         student = Student.objects.create(
             first_name="Lara",
@@ -180,3 +197,578 @@ class BackendAssessmentTests(APITestCase):
             "course": self.course_b.id,
         }, format="json")
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StudentPaginationTests(AuthenticatedAPITestCase):
+    """Tests for opt-in keyset pagination on list endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Paged", description="")
+        for i in range(5):
+            Student.objects.create(
+                first_name=f"Page{i}", last_name="Student",
+                email=f"page{i}@example.com", date_of_birth="2004-01-01",
+                course=cls.course,
+            )
+
+    def test_list_without_page_size_is_unpaginated(self):
+        res = self.client.get("/api/students/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+        self.assertEqual(len(res.data), 5)
+
+    def test_cursor_pages_cover_all_rows_in_id_order(self):
+        seen = []
+        url = "/api/students/?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            seen.extend(s["id"] for s in res.data["results"])
+            url = res.data["next"]
+        expected = list(Student.objects.order_by("id")
+                        .values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_non_unique_ordering_pages_break_ties_by_id(self):
+        seen = []
+        url = "/api/students/?page_size=2&ordering=-last_name"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(s["id"] for s in res.data["results"])
+            url = res.data["next"]
+        expected = list(Student.objects.order_by("-last_name", "id")
+                        .values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        res = self.client.get("/api/students/?page_size=100000")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assertIsNone(res.data["next"])
+
+
+class BulkEnrollmentTests(AuthenticatedAPITestCase):
+    """Tests for the bulk-enroll actions on students and subjects."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course_a = Course.objects.create(name="Course A", description="")
+        cls.course_b = Course.objects.create(name="Course B", description="")
+        cls.lecturer = Lecturer.objects.create(first_name="Lee",
+                                               last_name="Kim",
+                                               email="lee@example.com")
+        cls.subs_a = [
+            Subject.objects.create(name=f"A{i}", description="",
+                                   course=cls.course_a,
+                                   lecturer=cls.lecturer)
+            for i in range(3)
+        ]
+        cls.sub_b = Subject.objects.create(name="B0", description="",
+                                           course=cls.course_b,
+                                           lecturer=cls.lecturer)
+        cls.students = [
+            Student.objects.create(
+                first_name=f"Bulk{i}", last_name="Student",
+                email=f"bulk{i}@example.com", date_of_birth="2004-01-01",
+                course=cls.course_a,
+            )
+            for i in range(4)
+        ]
+
+    def subject_ids(self, student):
+        return set(student.subjects.values_list("id", flat=True))
+
+    def test_set_add_and_remove(self):
+        s0, s1, s2 = self.students[:3]
+        a0, a1, a2 = self.subs_a
+        s1.subjects.set([a0, a1])
+        s2.subjects.set([a0, a1])
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"action": "set", "student": s0.id, "subjects": [a0.id, a2.id]},
+            {"action": "add", "student": s1.id, "subjects": [a2.id]},
+            {"action": "remove", "student": s2.id, "subjects": [a0.id]},
+        ]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"added": 3, "removed": 1})
+        self.assertEqual(self.subject_ids(s0), {a0.id, a2.id})
+        self.assertEqual(self.subject_ids(s1), {a0.id, a1.id, a2.id})
+        self.assertEqual(self.subject_ids(s2), {a1.id})
+
+    def test_operations_apply_in_order(self):
+        student = self.students[0]
+        a0, a1, _ = self.subs_a
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"action": "add", "student": student.id, "subjects": [a0.id]},
+            {"action": "set", "student": student.id, "subjects": [a1.id]},
+        ]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.subject_ids(student), {a1.id})
+
+    def test_existing_pairs_are_not_counted_as_added(self):
+        student = self.students[0]
+        a0, a1, _ = self.subs_a
+        student.subjects.set([a0])
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"action": "add", "student": student.id,
+             "subjects": [a0.id, a1.id]},
+        ]}, format="json")
+        self.assertEqual(res.data, {"added": 1, "removed": 0})
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"action": "set", "student": student.id,
+             "subjects": [a0.id, a1.id]},
+        ]}, format="json")
+        self.assertEqual(res.data, {"added": 0, "removed": 0})
+
+    def test_invalid_operations_are_reported_and_nothing_is_written(self):
+        s0, s1 = self.students[:2]
+        res = self.client.post("/api/students/bulk-enroll/", {"operations": [
+            {"student": s0.id, "subjects": [self.subs_a[0].id]},
+            {"student": s1.id, "subjects": [self.sub_b.id]},
+            {"student": 999999, "subjects": [999998]},
+        ]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data["operations"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("non_field_errors", errors[1])
+        self.assertIn("student", errors[2])
+        self.assertIn("subjects", errors[2])
+        self.assertEqual(self.subject_ids(s0), set())
+
+    def test_subject_bulk_enroll_mirror(self):
+        subject = self.subs_a[0]
+        ids = [s.id for s in self.students]
+        res = self.client.post("/api/subjects/bulk-enroll/", {"operations": [
+            {"action": "set", "subject": subject.id, "students": ids},
+        ]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"added": 4, "removed": 0})
+        self.assertEqual(
+            set(subject.students.values_list("id", flat=True)), set(ids)
+        )
+
+        res = self.client.post("/api/subjects/bulk-enroll/", {"operations": [
+            {"action": "add", "subject": self.sub_b.id, "students": ids},
+        ]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_operations(self):
+        subject_ids = [s.id for s in self.subs_a]
+        operations = [{"student": s.id, "subjects": subject_ids}
+                      for s in self.students]
+        # Includes one UPDATE of the subjects' enrollment counters and one
+        # INSERT into the change feed.
+        with self.assertMaxQueries(12):
+            res = self.client.post("/api/students/bulk-enroll/",
+                                   {"operations": operations}, format="json")
+        self.assertEqual(res.data, {"added": 12, "removed": 0})
+
+
+class StudentFilterTests(AuthenticatedAPITestCase):
+    """Tests for server-side filtering, search and ordering."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course_a = Course.objects.create(name="Course A", description="")
+        cls.course_b = Course.objects.create(name="Course B", description="")
+        cls.lec_1 = Lecturer.objects.create(first_name="One", last_name="L",
+                                            email="one@example.com")
+        cls.lec_2 = Lecturer.objects.create(first_name="Two", last_name="L",
+                                            email="two@example.com")
+        cls.sub_1 = Subject.objects.create(name="S1", course=cls.course_a,
+                                           lecturer=cls.lec_1)
+        cls.sub_2 = Subject.objects.create(name="S2", course=cls.course_a,
+                                           lecturer=cls.lec_1)
+        cls.sub_3 = Subject.objects.create(name="S3", course=cls.course_b,
+                                           lecturer=cls.lec_2)
+        cls.ann = Student.objects.create(
+            first_name="Ann", last_name="Zulu", email="ann@example.com",
+            date_of_birth="2001-01-01", course=cls.course_a)
+        cls.ann.subjects.set([cls.sub_1, cls.sub_2])
+        cls.ben = Student.objects.create(
+            first_name="Ben", last_name="Anders", email="ben@example.com",
+            date_of_birth="2003-06-01", course=cls.course_a)
+        cls.ben.subjects.set([cls.sub_2])
+        cls.cat = Student.objects.create(
+            first_name="Cat", last_name="Annan", email="cat@example.com",
+            date_of_birth="2005-01-01", course=cls.course_b)
+        cls.cat.subjects.set([cls.sub_3])
+
+    def ids(self, query):
+        res = self.client.get(f"/api/students/?{query}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [s["id"] for s in res.data]
+
+    def test_filter_by_course_subject_and_lecturer(self):
+        self.assertEqual(self.ids(f"course={self.course_b.id}"),
+                         [self.cat.id])
+        self.assertEqual(self.ids(f"subject={self.sub_2.id}"),
+                         [self.ann.id, self.ben.id])
+        # Ann takes two of lecturer 1's subjects but appears once.
+        self.assertEqual(self.ids(f"lecturer={self.lec_1.id}"),
+                         [self.ann.id, self.ben.id])
+
+    def test_filter_by_date_of_birth_range(self):
+        self.assertEqual(
+            self.ids("date_of_birth_after=2002-01-01"
+                     "&date_of_birth_before=2004-12-31"),
+            [self.ben.id],
+        )
+
+    def test_prefix_search_on_name_and_email(self):
+        self.assertEqual(self.ids("search=ann"), [self.ann.id, self.cat.id])
+        self.assertEqual(self.ids("search=BEN@"), [self.ben.id])
+        self.assertEqual(self.ids("search=nn"), [])
+
+    def test_ordering(self):
+        self.assertEqual(self.ids("ordering=last_name"),
+                         [self.ben.id, self.cat.id, self.ann.id])
+        self.assertEqual(self.ids("ordering=-date_of_birth"),
+                         [self.cat.id, self.ben.id, self.ann.id])
+
+    def test_invalid_filter_value_is_rejected(self):
+        res = self.client.get("/api/students/?date_of_birth_after=soon")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date_of_birth_after", res.data)
+
+    def test_out_of_range_id_is_rejected(self):
+        res = self.client.get("/api/students/?course=99999999999999999999999")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("course", res.data)
+
+    def test_subject_and_lecturer_filters(self):
+        res = self.client.get(f"/api/subjects/?student={self.ann.id}")
+        self.assertEqual([s["id"] for s in res.data],
+                         [self.sub_1.id, self.sub_2.id])
+        res = self.client.get(f"/api/lecturers/?course={self.course_a.id}")
+        self.assertEqual([lec["id"] for lec in res.data], [self.lec_1.id])
+
+
+class ExportTests(AuthenticatedAPITestCase):
+    """Tests for the streaming CSV/NDJSON export actions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Export", description="")
+        cls.other = Course.objects.create(name="Other", description="")
+        lecturer = Lecturer.objects.create(first_name="Lee", last_name="Ray",
+                                           email="lee@example.com")
+        cls.algebra = Subject.objects.create(name="Algebra",
+                                             course=cls.course,
+                                             lecturer=lecturer)
+        cls.biology = Subject.objects.create(name="Biology",
+                                             course=cls.course,
+                                             lecturer=lecturer)
+        cls.students = []
+        for i in range(5):
+            student = Student.objects.create(
+                first_name=f"Ex{i}", last_name="Port",
+                email=f"ex{i}@example.com", date_of_birth="2004-01-01",
+                course=cls.course,
+            )
+            student.subjects.set([cls.algebra, cls.biology])
+            cls.students.append(student)
+        Student.objects.create(
+            first_name="Solo", last_name="Port", email="solo@example.com",
+            date_of_birth="2004-01-01", course=cls.other)
+
+    def body(self, res):
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b"".join(res.streaming_content)
+        if res.get("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        return content.decode()
+
+    def test_student_csv_export(self):
+        res = self.client.get("/api/students/export/")
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("students.csv", res["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(self.body(res))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["email"], "ex0@example.com")
+        self.assertEqual(rows[0]["course"], "Export")
+        self.assertEqual(rows[0]["subjects"], "Algebra; Biology")
+        self.assertEqual(rows[5]["subjects"], "")
+
+    def test_student_ndjson_export_applies_filters(self):
+        res = self.client.get(
+            f"/api/students/export/?as=ndjson&course={self.other.id}")
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.body(res).splitlines()]
+        self.assertEqual(rows, [{
+            "id": rows[0]["id"], "first_name": "Solo", "last_name": "Port",
+            "email": "solo@example.com", "date_of_birth": "2004-01-01",
+            "course": "Other", "subjects": [],
+        }])
+
+    def test_export_is_gzipped_when_accepted(self):
+        res = self.client.get("/api/students/export/",
+                              HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(len(self.body(res).splitlines()), 7)
+
+    def test_export_is_not_gzipped_when_refused(self):
+        res = self.client.get("/api/students/export/",
+                              HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        self.assertNotIn("Content-Encoding", res)
+        self.assertEqual(len(self.body(res).splitlines()), 7)
+
+    def test_unknown_format_is_rejected(self):
+        res = self.client.get("/api/students/export/?as=xml")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("as", res.data)
+
+    def test_subjects_are_fetched_per_chunk_not_per_row(self):
+        self.client.get("/api/students/export/")  # warm the auth cache
+        with mock.patch.object(ExportMixin, "export_chunk_size", 2):
+            # One student query plus one subject query per chunk of 2.
+            with self.assertMaxQueries(4):
+                body = self.body(self.client.get("/api/students/export/"))
+        self.assertEqual(len(body.splitlines()), 7)
+
+    def test_default_rows_come_from_the_serializer(self):
+        with mock.patch.object(StudentViewSet, "export_row",
+                               ExportMixin.export_row):
+            res = self.client.get(
+                f"/api/students/export/?as=ndjson&course={self.other.id}")
+            rows = [json.loads(line) for line in self.body(res).splitlines()]
+            res = self.client.get("/api/students/export/")
+            csv_rows = list(csv.DictReader(io.StringIO(self.body(res))))
+        self.assertEqual(rows, [{
+            "id": rows[0]["id"], "first_name": "Solo", "last_name": "Port",
+            "email": "solo@example.com", "date_of_birth": "2004-01-01",
+            "course": self.other.id, "subjects": [],
+        }])
+        self.assertEqual(csv_rows[0]["subjects"],
+                         f"{self.algebra.id}; {self.biology.id}")
+
+    def test_subject_export_lists_enrolled_students(self):
+        res = self.client.get("/api/subjects/export/?as=ndjson")
+        rows = [json.loads(line) for line in self.body(res).splitlines()]
+        self.assertEqual([row["name"] for row in rows],
+                         ["Algebra", "Biology"])
+        self.assertEqual(rows[0]["lecturer"], "Lee Ray")
+        self.assertEqual(rows[0]["lecturer_email"], "lee@example.com")
+        self.assertEqual(sorted(rows[0]["students"]),
+                         [f"ex{i}@example.com" for i in range(5)])
+
+
+class SparseFieldsetTests(AuthenticatedAPITestCase):
+    """?fields= pruning and ?expand= nesting on lists and details."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = Course.objects.create(name="Sparse", description="")
+        cls.lecturer = Lecturer.objects.create(
+            first_name="Fi", last_name="Eld", email="fi@example.com")
+        cls.subject = Subject.objects.create(name="Pruning",
+                                             course=cls.course,
+                                             lecturer=cls.lecturer)
+        cls.student = Student.objects.create(
+            first_name="Spa", last_name="Rse", email="spa@example.com",
+            date_of_birth="2004-01-01", course=cls.course,
+        )
+        cls.student.subjects.add(cls.subject)
+
+    def setUp(self):
+        super().setUp()
+        self.client.get("/api/students/")  # warm the token auth cache
+
+    def test_fields_prune_list_output_and_queries(self):
+        with self.assertMaxQueries(2):  # validators + students
+            res = self.client.get("/api/students/?fields=id,email")
+        self.assertEqual(res.data, [{"id": self.student.id,
+                                     "email": "spa@example.com"}])
+
+    def test_expand_nests_relations_in_lists(self):
+        res = self.client.get("/api/students/?expand=course,subjects"
+                              "&fields=id,course,subjects.name")
+        self.assertEqual(res.data, [{
+            "id": self.student.id,
+            "course": {"id": self.course.id, "name": "Sparse",
+                       "description": ""},
+            "subjects": [{"name": "Pruning"}],
+        }])
+
+    def test_detail_expands_everything_by_default(self):
+        res = self.client.get(f"/api/subjects/{self.subject.id}/")
+        self.assertEqual(res.data["lecturer"]["email"], "fi@example.com")
+        self.assertEqual(res.data["students"][0]["email"], "spa@example.com")
+
+    def test_expand_on_detail_is_an_allow_list(self):
+        url = f"/api/subjects/{self.subject.id}/?expand=lecturer"
+        with self.assertMaxQueries(3):  # validators, subject, students
+            res = self.client.get(url)
+        self.assertEqual(res.data["lecturer"]["email"], "fi@example.com")
+        self.assertEqual(res.data["course"], self.course.id)
+        self.assertEqual(res.data["students"], [self.student.id])
+
+    def test_pruned_relations_are_not_queried(self):
+        url = f"/api/courses/{self.course.id}/?fields=id,name"
+        with self.assertMaxQueries(2):  # validators + course
+            res = self.client.get(url)
+        self.assertEqual(res.data, {"id": self.course.id, "name": "Sparse"})
+
+    def test_nested_expansion_follows_dotted_names(self):
+        res = self.client.get(
+            f"/api/students/{self.student.id}/?expand=subjects.lecturer"
+            "&fields=subjects.name,subjects.lecturer")
+        self.assertEqual(res.data, {"subjects": [{
+            "name": "Pruning",
+            "lecturer": {"id": self.lecturer.id, "first_name": "Fi",
+                         "last_name": "Eld", "email": "fi@example.com"},
+        }]})
+
+    def test_lecturer_courses_without_subjects(self):
+        res = self.client.get(f"/api/lecturers/{self.lecturer.id}/"
+                              "?fields=id,courses")
+        self.assertEqual(res.data, {"id": self.lecturer.id, "courses": [
+            {"id": self.course.id, "name": "Sparse"}]})
+
+    def test_unknown_names_are_rejected(self):
+        res = self.client.get("/api/students/?fields=id,password")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
+        res = self.client.get("/api/courses/?expand=students")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", res.data)
+        for query in ("fields=id,course.name",
+                      "fields=course.x&expand=course"):
+            res = self.client.get(f"/api/students/?{query}")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST,
+                             query)
+
+    def test_writes_ignore_the_parameters(self):
+        res = self.client.patch(
+            f"/api/students/{self.student.id}/?fields=id&expand=course",
+            {"first_name": "Sparser"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["course"], self.course.id)
+        self.assertEqual(res.data["first_name"], "Sparser")
+
+
+class ProjectedListParityTests(AuthenticatedAPITestCase):
+    """Lists served from values() rows match the serializer byte for byte."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        courses = [Course.objects.create(name=name, description=description)
+                   for name, description in (("Physics", "Forces "),
+                                             ("Art", ""), ("Empty", "none"))]
+        lecturers = [Lecturer.objects.create(
+            first_name=f"L{n}", last_name="Ecturer",
+            email=f"l{n}@example.com") for n in range(3)]
+        subjects = [Subject.objects.create(
+            name=f"Subject {n}", description=f"About {n}",
+            course=courses[n % 2], lecturer=lecturers[n % 3])
+            for n in range(6)]
+        for n in range(12):
+            student = Student.objects.create(
+                first_name=f"First{n % 5}", last_name=f"Last{n}",
+                email=f"s{n}@example.com",
+                date_of_birth=f"200{n % 10}-0{n % 9 + 1}-1{n % 10}",
+                course=courses[n % 2])
+            # Added out of pk order; students 0-1 have no subjects.
+            student.subjects.add(*[s for s in reversed(subjects)
+                                   if s.course_id == student.course_id
+                                   and n > 1][:n % 4])
+
+    def setUp(self):
+        super().setUp()
+        self.client.get("/api/students/")  # warm the token auth cache
+
+    def assertParity(self, url, viewset):
+        projected = self.client.get(url)
+        with mock.patch.object(viewset, "projected_list", False):
+            serialized = self.client.get(url)
+        self.assertEqual(projected.status_code, serialized.status_code)
+        self.assertEqual(projected.content, serialized.content)
+        self.assertEqual(projected.get("ETag"), serialized.get("ETag"))
+        return projected
+
+    def test_lists_match_the_serializer(self):
+        from academics.views import (
+            CourseViewSet, LecturerViewSet, SubjectViewSet,
+        )
+        from students.views import StudentViewSet
+        for resource, viewset, queries in (
+                ("students", StudentViewSet, [
+                    "", "?fields=email,id,date_of_birth",
+                    "?fields=subjects", "?ordering=-date_of_birth",
+                    "?search=First1", "?subject=1", "?course=2",
+                    "?page_size=5", "?page_size=5&ordering=-email",
+                    "?fields=id&ordering=-last_name&page_size=4",
+                    "?date_of_birth_after=2005-01-01&fields=id,course",
+                    "?expand=course", "?expand=course&fields=course.name",
+                    "?expand=course&page_size=5&ordering=-last_name"]),
+                ("subjects", SubjectViewSet, [
+                    "", "?fields=students", "?student=5", "?page_size=2",
+                    "?ordering=-name&fields=id,lecturer",
+                    "?expand=course,lecturer",
+                    "?expand=lecturer&fields=id,lecturer.email,students"]),
+                ("courses", CourseViewSet, ["", "?page_size=1"]),
+                ("lecturers", LecturerViewSet, [
+                    "", "?course=1", "?ordering=-email&page_size=2"])):
+            for query in queries:
+                with self.subTest(resource=resource, query=query):
+                    res = self.assertParity(f"/api/{resource}/{query}",
+                                            viewset)
+                    self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_cursor_pages_match_the_serializer(self):
+        from students.views import StudentViewSet
+        url = "/api/students/?page_size=5&ordering=-last_name&fields=id"
+        while url:
+            res = self.assertParity(url, StudentViewSet)
+            url = res.json()["next"]
+
+    def test_expanded_lists_and_errors_fall_back_to_the_serializer(self):
+        from students.views import StudentViewSet
+        res = self.assertParity("/api/students/?expand=subjects",
+                                StudentViewSet)
+        self.assertEqual({s["name"] for s in res.json()[2]["subjects"]},
+                         {"Subject 2", "Subject 4"})
+        res = self.assertParity("/api/students/?fields=password",
+                                StudentViewSet)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_projected_list_queries(self):
+        with mock.patch("config.projection.Projection.rows",
+                        autospec=True, side_effect=Projection.rows) as rows:
+            # validators, students, enrollments
+            with self.assertMaxQueries(3):
+                self.client.get("/api/students/")
+        rows.assert_called_once()
+        with self.assertMaxQueries(2):  # no relation list requested
+            self.client.get("/api/students/?fields=id,course")
+
+    def test_projection_cache_is_bounded(self):
+        projection._projections.clear()
+        self.client.get("/api/students/?fields=id,email")
+        self.client.get("/api/students/?fields=email,id,email,id")
+        self.assertEqual(len(projection._projections), 1)
+        for n in range(5):
+            self.client.get(f"/api/students/?fields=id,course.x{n}")
+        self.assertEqual(len(projection._projections), 1)
+        with mock.patch.object(projection, "MAX_PROJECTIONS", 2):
+            for fields in ("id", "email", "first_name"):
+                self.client.get(f"/api/students/?fields={fields}")
+        self.assertEqual(len(projection._projections), 2)
+
+    def test_subject_lists_load_no_students(self):
+        with mock.patch.object(Student, "from_db",
+                               wraps=Student.from_db) as from_db:
+            for query in ("", "?expand=course,lecturer", "?page_size=2"):
+                res = self.client.get(f"/api/subjects/{query}")
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+        from_db.assert_not_called()
+        with self.assertMaxQueries(3):  # validators, subjects, enrollments
+            self.client.get("/api/subjects/?expand=course,lecturer")
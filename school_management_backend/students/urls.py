@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from config.async_views import async_read_urls
 from .views import StudentViewSet
 
 router = DefaultRouter()
@@ -7,4 +8,6 @@ router.register(r"students", StudentViewSet, basename="students")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/", include(
+        async_read_urls("students", StudentViewSet, "students"))),
 ]
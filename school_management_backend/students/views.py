@@ -1,13 +1,94 @@
+from django.db.models import Prefetch
+from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from academics.models import Course, Lecturer, Subject
+from config.conditional import ConditionalGetMixin
+from config.export import ExportMixin
+from config.fieldsets import SparseFieldsetMixin
+from config.filters import DATE_PARAM, ID_PARAM
+from config.projection import ProjectedListMixin
+from config.replicas import ReplicaReadMixin
+from .enrollment import Enrollment, apply_enrollment_operations
 from .models import Student
-from .serializers import StudentSerializer, StudentDetailSerializer
+from .serializers import (
+    BulkEnrollmentResultSerializer,
+    BulkStudentEnrollmentSerializer,
+    StudentSerializer,
+    StudentDetailSerializer,
+)
+
+
+def taught_by(queryset, lecturer_id):
+    return queryset.filter(id__in=Enrollment.objects.filter(
+        subject__lecturer_id=lecturer_id).values("student_id"))
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ReplicaReadMixin, SparseFieldsetMixin,
+                     ConditionalGetMixin, ExportMixin, ProjectedListMixin,
+                     viewsets.ModelViewSet):
+    projected_list = True
     queryset = Student.objects.select_related("course"). \
         prefetch_related("subjects").all()
+    conditional_related = {
+        "course": (Course, "students"),
+        "subjects": (Subject, "students"),
+        "lecturers": (Lecturer, "subjects__students"),
+        "classmates": (Student, "subjects__students"),
+    }
+    filter_params = {
+        "course": "course_id",
+        "subject": "subjects",
+        "lecturer": taught_by,
+        "date_of_birth_after": "date_of_birth__gte",
+        "date_of_birth_before": "date_of_birth__lte",
+    }
+    filter_param_fields = {
+        "course": ID_PARAM,
+        "subject": ID_PARAM,
+        "lecturer": ID_PARAM,
+        "date_of_birth_after": DATE_PARAM,
+        "date_of_birth_before": DATE_PARAM,
+    }
+    search_fields = ["^first_name", "^last_name", "^email"]
+    ordering_fields = ["id", "first_name", "last_name", "email",
+                       "date_of_birth"]
+    ordering = ["id"]
+    export_fields = ["id", "first_name", "last_name", "email",
+                     "date_of_birth", "course", "subjects"]
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return StudentDetailSerializer
+        if self.action == "bulk_enroll":
+            return BulkStudentEnrollmentSerializer
         return StudentSerializer
+
+    def export_queryset(self, queryset):
+        return queryset.select_related("course").prefetch_related(None). \
+            prefetch_related(Prefetch("subjects",
+                                      queryset=Subject.objects.only("name")))
+
+    def export_row(self, student):
+        return {
+            "id": student.id,
+            "first_name": student.first_name,
+            "last_name": student.last_name,
+            "email": student.email,
+            "date_of_birth": student.date_of_birth,
+            "course": student.course.name,
+            "subjects": [subject.name for subject in student.subjects.all()],
+        }
+
+    @extend_schema(responses={200: BulkEnrollmentResultSerializer},
+                   summary="Set, add or remove subjects for many students")
+    @action(detail=False, methods=["post"], url_path="bulk-enroll")
+    def bulk_enroll(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = [(op["action"], op["student"], op["subjects"])
+                      for op in serializer.validated_data["operations"]]
+        result = apply_enrollment_operations(operations, owner="student")
+        return Response(result)
@@ -26,6 +26,10 @@ export class AuthService {
   }
 
   logout(): void {
+    // Revoke the token server-side; the local session ends either way.
+    if (this.tokenStorage.getToken()) {
+      this.http.post(`${this.apiUrl}/logout/`, {}).subscribe({ error: () => {} });
+    }
     this.tokenStorage.clear();
   }
 
@@ -2,7 +2,8 @@ import { Injectable, inject } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import { environment } from '../../../environments/environment';
-import { Student, StudentDetail } from '../../models/student.model';
+import { Student, StudentDetail, StudentQuery } from '../../models/student.model';
+import { CursorPage, toQueryParams } from '../../models/pagination.model';
 
 @Injectable({
   providedIn: 'root'
@@ -11,8 +12,17 @@ export class StudentsService {
   private http = inject(HttpClient);
   private apiUrl = `${environment.apiBaseUrl}/students/`;
 
-  getStudents(): Observable<Student[]> {
-    return this.http.get<Student[]>(this.apiUrl);
+  getStudents(query: StudentQuery = {}): Observable<Student[]> {
+    return this.http.get<Student[]>(this.apiUrl, { params: toQueryParams(query) });
+  }
+
+  // Pass the previous page's `next` URL as `cursorUrl` to fetch the following page.
+  getStudentsPage(pageSize = 100, cursorUrl?: string, query: StudentQuery = {}): Observable<CursorPage<Student>> {
+    if (cursorUrl) {
+      return this.http.get<CursorPage<Student>>(cursorUrl);
+    }
+    const params = toQueryParams(query).set('page_size', pageSize);
+    return this.http.get<CursorPage<Student>>(this.apiUrl, { params });
   }
 
   getStudent(id: number): Observable<StudentDetail> {
@@ -2,7 +2,8 @@ import { Injectable, inject } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import { environment } from '../../../environments/environment';
-import { Subject, SubjectDetail } from '../../models/subject.model';
+import { Subject, SubjectDetail, SubjectQuery } from '../../models/subject.model';
+import { toQueryParams } from '../../models/pagination.model';
 
 @Injectable({
   providedIn: 'root'
@@ -11,8 +12,8 @@ export class SubjectsService {
   private http = inject(HttpClient);
   private apiUrl = `${environment.apiBaseUrl}/subjects/`;
 
-  getSubjects(): Observable<Subject[]> {
-    return this.http.get<Subject[]>(this.apiUrl);
+  getSubjects(query: SubjectQuery = {}): Observable<Subject[]> {
+    return this.http.get<Subject[]>(this.apiUrl, { params: toQueryParams(query) });
   }
 
   getSubject(id: number): Observable<SubjectDetail> {
@@ -40,13 +40,11 @@ export class StudentFormComponent implements OnInit {
   loading = false;
   maxDate = new Date().toISOString().split('T')[0];
   courses: Course[] = [];
-  allSubjects: Subject[] = [];
   filteredSubjects: Subject[] = [];
   selectedSubjects: number[] = [];
 
   ngOnInit(): void {
     this.loadCourses();
-    this.loadSubjects();
 
     const id = this.route.snapshot.paramMap.get('id');
     if (id && id !== 'new') {
@@ -63,11 +61,21 @@ export class StudentFormComponent implements OnInit {
     });
   }
 
+  // Only the selected course's subjects are fetched; the API filters them.
   loadSubjects(): void {
-    this.subjectsService.getSubjects().subscribe({
+    const courseId = +this.studentForm.get('course')?.value;
+    if (!courseId) {
+      this.filteredSubjects = [];
+      this.selectedSubjects = [];
+      return;
+    }
+    this.subjectsService.getSubjects({ course: courseId, ordering: 'name' }).subscribe({
       next: (subjects) => {
-        this.allSubjects = subjects;
-        this.filterSubjects();
+        if (courseId !== +this.studentForm.get('course')?.value) return;
+        this.filteredSubjects = subjects;
+        this.selectedSubjects = this.selectedSubjects.filter(id =>
+          subjects.some(s => s.id === id)
+        );
         this.cdr.markForCheck();
       },
       error: (err) => console.error('Failed to load subjects:', err)
@@ -85,7 +93,7 @@ export class StudentFormComponent implements OnInit {
           course: student.course.id
         });
         this.selectedSubjects = student.subjects.map(s => s.id);
-        this.filterSubjects();
+        this.loadSubjects();
         this.cdr.markForCheck();
       },
       error: (err) => console.error('Failed to load student:', err)
@@ -93,20 +101,7 @@ export class StudentFormComponent implements OnInit {
   }
 
   onCourseChange(): void {
-    this.filterSubjects();
-    const courseId = +this.studentForm.get('course')?.value;
-    this.selectedSubjects = this.selectedSubjects.filter(id =>
-      this.allSubjects.find(s => s.id === id && s.course === courseId)
-    );
-  }
-
-  filterSubjects(): void {
-    const courseId = +this.studentForm.get('course')?.value;
-    if (courseId) {
-      this.filteredSubjects = this.allSubjects.filter(s => s.course === courseId);
-    } else {
-      this.filteredSubjects = [];
-    }
+    this.loadSubjects();
   }
 
   isSubjectSelected(subjectId: number): boolean {
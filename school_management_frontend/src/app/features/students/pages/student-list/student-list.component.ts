@@ -1,7 +1,9 @@
-import { Component, OnInit, inject, ChangeDetectorRef } from '@angular/core';
+import { Component, DestroyRef, OnInit, inject, ChangeDetectorRef } from '@angular/core';
+import { takeUntilDestroyed } from '@angular/core/rxjs-interop';
 import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { Router } from '@angular/router';
+import { Subject, debounceTime, distinctUntilChanged } from 'rxjs';
 import { StudentsService } from '../../../../core/services/students.service';
 import { Student } from '../../../../models/student.model';
 import { LoadingSpinnerComponent } from '../../../../shared/components/loading-spinner/loading-spinner.component';
@@ -20,24 +22,44 @@ export class StudentListComponent implements OnInit {
   private router = inject(Router);
   private cdr = inject(ChangeDetectorRef);
   private snackbar = inject(SnackbarService);
+  private destroyRef = inject(DestroyRef);
+  private searchTerms = new Subject<string>();
+  private request = 0;
 
   students: Student[] = [];
   loading = true;
-  currentPage = 1;
   pageSize = 8;
   searchTerm = '';
+  private pageUrl?: string;
+  nextUrl: string | null = null;
+  previousUrl: string | null = null;
 
   ngOnInit(): void {
+    this.searchTerms.pipe(
+      debounceTime(300),
+      distinctUntilChanged(),
+      takeUntilDestroyed(this.destroyRef)
+    ).subscribe(() => this.fetchStudents());
     this.loadStudents();
   }
 
   loadStudents(): void {
     this.loading = true;
-    this.studentsService.getStudents().subscribe({
-      next: (students) => {
-        this.students = students.sort((a, b) =>
-          `${a.first_name} ${a.last_name}`.localeCompare(`${b.first_name} ${b.last_name}`)
-        );
+    this.fetchStudents(this.pageUrl);
+  }
+
+  private fetchStudents(pageUrl?: string): void {
+    // Search, ordering and paging run on the server; stale responses are
+    // dropped so a slow earlier search cannot overwrite a later one.
+    const request = ++this.request;
+    const query = { search: this.searchTerm.trim(), ordering: 'first_name,last_name' };
+    this.studentsService.getStudentsPage(this.pageSize, pageUrl, query).subscribe({
+      next: (page) => {
+        if (request !== this.request) return;
+        this.pageUrl = pageUrl;
+        this.students = page.results;
+        this.nextUrl = page.next;
+        this.previousUrl = page.previous;
         this.loading = false;
         this.cdr.markForCheck();
       },
@@ -48,30 +70,12 @@ export class StudentListComponent implements OnInit {
     });
   }
 
-  get filteredStudents(): Student[] {
-    if (!this.searchTerm.trim()) return this.students;
-    const term = this.searchTerm.toLowerCase();
-    return this.students.filter(s =>
-      `${s.first_name} ${s.last_name}`.toLowerCase().includes(term) ||
-      s.email.toLowerCase().includes(term)
-    );
-  }
-
-  get paginatedStudents(): Student[] {
-    const start = (this.currentPage - 1) * this.pageSize;
-    return this.filteredStudents.slice(start, start + this.pageSize);
-  }
-
-  get totalPages(): number {
-    return Math.ceil(this.filteredStudents.length / this.pageSize);
-  }
-
   onSearch(): void {
-    this.currentPage = 1;
+    this.searchTerms.next(this.searchTerm.trim());
   }
 
-  goToPage(page: number): void {
-    this.currentPage = page;
+  goToPage(pageUrl: string | null): void {
+    if (pageUrl) this.fetchStudents(pageUrl);
   }
 
   viewStudent(id: number): void {
@@ -42,14 +42,12 @@ export class SubjectFormComponent implements OnInit {
   loading = false;
   courses: Course[] = [];
   lecturers: Lecturer[] = [];
-  allStudents: Student[] = [];
   filteredStudents: Student[] = [];
   selectedStudents: number[] = [];
 
   ngOnInit(): void {
     this.loadCourses();
     this.loadLecturers();
-    this.loadStudents();
 
     const id = this.route.snapshot.paramMap.get('id');
     if (id && id !== 'new') {
@@ -73,11 +71,21 @@ export class SubjectFormComponent implements OnInit {
     });
   }
 
+  // Only the selected course's students are fetched; the API filters them.
   loadStudents(): void {
-    this.studentsService.getStudents().subscribe({
+    const courseId = +this.subjectForm.get('course')?.value;
+    if (!courseId) {
+      this.filteredStudents = [];
+      this.selectedStudents = [];
+      return;
+    }
+    this.studentsService.getStudents({ course: courseId, ordering: 'last_name,first_name' }).subscribe({
       next: (students) => {
-        this.allStudents = students;
-        this.filterStudents();
+        if (courseId !== +this.subjectForm.get('course')?.value) return;
+        this.filteredStudents = students;
+        this.selectedStudents = this.selectedStudents.filter(id =>
+          students.some(s => s.id === id)
+        );
         this.cdr.markForCheck();
       },
       error: (err) => console.error('Failed to load students:', err)
@@ -94,7 +102,7 @@ export class SubjectFormComponent implements OnInit {
           lecturer: subject.lecturer.id
         });
         this.selectedStudents = subject.students.map(s => s.id);
-        this.filterStudents();
+        this.loadStudents();
         this.cdr.markForCheck();
       },
       error: (err) => console.error('Failed to load subject:', err)
@@ -102,20 +110,7 @@ export class SubjectFormComponent implements OnInit {
   }
 
   onCourseChange(): void {
-    this.filterStudents();
-    const courseId = +this.subjectForm.get('course')?.value;
-    this.selectedStudents = this.selectedStudents.filter(id =>
-      this.allStudents.find(s => s.id === id && s.course === courseId)
-    );
-  }
-
-  filterStudents(): void {
-    const courseId = +this.subjectForm.get('course')?.value;
-    if (courseId) {
-      this.filteredStudents = this.allStudents.filter(s => s.course === courseId);
-    } else {
-      this.filteredStudents = [];
-    }
+    this.loadStudents();
   }
 
   isStudentSelected(studentId: number): boolean {
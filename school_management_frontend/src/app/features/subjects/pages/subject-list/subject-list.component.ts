@@ -1,7 +1,9 @@
-import { Component, OnInit, inject, ChangeDetectorRef } from '@angular/core';
+import { Component, DestroyRef, OnInit, inject, ChangeDetectorRef } from '@angular/core';
+import { takeUntilDestroyed } from '@angular/core/rxjs-interop';
 import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { Router } from '@angular/router';
+import { Subject as SearchTerms, debounceTime, distinctUntilChanged } from 'rxjs';
 import { SubjectsService } from '../../../../core/services/subjects.service';
 import { Subject } from '../../../../models/subject.model';
 import { LoadingSpinnerComponent } from '../../../../shared/components/loading-spinner/loading-spinner.component';
@@ -20,6 +22,9 @@ export class SubjectListComponent implements OnInit {
   private router = inject(Router);
   private cdr = inject(ChangeDetectorRef);
   private snackbar = inject(SnackbarService);
+  private destroyRef = inject(DestroyRef);
+  private searchTerms = new SearchTerms<string>();
+  private request = 0;
 
   subjects: Subject[] = [];
   loading = true;
@@ -28,14 +33,27 @@ export class SubjectListComponent implements OnInit {
   searchTerm = '';
 
   ngOnInit(): void {
+    this.searchTerms.pipe(
+      debounceTime(300),
+      distinctUntilChanged(),
+      takeUntilDestroyed(this.destroyRef)
+    ).subscribe(() => this.fetchSubjects());
     this.loadSubjects();
   }
 
   loadSubjects(): void {
     this.loading = true;
-    this.subjectsService.getSubjects().subscribe({
+    this.fetchSubjects();
+  }
+
+  private fetchSubjects(): void {
+    // Search and ordering run on the server; stale responses are dropped
+    // so a slow earlier search cannot overwrite a later one.
+    const request = ++this.request;
+    this.subjectsService.getSubjects({ search: this.searchTerm.trim(), ordering: 'name' }).subscribe({
       next: (subjects) => {
-        this.subjects = subjects.sort((a, b) => a.name.localeCompare(b.name));
+        if (request !== this.request) return;
+        this.subjects = subjects;
         this.loading = false;
         this.cdr.markForCheck();
       },
@@ -47,26 +65,18 @@ export class SubjectListComponent implements OnInit {
     });
   }
 
-  get filteredSubjects(): Subject[] {
-    if (!this.searchTerm.trim()) return this.subjects;
-    const term = this.searchTerm.toLowerCase();
-    return this.subjects.filter(s =>
-      s.name.toLowerCase().includes(term) ||
-      s.description.toLowerCase().includes(term)
-    );
-  }
-
   get paginatedSubjects(): Subject[] {
     const start = (this.currentPage - 1) * this.pageSize;
-    return this.filteredSubjects.slice(start, start + this.pageSize);
+    return this.subjects.slice(start, start + this.pageSize);
   }
 
   get totalPages(): number {
-    return Math.ceil(this.filteredSubjects.length / this.pageSize);
+    return Math.ceil(this.subjects.length / this.pageSize);
   }
 
   onSearch(): void {
     this.currentPage = 1;
+    this.searchTerms.next(this.searchTerm.trim());
   }
 
   goToPage(page: number): void {
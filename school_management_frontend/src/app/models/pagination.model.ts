@@ -0,0 +1,15 @@
+import { HttpParams } from '@angular/common/http';
+
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export function toQueryParams(query: object): HttpParams {
+  return Object.entries(query).reduce(
+    (params, [key, value]) =>
+      value === undefined || value === null || value === '' ? params : params.set(key, value),
+    new HttpParams()
+  );
+}
@@ -17,3 +17,13 @@ export interface StudentDetail {
   course: { id: number; name: string; description: string };
   subjects: { id: number; name: string; description: string }[];
 }
+
+export interface StudentQuery {
+  search?: string;
+  course?: number;
+  subject?: number;
+  lecturer?: number;
+  date_of_birth_after?: string;
+  date_of_birth_before?: string;
+  ordering?: string;
+}
@@ -15,3 +15,11 @@ export interface SubjectDetail {
   lecturer: { id: number; first_name: string; last_name: string };
   students: { id: number; first_name: string; last_name: string }[];
 }
+
+export interface SubjectQuery {
+  search?: string;
+  course?: number;
+  lecturer?: number;
+  student?: number;
+  ordering?: string;
+}